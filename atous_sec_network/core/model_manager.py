@@ -6,17 +6,145 @@ import os
 import json
 import hashlib
 import logging
+import mmap
+import re
 import tempfile
+import bisect
 import shutil
-from typing import Dict, List, Optional, Tuple, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass
-from pathlib import Path
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import bsdiff4
-import gzip
-import zlib
 import time
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+try:
+    import hdiffpatch
+except ImportError:
+    hdiffpatch = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Algoritmos de integridade aceitos; SHA-256 é o padrão de servidores legados
+SUPPORTED_HASH_ALGORITHMS = ("blake3", "blake2b", "sha256")
+LEGACY_HASH_ALGORITHM = "sha256"
+
+# Formatos de patch; bsdiff4 é o padrão quando o servidor não informa o formato
+PATCH_BACKENDS = ("hdiffpatch", "bsdiff4")
+DEFAULT_PATCH_BACKEND = "bsdiff4"
+
+# Tamanho do bloco usado no cálculo incremental de checksums (1 MiB)
+HASH_CHUNK_SIZE = 1 << 20
+
+# ioctl do Linux para clonar extents entre arquivos (reflink em btrfs/XFS)
+FICLONE = 0x40049409
+
+# Retentativas HTTP da sessão compartilhada (erros de conexão e 502/503/504)
+HTTP_MAX_RETRIES = 3
+
+# Buffer de cópia do download sequencial (1 MiB)
+DOWNLOAD_BUFFER_SIZE = 1 << 20
+
+# Download paralelo com requisições Range (apenas para arquivos grandes)
+PARALLEL_DOWNLOAD_PARTS = 4
+PARALLEL_DOWNLOAD_MIN_SIZE = 8 << 20
+
+# Nome dos backups: model_v<versão>_<timestamp de criação>.bak
+BACKUP_NAME_PATTERN = re.compile(r"^model_v(\d+)_(\d+)\.bak$")
+
+# Cabeçalho esperado dos arquivos de modelo
+MODEL_MAGIC = b"MODL"
+MODEL_HEADER_SIZE = 8
+
+# Histórico de versões em JSON Lines (append-only) e formato legado
+HISTORY_FILENAME = "version_history.jsonl"
+LEGACY_HISTORY_FILENAME = "version_history.json"
+
+# Compacta o histórico quando o arquivo excede N vezes as versões mantidas
+HISTORY_COMPACTION_FACTOR = 4
+
+
+_SESSION: Optional[requests.Session] = None
+_SESSION_LOCK = threading.Lock()
+
+
+def _get_shared_session() -> requests.Session:
+    """
+    Retorna a sessão HTTP do módulo, criando-a na primeira chamada
+    
+    Todas as instâncias de FederatedModelUpdater compartilham o mesmo pool de
+    conexões, reaproveitando conexões com o servidor de agregação.
+    
+    Returns:
+        Sessão com pool de conexões e política de retentativas
+    """
+    global _SESSION
+    
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                retry = Retry(
+                    total=HTTP_MAX_RETRIES,
+                    backoff_factor=0.3,
+                    status_forcelist=[502, 503, 504]
+                )
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry)
+                
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _SESSION = session
+    
+    return _SESSION
+
+
+def _json_loads(data: bytes) -> Any:
+    """Desserializa JSON com orjson quando disponível"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj: Any) -> bytes:
+    """Serializa JSON compacto em bytes com orjson quando disponível"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+class _HashingWriter:
+    """Encaminha escritas para um arquivo atualizando um hash incremental"""
+    
+    def __init__(self, file: BinaryIO, hasher: Any):
+        self.file = file
+        self.hasher = hasher
+    
+    def write(self, data: bytes) -> int:
+        self.hasher.update(data)
+        return self.file.write(data)
+
 
 @dataclass
 class ModelMetadata:
@@ -60,16 +188,37 @@ class FederatedModelUpdater:
         # Configurações de segurança
         self.verify_signatures = True
         self.verify_checksums = True
+        self.hash_algorithm = "blake3" if blake3 is not None else "blake2b"
+        
+        # Formato do último patch baixado (informado pelo servidor)
+        self.patch_backend = DEFAULT_PATCH_BACKEND
+        
+        # Dicionário zstd treinado no formato do modelo (opcional)
+        self.zstd_dict_path: Optional[str] = None
+        self._zstd_dict = None
+        
+        # Cache do checksum do modelo: (st_mtime_ns, st_size, algoritmo, checksum)
+        self._info_cache: Optional[Tuple[int, int, str, str]] = None
         self.max_rollback_versions = 3
         
         # Configurações de rede
         self.timeout = 30
-        self.max_retries = 3
+        self.max_retries = HTTP_MAX_RETRIES
         self.chunk_size = 8192
         
+        # Sessão HTTP compartilhada entre instâncias (keep-alive e pool de conexões)
+        self._session = _get_shared_session()
+        
         # Histórico de versões
         self.version_history = []
+        self._history_lines = 0
+        # Reescrita do histórico adiada (migração que falhou ao carregar)
+        self._history_rewrite_pending = False
         self._load_version_history()
+        
+        # Índice de backups por versão: [(timestamp, caminho)] em ordem crescente
+        self._backup_index: Dict[int, List[Tuple[int, str]]] = {}
+        self._build_backup_index()
     
     def check_for_updates(self, aggregation_server: str) -> bool:
         """
@@ -83,7 +232,7 @@ class FederatedModelUpdater:
         """
         try:
             # Verificar versão mais recente
-            response = requests.get(
+            response = self._session.get(
                 f"{aggregation_server}/model-version",
                 timeout=self.timeout
             )
@@ -132,23 +281,73 @@ class FederatedModelUpdater:
         url = f"{aggregation_server}/model-diff/{self.current_version}/{target_version}"
         
         try:
-            response = requests.get(url, stream=True, timeout=self.timeout)
+            # Anunciar algoritmo de hash e formatos de patch preferidos;
+            # o servidor responde com os que utilizou
+            headers = {
+                "X-Hash-Algo": self.hash_algorithm,
+                "X-Patch-Backend": ", ".join(self._supported_patch_backends())
+            }
+            if zstandard is not None:
+                headers["Accept-Encoding"] = "zstd, gzip, deflate"
+            
+            response = self._session.get(
+                url,
+                headers=headers,
+                stream=True,
+                timeout=self.timeout
+            )
             response.raise_for_status()
             
+            if "X-Patch-Backend" in response.headers:
+                backend = response.headers["X-Patch-Backend"]
+                if backend not in self._supported_patch_backends():
+                    raise ValueError(f"Formato de patch não suportado: {backend}")
+                self.patch_backend = backend
+            else:
+                self.patch_backend = DEFAULT_PATCH_BACKEND
+            
             # Determinar nome do arquivo
             diff_filename = f"model_{self.current_version}_to_{target_version}.diff"
             diff_path = os.path.join(tempfile.gettempdir(), diff_filename)
             
-            # Download com verificação de integridade
-            with open(diff_path, "wb") as f:
-                for chunk in response.iter_content(chunk_size=self.chunk_size):
-                    if chunk:
-                        f.write(chunk)
+            expects_checksum = self.verify_checksums and "checksum" in response.headers
+            hash_algorithm = (
+                response.headers.get("X-Hash-Algo", LEGACY_HASH_ALGORITHM)
+                if expects_checksum else None
+            )
+            total_size = self._ranged_download_size(response)
+            
+            if total_size:
+                # Servidor aceita Range: baixar em partes paralelas
+                response.close()
+                self._download_parallel(url, diff_path, total_size)
+                calculated_checksum = (
+                    self._file_checksum(diff_path, hash_algorithm)
+                    if expects_checksum else None
+                )
+            else:
+                # Download com verificação de integridade: o checksum é calculado
+                # sobre os mesmos blocos gravados, sem reler o arquivo
+                hasher = self._new_hasher(hash_algorithm) if expects_checksum else None
+                with open(diff_path, "wb") as f:
+                    # Tamanho conhecido: reservar extents de uma vez
+                    preallocated = self._preallocate(f.fileno(), self._identity_length(response))
+                    
+                    writer = _HashingWriter(f, hasher) if hasher is not None else f
+                    shutil.copyfileobj(
+                        self._diff_content_stream(response), writer, DOWNLOAD_BUFFER_SIZE
+                    )
+                    
+                    # Descartar espaço reservado além do que foi recebido
+                    if preallocated:
+                        f.truncate(f.tell())
+                calculated_checksum = hasher.hexdigest() if hasher is not None else None
             
             # Verificar checksum se fornecido
-            if self.verify_checksums and "checksum" in response.headers:
+            if expects_checksum:
                 expected_checksum = response.headers["checksum"]
-                if not self._validate_checksum(diff_path, expected_checksum):
+                if calculated_checksum != expected_checksum:
+                    os.remove(diff_path)
                     raise ValueError("Checksum inválido para arquivo de diferenças")
             
             self.logger.info(f"Download concluído: {diff_path}")
@@ -158,6 +357,158 @@ class FederatedModelUpdater:
             self.logger.error(f"Falha no download: {e}")
             raise
     
+    def _diff_content_stream(self, response: requests.Response) -> BinaryIO:
+        """
+        Retorna o corpo do diff como arquivo, descomprimindo zstd quando negociado
+        
+        Args:
+            response: Resposta (streaming) do servidor
+            
+        Returns:
+            Objeto de leitura com o diff descomprimido
+        """
+        if response.headers.get("Content-Encoding") != "zstd":
+            # urllib3 decodifica gzip/deflate durante a leitura
+            response.raw.decode_content = True
+            return response.raw
+        
+        if zstandard is None:
+            raise ValueError("Diff comprimido com zstd, mas zstandard não está instalado")
+        
+        # Ler o corpo bruto e descomprimir com o dicionário do formato do modelo
+        decompressor = zstandard.ZstdDecompressor(dict_data=self._load_zstd_dict())
+        return decompressor.stream_reader(response.raw)
+    
+    def _load_zstd_dict(self) -> Any:
+        """Carrega (uma vez) o dicionário zstd configurado em zstd_dict_path"""
+        if self._zstd_dict is None and self.zstd_dict_path:
+            with open(self.zstd_dict_path, "rb") as f:
+                self._zstd_dict = zstandard.ZstdCompressionDict(f.read())
+        return self._zstd_dict
+    
+    def _ranged_download_size(self, response: requests.Response) -> int:
+        """
+        Determina se o download pode ser dividido em requisições Range
+        
+        Args:
+            response: Resposta inicial (streaming) do servidor
+            
+        Returns:
+            Tamanho total do arquivo, ou 0 se o download deve ser sequencial
+        """
+        if response.headers.get("Accept-Ranges") != "bytes" or not hasattr(os, "pwrite"):
+            return 0
+        
+        # Intervalos sobre conteúdo comprimido não correspondem aos bytes finais
+        total_size = self._identity_length(response)
+        return total_size if total_size >= PARALLEL_DOWNLOAD_MIN_SIZE else 0
+    
+    def _identity_length(self, response: requests.Response) -> int:
+        """
+        Retorna o Content-Length quando ele corresponde aos bytes gravados em disco
+        
+        Args:
+            response: Resposta do servidor
+            
+        Returns:
+            Tamanho do corpo sem codificação, ou 0 se desconhecido
+        """
+        headers = response.headers
+        if headers.get("Content-Encoding", "identity") != "identity":
+            return 0
+        
+        content_length = headers.get("Content-Length")
+        if not isinstance(content_length, str) or not content_length.isdigit():
+            return 0
+        
+        return int(content_length)
+    
+    def _preallocate(self, fd: int, size: int) -> bool:
+        """
+        Reserva espaço em disco para o arquivo de uma só vez (posix_fallocate)
+        
+        Args:
+            fd: Descritor do arquivo
+            size: Tamanho final esperado
+            
+        Returns:
+            True se o espaço foi reservado
+        """
+        if size <= 0 or not hasattr(os, "posix_fallocate"):
+            return False
+        
+        try:
+            os.posix_fallocate(fd, 0, size)
+            return True
+        except OSError as e:
+            self.logger.debug(f"posix_fallocate falhou: {e}")
+            return False
+    
+    def _download_parallel(self, url: str, diff_path: str, total_size: int) -> None:
+        """
+        Baixa um arquivo em partes paralelas usando requisições Range
+        
+        Args:
+            url: URL do arquivo
+            diff_path: Caminho de destino
+            total_size: Tamanho total do arquivo em bytes
+        """
+        part_size = -(-total_size // PARALLEL_DOWNLOAD_PARTS)
+        ranges = [
+            (start, min(start + part_size, total_size) - 1)
+            for start in range(0, total_size, part_size)
+        ]
+        
+        fd = os.open(diff_path, os.O_CREAT | os.O_WRONLY | os.O_TRUNC, 0o644)
+        try:
+            # Cada parte grava na sua própria fatia do arquivo pré-dimensionado
+            if not self._preallocate(fd, total_size):
+                os.ftruncate(fd, total_size)
+            with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+                futures = [
+                    executor.submit(self._download_range, url, fd, start, end)
+                    for start, end in ranges
+                ]
+                for future in futures:
+                    future.result()
+        except Exception:
+            os.close(fd)
+            os.remove(diff_path)
+            raise
+        
+        os.close(fd)
+        self.logger.debug(f"Download em {len(ranges)} partes concluído: {diff_path}")
+    
+    def _download_range(self, url: str, fd: int, start: int, end: int) -> None:
+        """
+        Baixa um intervalo de bytes e o grava na posição correspondente
+        
+        Args:
+            url: URL do arquivo
+            fd: Descritor do arquivo de destino
+            start: Primeiro byte do intervalo
+            end: Último byte do intervalo (inclusivo)
+        """
+        response = self._session.get(
+            url,
+            headers={"Range": f"bytes={start}-{end}"},
+            stream=True,
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        
+        if response.status_code != 206:
+            raise ValueError(f"Servidor ignorou requisição Range bytes={start}-{end}")
+        
+        offset = start
+        for chunk in response.iter_content(chunk_size=self.chunk_size):
+            if chunk:
+                os.pwrite(fd, chunk, offset)
+                offset += len(chunk)
+        
+        if offset != end + 1:
+            raise ValueError(f"Intervalo incompleto: {offset - start} de {end - start + 1} bytes")
+    
     def _apply_patch(self, diff_path: str) -> None:
         """
         Aplica patch ao modelo local
@@ -167,30 +518,20 @@ class FederatedModelUpdater:
         """
         # Criar backup antes da aplicação
         backup_path = self._create_backup()
+        patched_path = f"{self.model_path}.tmp"
         
         try:
-            # Ler modelo atual
-            with open(self.model_path, "rb") as f:
-                current_model = f.read()
-            
-            # Ler diferenças
-            with open(diff_path, "rb") as f:
-                diff_data = f.read()
-            
-            # Aplicar patch
-            patched_model = bsdiff4.patch(current_model, diff_data)
+            # Aplicar patch arquivo-a-arquivo, sem carregar modelo e diff em memória
+            self._patch_file(self.model_path, patched_path, diff_path)
             
             # Verificar integridade do modelo resultante
-            if not self._verify_model_integrity(patched_model):
+            if not self._verify_model_integrity(patched_path):
                 raise ValueError("Modelo resultante é inválido")
             
-            # Escrever novo modelo
-            with open(self.model_path, "wb") as f:
-                f.write(patched_model)
-            
-            # Verificar se o arquivo foi escrito corretamente
-            if os.path.getsize(self.model_path) == 0:
-                raise ValueError("Arquivo do modelo ficou vazio após patch")
+            # Garantir que o conteúdo está em disco antes da troca atômica;
+            # até o rename o modelo atual permanece intacto
+            self._fsync_file(patched_path)
+            os.replace(patched_path, self.model_path)
             
             # Limpar arquivo de diferenças
             os.remove(diff_path)
@@ -198,19 +539,59 @@ class FederatedModelUpdater:
             # Remover backup antigo se aplicação foi bem-sucedida
             if backup_path:
                 os.remove(backup_path)
+                self._unindex_backup(backup_path)
             
+            self._info_cache = None
             self.logger.info("Patch aplicado com sucesso")
             
         except Exception as e:
             self.logger.error(f"Falha na aplicação do patch: {e}")
             
-            # Restaurar backup em caso de falha
-            if backup_path and os.path.exists(backup_path):
-                shutil.copy2(backup_path, self.model_path)
-                self.logger.info("Backup restaurado após falha")
+            # Descartar saída parcial do patch; o backup permanece em disco
+            if os.path.exists(patched_path):
+                os.remove(patched_path)
             
             raise
     
+    def _supported_patch_backends(self) -> List[str]:
+        """Lista os formatos de patch disponíveis, em ordem de preferência"""
+        return [
+            backend for backend in PATCH_BACKENDS
+            if backend != "hdiffpatch" or hdiffpatch is not None
+        ]
+    
+    def _patch_file(self, old_path: str, new_path: str, diff_path: str) -> None:
+        """
+        Aplica o patch com o formato informado pelo servidor
+        
+        Args:
+            old_path: Modelo atual
+            new_path: Arquivo de saída do modelo atualizado
+            diff_path: Arquivo de diferenças
+        """
+        if self.patch_backend == "hdiffpatch":
+            if hdiffpatch is None:
+                raise ValueError("hdiffpatch não está instalado")
+            hdiffpatch.patch_file(old_path, diff_path, new_path)
+        else:
+            bsdiff4.file_patch(old_path, new_path, diff_path)
+    
+    def _fsync_file(self, file_path: str) -> None:
+        """
+        Força a gravação do conteúdo de um arquivo em disco
+        
+        Após o fsync as páginas estão limpas e podem sair do page cache.
+        
+        Args:
+            file_path: Caminho do arquivo
+        """
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+            self._fadvise_dontneed(fd)
+        finally:
+            os.close(fd)
+    
     def _create_backup(self) -> Optional[str]:
         """Cria backup do modelo atual"""
         if not os.path.exists(self.model_path):
@@ -220,60 +601,219 @@ class FederatedModelUpdater:
         backup_path = os.path.join(self.backup_dir, backup_filename)
         
         try:
-            shutil.copy2(self.model_path, backup_path)
+            self._fast_copy(self.model_path, backup_path)
+            self._index_backup(backup_path)
             self.logger.debug(f"Backup criado: {backup_path}")
             return backup_path
         except Exception as e:
             self.logger.error(f"Falha ao criar backup: {e}")
             return None
     
-    def _verify_model_integrity(self, model_data: bytes) -> bool:
+    def _build_backup_index(self) -> None:
+        """Indexa os backups existentes com uma única varredura do diretório"""
+        self._backup_index = {}
+        
+        try:
+            with os.scandir(self.backup_dir) as entries:
+                for entry in entries:
+                    self._index_backup(entry.path)
+        except OSError as e:
+            self.logger.warning(f"Falha ao indexar backups: {e}")
+    
+    def _index_backup(self, backup_path: str) -> None:
         """
-        Verifica integridade do modelo
+        Adiciona um backup ao índice, mantendo a ordem por timestamp
         
         Args:
-            model_data: Dados do modelo
+            backup_path: Caminho do arquivo de backup
+        """
+        match = BACKUP_NAME_PATTERN.match(os.path.basename(backup_path))
+        if not match:
+            return
+        
+        version, timestamp = int(match.group(1)), int(match.group(2))
+        bisect.insort(self._backup_index.setdefault(version, []), (timestamp, backup_path))
+    
+    def _unindex_backup(self, backup_path: str) -> None:
+        """
+        Remove um backup do índice
+        
+        Args:
+            backup_path: Caminho do arquivo de backup
+        """
+        match = BACKUP_NAME_PATTERN.match(os.path.basename(backup_path))
+        if not match:
+            return
+        
+        version = int(match.group(1))
+        backups = self._backup_index.get(version, [])
+        backups[:] = [item for item in backups if item[1] != backup_path]
+        if not backups:
+            self._backup_index.pop(version, None)
+    
+    def _fast_copy(self, src: str, dst: str) -> None:
+        """
+        Copia um arquivo evitando a cópia byte-a-byte em espaço de usuário
+        
+        Tenta, em ordem, reflink (FICLONE), os.copy_file_range e, se nenhum
+        estiver disponível, shutil.copy2. Metadados são preservados como em copy2.
+        
+        Args:
+            src: Arquivo de origem
+            dst: Arquivo de destino
+        """
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+                
+                try:
+                    if fcntl is None:
+                        raise OSError("ioctl indisponível")
+                    fcntl.ioctl(dst_fd, FICLONE, src_fd)
+                except OSError:
+                    # Sistema de arquivos sem CoW: cópia dentro do kernel
+                    if not hasattr(os, "copy_file_range"):
+                        raise
+                    remaining = os.fstat(src_fd).st_size
+                    while remaining > 0:
+                        copied = os.copy_file_range(src_fd, dst_fd, remaining)
+                        if copied == 0:
+                            # Cópia curta: um backup truncado não pode ser reportado como sucesso
+                            raise OSError(f"copy_file_range interrompido com {remaining} bytes restantes")
+                        remaining -= copied
+            
+            shutil.copystat(src, dst)
+        except OSError as e:
+            self.logger.debug(f"Cópia rápida indisponível ({e}), usando shutil.copy2")
+            shutil.copy2(src, dst)
+    
+    def _verify_model_integrity(self, model_path: str) -> bool:
+        """
+        Verifica integridade do modelo lendo apenas o cabeçalho via mmap
+        
+        Args:
+            model_path: Caminho do arquivo do modelo
             
         Returns:
             True se o modelo é válido
         """
-        # Verificações básicas
-        if len(model_data) == 0:
-            return False
-        
-        # Verificar cabeçalho do modelo (se aplicável)
-        if len(model_data) < 8:
+        try:
+            fd = os.open(model_path, os.O_RDONLY)
+        except OSError:
             return False
         
-        # Verificar magic number (exemplo)
-        magic_number = model_data[:4]
-        if magic_number != b"MODL":  # Exemplo
-            return False
+        try:
+            # Verificar cabeçalho do modelo (arquivo vazio ou truncado é inválido)
+            if os.fstat(fd).st_size < MODEL_HEADER_SIZE:
+                return False
+            
+            # Verificar magic number sem trazer o modelo para a memória
+            with mmap.mmap(fd, MODEL_HEADER_SIZE, access=mmap.ACCESS_READ) as mm:
+                magic_number = mm[:len(MODEL_MAGIC)]
+        finally:
+            os.close(fd)
         
-        return True
+        return magic_number == MODEL_MAGIC
     
-    def _validate_checksum(self, file_path: str, expected_checksum: str) -> bool:
+    def _validate_checksum(self, file_path: str, expected_checksum: str,
+                           algorithm: str = LEGACY_HASH_ALGORITHM) -> bool:
         """
         Valida checksum de um arquivo
         
         Args:
             file_path: Caminho do arquivo
             expected_checksum: Checksum esperado
+            algorithm: Algoritmo usado para gerar o checksum esperado
             
         Returns:
             True se checksum é válido
         """
         try:
-            with open(file_path, "rb") as f:
-                file_data = f.read()
-            
-            calculated_checksum = hashlib.sha256(file_data).hexdigest()
+            calculated_checksum = self._file_checksum(file_path, algorithm)
             return calculated_checksum == expected_checksum
             
         except Exception as e:
             self.logger.error(f"Erro ao validar checksum: {e}")
             return False
     
+    def _new_hasher(self, algorithm: str) -> Any:
+        """
+        Cria objeto de hash incremental para o algoritmo indicado
+        
+        Args:
+            algorithm: Nome do algoritmo (ver SUPPORTED_HASH_ALGORITHMS)
+            
+        Returns:
+            Objeto com interface update()/hexdigest()
+        """
+        if algorithm not in SUPPORTED_HASH_ALGORITHMS:
+            raise ValueError(f"Algoritmo de hash não suportado: {algorithm}")
+        
+        if algorithm == "blake3":
+            if blake3 is None:
+                raise ValueError("blake3 não está instalado")
+            return blake3.blake3(max_threads=blake3.blake3.AUTO)
+        
+        return hashlib.new(algorithm)
+    
+    def _file_checksum(self, file_path: str, algorithm: str = LEGACY_HASH_ALGORITHM) -> str:
+        """
+        Calcula o checksum de um arquivo em blocos, sem carregá-lo inteiro em memória
+        
+        Args:
+            file_path: Caminho do arquivo
+            algorithm: Algoritmo de hash (ver SUPPORTED_HASH_ALGORITHMS)
+            
+        Returns:
+            Checksum hexadecimal do arquivo
+        """
+        hasher = self._new_hasher(algorithm)
+        
+        with open(file_path, "rb") as f:
+            # Leitura sequencial: pedir read-ahead agressivo ao kernel
+            self._fadvise(f.fileno(), "POSIX_FADV_SEQUENTIAL")
+            
+            try:
+                # BLAKE3 mapeia o arquivo e distribui a árvore de hash entre threads
+                if hasattr(hasher, "update_mmap"):
+                    return hasher.update_mmap(file_path).hexdigest()
+                
+                # Python 3.11+: file_digest libera o GIL e usa o caminho nativo do OpenSSL
+                if hasattr(hashlib, "file_digest"):
+                    return hashlib.file_digest(f, algorithm).hexdigest()
+                
+                for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                    hasher.update(chunk)
+                return hasher.hexdigest()
+            finally:
+                # Modelo já lido: liberar o page cache para o restante do nó
+                self._fadvise_dontneed(f.fileno())
+    
+    def _fadvise(self, fd: int, advice: str) -> None:
+        """
+        Envia uma dica de acesso ao kernel (posix_fadvise), se suportado
+        
+        Args:
+            fd: Descritor do arquivo
+            advice: Nome da constante em os (ex: "POSIX_FADV_SEQUENTIAL")
+        """
+        if not hasattr(os, "posix_fadvise") or not hasattr(os, advice):
+            return
+        
+        try:
+            os.posix_fadvise(fd, 0, 0, getattr(os, advice))
+        except OSError as e:
+            self.logger.debug(f"posix_fadvise({advice}) falhou: {e}")
+    
+    def _fadvise_dontneed(self, fd: int) -> None:
+        """
+        Remove as páginas do arquivo do page cache (POSIX_FADV_DONTNEED)
+        
+        Args:
+            fd: Descritor do arquivo
+        """
+        self._fadvise(fd, "POSIX_FADV_DONTNEED")
+    
     def _check_device_resources(self, server_info: Dict) -> bool:
         """
         Verifica se o dispositivo tem recursos para a atualização
@@ -322,20 +862,61 @@ class FederatedModelUpdater:
         return available_memory > model_size * 3
     
     def _load_version_history(self) -> None:
-        """Carrega histórico de versões"""
-        history_file = os.path.join(self.backup_dir, "version_history.json")
+        """Carrega histórico de versões (JSON Lines, uma entrada por linha)"""
+        history_file = os.path.join(self.backup_dir, HISTORY_FILENAME)
+        legacy_file = os.path.join(self.backup_dir, LEGACY_HISTORY_FILENAME)
         
         try:
             if os.path.exists(history_file):
-                with open(history_file, "r") as f:
-                    self.version_history = json.load(f)
+                entries = []
+                lines = 0
+                with open(history_file, "rb") as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        lines += 1
+                        try:
+                            entries.append(_json_loads(line))
+                        except ValueError:
+                            # Linha cortada por uma queda no meio do append
+                            self.logger.warning("Linha inválida ignorada no histórico de versões")
+                
+                self._history_lines = lines
+                self.version_history = entries[-self.max_rollback_versions:]
+                if len(entries) < lines:
+                    # Reescrever sem a linha inválida antes do próximo append
+                    self._migrate_version_history(history_file)
+            elif os.path.exists(legacy_file):
+                # Formato antigo: array JSON reescrito a cada atualização
+                with open(legacy_file, "rb") as f:
+                    self.version_history = _json_loads(f.read())[-self.max_rollback_versions:]
+                # Migrar para JSON Lines: sem isso o próximo append criaria o .jsonl
+                # só com a nova entrada e o histórico antigo deixaria de ser lido
+                self._migrate_version_history(history_file)
         except Exception as e:
             self.logger.warning(f"Falha ao carregar histórico: {e}")
             self.version_history = []
     
+    def _migrate_version_history(self, history_file: str) -> None:
+        """
+        Reescreve o histórico carregado no formato JSON Lines
+        
+        Falhas de escrita (ex.: backup_dir somente leitura) mantêm as entradas
+        em memória; a reescrita é repetida no próximo salvamento.
+        
+        Args:
+            history_file: Caminho do arquivo de histórico
+        """
+        try:
+            self._compact_version_history(history_file)
+        except OSError as e:
+            self.logger.warning(f"Falha ao migrar histórico, nova tentativa no próximo salvamento: {e}")
+            self._history_rewrite_pending = True
+    
     def _save_version_history(self) -> None:
-        """Salva histórico de versões"""
-        history_file = os.path.join(self.backup_dir, "version_history.json")
+        """Salva histórico de versões acrescentando uma linha ao arquivo"""
+        history_file = os.path.join(self.backup_dir, HISTORY_FILENAME)
         
         try:
             # Adicionar versão atual ao histórico
@@ -351,12 +932,32 @@ class FederatedModelUpdater:
             if len(self.version_history) > self.max_rollback_versions:
                 self.version_history = self.version_history[-self.max_rollback_versions:]
             
-            with open(history_file, "w") as f:
-                json.dump(self.version_history, f, indent=2)
+            if (self._history_rewrite_pending
+                    or self._history_lines + 1 > self.max_rollback_versions * HISTORY_COMPACTION_FACTOR):
+                self._compact_version_history(history_file)
+            else:
+                with open(history_file, "ab") as f:
+                    f.write(_json_dumps(version_entry) + b"\n")
+                self._history_lines += 1
                 
         except Exception as e:
             self.logger.error(f"Falha ao salvar histórico: {e}")
     
+    def _compact_version_history(self, history_file: str) -> None:
+        """
+        Reescreve o histórico apenas com as versões mantidas em memória
+        
+        Args:
+            history_file: Caminho do arquivo de histórico
+        """
+        tmp_file = f"{history_file}.tmp"
+        with open(tmp_file, "wb") as f:
+            f.write(b"".join(_json_dumps(entry) + b"\n" for entry in self.version_history))
+        
+        os.replace(tmp_file, history_file)
+        self._history_lines = len(self.version_history)
+        self._history_rewrite_pending = False
+    
     def rollback_to_version(self, target_version: int) -> bool:
         """
         Faz rollback para uma versão anterior
@@ -368,20 +969,20 @@ class FederatedModelUpdater:
             True se rollback foi bem-sucedido
         """
         try:
-            # Encontrar backup da versão alvo
-            backup_pattern = f"model_v{target_version}_*.bak"
-            backup_files = list(Path(self.backup_dir).glob(backup_pattern))
+            # Encontrar backup da versão alvo no índice
+            backups = self._backup_index.get(target_version)
             
-            if not backup_files:
+            if not backups:
                 self.logger.error(f"Backup da versão {target_version} não encontrado")
                 return False
             
             # Usar o backup mais recente
-            latest_backup = max(backup_files, key=lambda x: x.stat().st_mtime)
+            latest_backup = backups[-1][1]
             
             # Restaurar backup
-            shutil.copy2(latest_backup, self.model_path)
+            self._fast_copy(latest_backup, self.model_path)
             self.current_version = target_version
+            self._info_cache = None
             
             self.logger.info(f"Rollback para versão {target_version} concluído")
             return True
@@ -398,20 +999,24 @@ class FederatedModelUpdater:
             Dicionário com informações do modelo
         """
         try:
-            if not os.path.exists(self.model_path):
+            try:
+                stat = os.stat(self.model_path)
+            except FileNotFoundError:
                 return {"error": "Modelo não encontrado"}
             
-            file_size = os.path.getsize(self.model_path)
-            
-            with open(self.model_path, "rb") as f:
-                model_data = f.read()
-            
-            checksum = hashlib.sha256(model_data).hexdigest()
+            # Reaproveitar checksum se o arquivo não mudou desde o último cálculo
+            cache_key = (stat.st_mtime_ns, stat.st_size, self.hash_algorithm)
+            if self._info_cache is not None and self._info_cache[:3] == cache_key:
+                checksum = self._info_cache[3]
+            else:
+                checksum = self._file_checksum(self.model_path, self.hash_algorithm)
+                self._info_cache = cache_key + (checksum,)
             
             return {
                 "version": self.current_version,
-                "size": file_size,
+                "size": stat.st_size,
                 "checksum": checksum,
+                "checksum_algorithm": self.hash_algorithm,
                 "path": self.model_path,
                 "node_id": self.node_id,
                 "last_updated": time.time()
@@ -436,13 +1041,19 @@ class FederatedModelUpdater:
             max_age_seconds = max_age_days * 24 * 3600
             removed_count = 0
             
-            for backup_file in Path(self.backup_dir).glob("*.bak"):
-                file_age = current_time - backup_file.stat().st_mtime
-                
-                if file_age > max_age_seconds:
-                    backup_file.unlink()
-                    removed_count += 1
-                    self.logger.debug(f"Backup removido: {backup_file}")
+            # scandir reaproveita os dados do diretório, evitando um Path por arquivo
+            with os.scandir(self.backup_dir) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".bak") or not entry.is_file():
+                        continue
+                    
+                    file_age = current_time - entry.stat().st_mtime
+                    
+                    if file_age > max_age_seconds:
+                        os.unlink(entry.path)
+                        self._unindex_backup(entry.path)
+                        removed_count += 1
+                        self.logger.debug(f"Backup removido: {entry.path}")
             
             self.logger.info(f"{removed_count} backups antigos removidos")
             return removed_count
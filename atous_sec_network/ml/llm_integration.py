@@ -2,26 +2,250 @@
 LLM Integration - Cognitive Pipeline
 Pipeline integrado para transferência de contexto entre LLM e SLM
 """
+import os
+import gzip
 import json
+import base64
+import hashlib
 import logging
+import stat
 import time
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Union
 from dataclasses import dataclass
+from collections import OrderedDict
 import requests
+from requests.adapters import HTTPAdapter
 import numpy as np
 
 try:
+    import torch
     from transformers import pipeline, AutoTokenizer, AutoModel
     TRANSFORMERS_AVAILABLE = True
 except ImportError:
     TRANSFORMERS_AVAILABLE = False
     logging.warning("Transformers não disponível - funcionalidade limitada")
 
+try:
+    import intel_extension_for_pytorch as ipex
+except ImportError:
+    ipex = None
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Classes de hardware em que o SLM é sempre quantizado para int8
+QUANTIZED_HARDWARE_CLASSES = ("ultra_low", "low")
+
+# Classes de hardware em que o forward roda com autocast BF16
+BF16_HARDWARE_CLASSES = ("medium", "high")
+
+# Versão do opset usada na exportação ONNX do SLM
+ONNX_OPSET_VERSION = 17
+
+# Diretório padrão (por usuário, sob o cache do usuário) dos grafos ONNX exportados
+DEFAULT_ONNX_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "atous_onnx"
+)
+
+# Tamanho do lote de aquecimento após torch.compile
+COMPILE_WARMUP_TOKENS = 16
+
+# Dimensão do embedding usado em modo simulação
+SIM_EMBEDDING_DIM = 768
+
+# Comprimento máximo (tokens) da codificação usada por embeddings e resumo
+ENCODE_MAX_LENGTH = 512
+
+# Número máximo de textos por forward em process_data_batch
+EMBEDDING_BATCH_SIZE = 32
+
+# Formatos de serialização suportados para o payload transmitido
+WIRE_FORMATS = ("json", "msgpack")
+
+# Tamanho (bytes) acima do qual payloads MessagePack são comprimidos com gzip
+GZIP_MIN_SIZE = 1000
+
+# Assinatura de um stream gzip
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Maior valor absoluto representável na quantização simétrica int8
+INT8_MAX = 127
+
+# Pool de conexões HTTP mantidas com o endpoint do LLM
+HTTP_POOL_CONNECTIONS = 4
+HTTP_POOL_MAXSIZE = 16
+
+# Campos vetoriais omitidos do prompt enviado ao LLM
+PROMPT_EXCLUDED_KEYS = frozenset({
+    "devices", "embeddings", "emb_q", "scale",
+    "avg_embedding", "embedding_variance", "embedding_correlation",
+    "embedding_correlation_dim"
+})
+
+
+if numba is not None:
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def _aggregate_kernel(embs, out_mean, out_var):
+        """Calcula média e variância por dimensão em uma única passada (Welford)"""
+        n, d = embs.shape
+        for j in numba.prange(d):
+            mean = 0.0
+            m2 = 0.0
+            for i in range(n):
+                x = embs[i, j]
+                delta = x - mean
+                mean += delta / (i + 1)
+                m2 += delta * (x - mean)
+            out_mean[j] = mean
+            out_var[j] = m2 / n
+else:
+    _aggregate_kernel = None
+
+
+def _embedding_moments(embs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calcula média e variância por dimensão dos embeddings agregados
+    
+    Args:
+        embs: Matriz contígua (dispositivos, dimensão) em float32
+        
+    Returns:
+        Tupla (média, variância)
+    """
+    if _aggregate_kernel is None:
+        return embs.mean(axis=0), embs.var(axis=0)
+    
+    out_mean = np.empty(embs.shape[1], dtype=np.float32)
+    out_var = np.empty(embs.shape[1], dtype=np.float32)
+    _aggregate_kernel(embs, out_mean, out_var)
+    return out_mean, out_var
+
+
+def decode_payload(data: Union[str, bytes]) -> Dict[str, Any]:
+    """
+    Decodifica um payload produzido por process_data
+    
+    Args:
+        data: Payload JSON (str) ou MessagePack, opcionalmente comprimido com gzip
+        
+    Returns:
+        Payload decodificado
+    """
+    if isinstance(data, str):
+        return json.loads(data)
+    
+    if data[:2] == GZIP_MAGIC:
+        data = gzip.decompress(data)
+    
+    if data[:1] == b"{" or msgpack is None:
+        return json.loads(data)
+    return msgpack.unpackb(data)
+
+
+def quantize_embeddings(embeddings: np.ndarray, binary: bool = False) -> Dict[str, Any]:
+    """
+    Quantiza embeddings para int8 com escala simétrica por tensor
+    
+    Args:
+        embeddings: Embeddings em ponto flutuante
+        binary: Se True mantém os bytes brutos (MessagePack); senão usa base64 (JSON)
+        
+    Returns:
+        Dicionário com "emb_q" e "scale"
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    max_abs = float(np.abs(embeddings).max()) if embeddings.size else 0.0
+    scale = max_abs / INT8_MAX if max_abs > 0 else 1.0
+    
+    quantized = np.round(embeddings / scale).astype(np.int8).tobytes()
+    if not binary:
+        quantized = base64.b64encode(quantized).decode("ascii")
+    
+    return {"emb_q": quantized, "scale": scale}
+
+
+def dequantize_embeddings(context: Dict[str, Any]) -> np.ndarray:
+    """
+    Recupera os embeddings de um contexto recebido
+    
+    Args:
+        context: Contexto com "emb_q"/"scale" ou com a lista "embeddings"
+        
+    Returns:
+        Embeddings em float32
+    """
+    if "emb_q" not in context:
+        return np.asarray(context["embeddings"], dtype=np.float32)
+    
+    raw = context["emb_q"]
+    if isinstance(raw, str):
+        raw = base64.b64decode(raw)
+    return np.frombuffer(raw, dtype=np.int8).astype(np.float32) * np.float32(context["scale"])
+
+
+def _embedding_correlation(embs: np.ndarray) -> Dict[str, Any]:
+    """
+    Calcula a correlação entre dimensões dos embeddings via GEMM em float32
+    
+    Args:
+        embs: Matriz contígua (dispositivos, dimensão) em float32
+        
+    Returns:
+        Triângulo superior em float16 codificado em base64 e a dimensão da matriz
+    """
+    std = embs.std(axis=0)
+    std[std == 0] = 1.0  # Dimensões constantes ficam com correlação zero
+    standardized = (embs - embs.mean(axis=0)) / std
+    correlation = np.dot(standardized.T, standardized) / embs.shape[0]
+    
+    upper = correlation[np.triu_indices(embs.shape[1])].astype(np.float16)
+    return {
+        "embedding_correlation": base64.b64encode(upper.tobytes()).decode("ascii"),
+        "embedding_correlation_dim": embs.shape[1]
+    }
+
+
+def decode_embedding_correlation(data: Dict[str, Any]) -> np.ndarray:
+    """
+    Reconstrói a matriz de correlação simétrica produzida por aggregate_contexts
+    
+    Args:
+        data: Dados agregados com "embedding_correlation" e "embedding_correlation_dim"
+        
+    Returns:
+        Matriz (dimensão, dimensão) em float32
+    """
+    dim = data["embedding_correlation_dim"]
+    upper = np.frombuffer(base64.b64decode(data["embedding_correlation"]), dtype=np.float16)
+    
+    correlation = np.zeros((dim, dim), dtype=np.float32)
+    rows, cols = np.triu_indices(dim)
+    correlation[rows, cols] = upper
+    correlation[cols, rows] = upper
+    return correlation
+
 
 @dataclass
 class CognitiveContext:
     """Contexto cognitivo para transferência entre modelos"""
-    embeddings: List[float]
+    embeddings: np.ndarray
     context_summary: str
     metadata: Dict[str, Any]
     timestamp: float
@@ -52,14 +276,44 @@ class CognitivePipeline:
         self.llm_endpoint = config.get("llm_endpoint", "http://localhost:8000/llm")
         self.hardware_class = config.get("hardware_class", "low")
         
+        # Formato de serialização do payload (JSON por compatibilidade)
+        self.wire_format = config.get("wire_format", "json")
+        if self.wire_format not in WIRE_FORMATS:
+            raise ValueError(f"Formato de payload não suportado: {self.wire_format}")
+        if self.wire_format == "msgpack" and msgpack is None:
+            self.logger.warning("msgpack não disponível - usando JSON")
+            self.wire_format = "json"
+        
+        # Sessão HTTP persistente: reutiliza conexões TCP/TLS com o LLM
+        self._http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE)
+        self._http.mount("http://", adapter)
+        self._http.mount("https://", adapter)
+        
+        # Transmitir embeddings quantizados em int8 (4x menos bytes)
+        self.quantize_embeddings = config.get("quantize_embeddings", True)
+        
+        # Embedding compartilhado do modo simulação/fallback (sem alocação por chamada)
+        self._sim_embedding = np.zeros(SIM_EMBEDDING_DIM, dtype=np.float32)
+        self._sim_embedding.flags.writeable = False
+        
         # Inicializar modelos
         self.slm = None
         self.tokenizer = None
+        self._quantized = False
+        self._compiled = False
+        self._ort_session = None
+        self.onnx_cache_dir = config.get("onnx_cache_dir", DEFAULT_ONNX_CACHE_DIR)
         self._initialize_models()
         
-        # Cache de contexto
-        self.context_cache = {}
-        self.max_cache_size = 100
+        # Fallback com a mesma dimensão do SLM carregado (concatenável com embeddings reais)
+        if self._embedding_dim() != SIM_EMBEDDING_DIM:
+            self._sim_embedding = np.zeros(self._embedding_dim(), dtype=np.float32)
+            self._sim_embedding.flags.writeable = False
+        
+        # Cache LRU de contexto: hash do texto -> (embeddings, resumo, confiança)
+        self.context_cache = OrderedDict()
+        self.max_cache_size = config.get("max_cache_size", 100)
         
         # Métricas
         self.processing_times = []
@@ -83,19 +337,228 @@ class CognitivePipeline:
             selected_model = model_mapping.get(self.hardware_class, "distilbert-base-uncased")
             
             # Carregar tokenizer
-            self.tokenizer = AutoTokenizer.from_pretrained(selected_model)
+            self.tokenizer = AutoTokenizer.from_pretrained(selected_model, use_fast=True)
             
-            # Carregar modelo para embeddings
-            self.slm = AutoModel.from_pretrained(selected_model)
+            # Carregar modelo para embeddings com atenção fundida (SDPA) quando suportada
+            try:
+                self.slm = AutoModel.from_pretrained(selected_model, attn_implementation="sdpa")
+            except (TypeError, ValueError) as e:
+                self.logger.info(f"SDPA indisponível para {selected_model}, usando atenção padrão: {e}")
+                self.slm = AutoModel.from_pretrained(selected_model)
+            self.slm.eval()
             
-            self.logger.info(f"Modelo SLM carregado: {selected_model}")
+            # Exportar para ONNX Runtime a partir do modelo FP32
+            self._quantized = False
+            self._compiled = False
+            self._ort_session = None
+            if self._use_onnx():
+                self._ort_session = self._build_onnx_session(selected_model)
+            
+            if self._ort_session is None:
+                # Quantização dinâmica int8 apenas das camadas Linear;
+                # LayerNorm/Softmax/GELU permanecem em FP32
+                if self._should_quantize():
+                    self.slm = torch.quantization.quantize_dynamic(
+                        self.slm, {torch.nn.Linear}, dtype=torch.qint8
+                    )
+                    self._quantized = True
+                elif self._use_bf16() and ipex is not None:
+                    # Otimizações IPEX (AMX/BF16) para CPUs compatíveis
+                    self.slm = ipex.optimize(self.slm, dtype=torch.bfloat16)
+                
+                if self._use_compile():
+                    self._compile_model()
+            
+            self.logger.info(f"Modelo SLM carregado: {selected_model} "
+                             f"(int8: {self._quantized})")
             
         except Exception as e:
             self.logger.error(f"Falha ao carregar modelo SLM: {e}")
             self.slm = None
             self.tokenizer = None
+            self._quantized = False
+            self._ort_session = None
+    
+    def _embedding_dim(self) -> int:
+        """
+        Dimensão dos embeddings produzidos pelo SLM
+        
+        Returns:
+            hidden_size do modelo carregado ou SIM_EMBEDDING_DIM em modo simulação
+        """
+        hidden_size = getattr(getattr(self.slm, "config", None), "hidden_size", None)
+        return hidden_size if isinstance(hidden_size, int) else SIM_EMBEDDING_DIM
+    
+    def _use_compile(self) -> bool:
+        """
+        Indica se o SLM deve ser compilado com torch.compile
+        
+        Returns:
+            True para hardware medium/high com PyTorch 2.x e modelo não quantizado
+        """
+        if self._quantized or self.hardware_class not in BF16_HARDWARE_CLASSES:
+            return False
+        return hasattr(torch, "compile") and bool(self.config.get("compile", True))
+    
+    def _compile_model(self) -> None:
+        """Compila o SLM com TorchInductor e faz o aquecimento com um lote de 16 tokens"""
+        eager_model = self.slm
+        try:
+            self.slm = torch.compile(
+                eager_model, backend="inductor", mode="reduce-overhead", dynamic=True
+            )
+            
+            # Compilar agora para evitar o pico de latência na primeira requisição
+            warmup_inputs = self.tokenizer(
+                " ".join(["token"] * (COMPILE_WARMUP_TOKENS - 2)),
+                return_tensors="pt",
+                max_length=COMPILE_WARMUP_TOKENS,
+                truncation=True
+            )
+            with torch.inference_mode(), torch.autocast(
+                device_type="cpu", dtype=torch.bfloat16, enabled=self._use_bf16()
+            ):
+                self.slm(**warmup_inputs)
+            
+            self._compiled = True
+            
+        except Exception as e:
+            self.logger.warning(f"Falha ao compilar SLM, usando modo eager: {e}")
+            self.slm = eager_model
+            self._compiled = False
+    
+    def _use_onnx(self) -> bool:
+        """
+        Indica se a inferência do SLM deve usar ONNX Runtime
+        
+        Returns:
+            True se onnxruntime estiver disponível e habilitado via config["use_onnx"]
+        """
+        return ort is not None and bool(self.config.get("use_onnx", False))
+    
+    def _ensure_private_cache_dir(self) -> None:
+        """
+        Cria o diretório de cache ONNX com permissão 0700 e valida o dono
+        
+        Um grafo ONNX é executado pelo InferenceSession: o diretório não pode
+        ser um link nem ser gravável por outros usuários.
+        
+        Raises:
+            PermissionError: Se o diretório não for privado do usuário atual
+        """
+        os.makedirs(self.onnx_cache_dir, mode=0o700, exist_ok=True)
+        info = os.lstat(self.onnx_cache_dir)
+        if not stat.S_ISDIR(info.st_mode):
+            raise PermissionError(f"Cache ONNX não é um diretório: {self.onnx_cache_dir}")
+        if hasattr(os, "getuid") and info.st_uid != os.getuid():
+            raise PermissionError(f"Cache ONNX pertence a outro usuário: {self.onnx_cache_dir}")
+        if info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+            raise PermissionError(f"Cache ONNX gravável por outros usuários: {self.onnx_cache_dir}")
+    
+    def _onnx_cache_key(self, model_name: str) -> str:
+        """
+        Identifica a exportação: modelo, revisão, configuração e versões do exportador/runtime
+        
+        Args:
+            model_name: Nome do modelo carregado
+            
+        Returns:
+            Nome base do arquivo ONNX
+        """
+        model_config = self.slm.config
+        fingerprint = "\x00".join([
+            model_name,
+            str(getattr(model_config, "_commit_hash", None)),
+            model_config.to_json_string(use_diff=False),
+            torch.__version__,
+            ort.__version__,
+            str(ONNX_OPSET_VERSION)
+        ])
+        digest = hashlib.sha256(fingerprint.encode()).hexdigest()[:16]
+        return f"{model_name.replace('/', '_')}-{digest}"
+    
+    def _build_onnx_session(self, model_name: str) -> Optional[Any]:
+        """
+        Exporta o SLM para ONNX (uma única vez) e cria a sessão otimizada
+        
+        Args:
+            model_name: Nome do modelo carregado
+            
+        Returns:
+            Sessão do ONNX Runtime ou None se a exportação falhar
+        """
+        try:
+            self._ensure_private_cache_dir()
+            base_name = self._onnx_cache_key(model_name)
+            onnx_path = os.path.join(self.onnx_cache_dir, f"{base_name}.onnx")
+            
+            if not os.path.exists(onnx_path):
+                dummy_inputs = dict(self.tokenizer("exportação onnx", return_tensors="pt"))
+                input_names = list(dummy_inputs.keys())
+                dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+                dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+                
+                torch.onnx.export(
+                    self.slm,
+                    (dummy_inputs,),
+                    onnx_path,
+                    input_names=input_names,
+                    output_names=["last_hidden_state"],
+                    dynamic_axes=dynamic_axes,
+                    opset_version=ONNX_OPSET_VERSION
+                )
+            
+            # Quantização int8 do grafo ONNX em hardware restrito
+            if self._should_quantize():
+                from onnxruntime.quantization import quantize_dynamic, QuantType
+                
+                quantized_path = os.path.join(self.onnx_cache_dir, f"{base_name}.int8.onnx")
+                if not os.path.exists(quantized_path):
+                    quantize_dynamic(onnx_path, quantized_path, weight_type=QuantType.QInt8)
+                onnx_path = quantized_path
+                self._quantized = True
+            
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            
+            session = ort.InferenceSession(
+                onnx_path,
+                sess_options=options,
+                providers=["CPUExecutionProvider"]
+            )
+            self.logger.info(f"SLM exportado para ONNX Runtime: {onnx_path}")
+            return session
+            
+        except Exception as e:
+            self.logger.warning(f"Falha ao exportar SLM para ONNX, usando PyTorch: {e}")
+            self._quantized = False
+            return None
+    
+    def _should_quantize(self) -> bool:
+        """
+        Indica se o SLM deve ser quantizado para int8
+        
+        Returns:
+            True para hardware restrito ou quando config["quantize"] estiver ativo
+        """
+        if self.hardware_class in QUANTIZED_HARDWARE_CLASSES:
+            return True
+        return bool(self.config.get("quantize", False))
     
-    def process_data(self, text_data: str) -> str:
+    def _use_bf16(self) -> bool:
+        """
+        Indica se o forward do SLM deve usar autocast BF16
+        
+        Returns:
+            True para hardware medium/high com suporte a autocast na CPU
+        """
+        if not TRANSFORMERS_AVAILABLE or self._quantized:
+            return False
+        if self.hardware_class not in BF16_HARDWARE_CLASSES:
+            return False
+        return hasattr(torch, "autocast") and hasattr(getattr(torch, "cpu", None), "amp")
+    
+    def process_data(self, text_data: str) -> Union[str, bytes]:
         """
         Processa dados localmente e prepara para envio
         
@@ -103,104 +566,314 @@ class CognitivePipeline:
             text_data: Dados de texto para processamento
             
         Returns:
-            Payload JSON compacto para transmissão
+            Payload compacto para transmissão (JSON ou MessagePack)
         """
         start_time = time.time()
         
         try:
-            # Gerar embeddings locais
-            embeddings = self._generate_embeddings(text_data)
-            
-            # Sumarizar contexto para transmissão eficiente
-            summary = self._summarize_context(text_data)
-            
-            # Calcular confiança da análise local
-            confidence = self._calculate_confidence(embeddings, summary)
-            
-            # Criar contexto cognitivo
-            context = CognitiveContext(
-                embeddings=embeddings.tolist() if hasattr(embeddings, 'tolist') else embeddings,
-                context_summary=summary,
-                metadata={
-                    "model": self.slm_model,
-                    "hardware": self.hardware_class,
-                    "timestamp": time.time(),
-                    "data_length": len(text_data)
-                },
-                timestamp=time.time(),
-                confidence=confidence
-            )
+            # Textos repetidos (ex.: heartbeats) reutilizam o contexto em cache
+            cache_key = hashlib.blake2b(text_data.encode(), digest_size=16).digest()
+            cached = self.context_cache.get(cache_key)
             
-            # Preparar payload compacto
-            payload = {
-                "embeddings": context.embeddings,
-                "context_summary": context.context_summary,
-                "metadata": context.metadata,
-                "confidence": context.confidence
-            }
+            if cached is not None:
+                self.context_cache.move_to_end(cache_key)
+                embeddings, summary, confidence = cached
+            else:
+                # Tokenizar uma única vez para embeddings e resumo
+                encoding = self._encode(text_data) if self.tokenizer is not None else None
+                
+                # Gerar embeddings locais
+                embeddings = self._generate_embeddings(text_data, encoding)
+                
+                # Sumarizar contexto para transmissão eficiente
+                summary = self._summarize_context(text_data, encoding)
+                
+                # Calcular confiança da análise local
+                confidence = self._calculate_confidence(embeddings, summary)
+                
+                # Fallback de erro transitório do SLM não é cacheado: a próxima chamada tenta de novo
+                if self.slm is None or embeddings is not self._sim_embedding:
+                    self.context_cache[cache_key] = (embeddings, summary, confidence)
+                    if len(self.context_cache) > self.max_cache_size:
+                        self.context_cache.popitem(last=False)
             
-            # Calcular métricas
-            processing_time = time.time() - start_time
-            transfer_size = len(json.dumps(payload))
+            payload = self._build_payload(text_data, embeddings, summary, confidence)
+            return self._serialize_payload(payload, time.time() - start_time)
             
-            self.processing_times.append(processing_time)
-            self.transfer_sizes.append(transfer_size)
+        except Exception as e:
+            self.logger.error(f"Erro no processamento local: {e}")
+            return json.dumps({"error": str(e)})
+    
+    def process_data_batch(self, texts: List[str]) -> List[Union[str, bytes]]:
+        """
+        Processa um lote de textos com um único forward por sub-lote
+        
+        Args:
+            texts: Textos de múltiplos dispositivos
             
-            # Manter apenas as últimas métricas
-            if len(self.processing_times) > 100:
-                self.processing_times = self.processing_times[-100:]
-                self.transfer_sizes = self.transfer_sizes[-100:]
+        Returns:
+            Lista de payloads, na mesma ordem dos textos
+        """
+        if not texts:
+            return []
+        
+        start_time = time.time()
+        
+        try:
+            embeddings = self._generate_embeddings_batch(texts)
+            summaries = [self._summarize_context(text) for text in texts]
             
-            self.logger.debug(f"Processamento concluído em {processing_time:.3f}s, "
-                            f"tamanho: {transfer_size} bytes")
+            # Confiança vetorizada por linha
+            variance_scores = np.minimum(embeddings.var(axis=1) / 0.1, 1.0)
+            length_scores = np.minimum(
+                np.array([len(summary) for summary in summaries]) / 1000, 1.0
+            )
+            confidences = np.clip(variance_scores * 0.6 + length_scores * 0.4, 0.0, 1.0)
             
-            return json.dumps(payload)
+            # Tempo de processamento amortizado entre os itens do lote
+            processing_time = (time.time() - start_time) / len(texts)
+            
+            return [
+                self._serialize_payload(
+                    self._build_payload(text, embeddings[i], summaries[i], float(confidences[i])),
+                    processing_time
+                )
+                for i, text in enumerate(texts)
+            ]
             
         except Exception as e:
-            self.logger.error(f"Erro no processamento local: {e}")
-            return json.dumps({"error": str(e)})
+            self.logger.error(f"Erro no processamento em lote: {e}")
+            return [json.dumps({"error": str(e)}) for _ in texts]
+    
+    def _build_payload(self, text_data: str, embeddings: np.ndarray,
+                       summary: str, confidence: float) -> Dict[str, Any]:
+        """
+        Monta o payload compacto de um contexto cognitivo
+        
+        Args:
+            text_data: Texto original
+            embeddings: Embeddings do texto
+            summary: Resumo do contexto
+            confidence: Confiança da análise local
+            
+        Returns:
+            Payload para transmissão
+        """
+        # Criar contexto cognitivo (embeddings continuam como ndarray até a codificação)
+        context = CognitiveContext(
+            embeddings=embeddings,
+            context_summary=summary,
+            metadata={
+                "model": self.slm_model,
+                "hardware": self.hardware_class,
+                "timestamp": time.time(),
+                "data_length": len(text_data)
+            },
+            timestamp=time.time(),
+            confidence=confidence
+        )
+        
+        payload = {
+            "context_summary": context.context_summary,
+            "metadata": context.metadata,
+            "confidence": context.confidence
+        }
+        
+        if self.quantize_embeddings:
+            payload.update(quantize_embeddings(embeddings, binary=self.wire_format == "msgpack"))
+        else:
+            payload["embeddings"] = context.embeddings.tolist()
+        
+        return payload
     
-    def _generate_embeddings(self, text: str) -> np.ndarray:
+    def _serialize_payload(self, payload: Dict[str, Any],
+                           processing_time: float) -> Union[str, bytes]:
+        """
+        Serializa o payload e registra métricas de processamento
+        
+        Args:
+            payload: Payload montado
+            processing_time: Tempo de processamento do item
+            
+        Returns:
+            Payload serializado no formato configurado
+        """
+        if self.wire_format == "msgpack":
+            # Floats em 32 bits: 5 bytes por valor em vez de ~15 no JSON
+            serialized = msgpack.packb(payload, use_single_float=True)
+            if len(serialized) > GZIP_MIN_SIZE:
+                serialized = gzip.compress(serialized, compresslevel=6)
+        else:
+            serialized = json.dumps(payload)
+        transfer_size = len(serialized)
+        
+        self.processing_times.append(processing_time)
+        self.transfer_sizes.append(transfer_size)
+        
+        # Manter apenas as últimas métricas
+        if len(self.processing_times) > 100:
+            self.processing_times = self.processing_times[-100:]
+            self.transfer_sizes = self.transfer_sizes[-100:]
+        
+        self.logger.debug(f"Processamento concluído em {processing_time:.3f}s, "
+                        f"tamanho: {transfer_size} bytes")
+        
+        return serialized
+    
+    def _encode(self, text: str) -> Any:
+        """
+        Tokeniza o texto uma única vez para embeddings e sumarização
+        
+        Args:
+            text: Texto de entrada
+            
+        Returns:
+            Codificação do tokenizer (tensores PyTorch, sem padding)
+        """
+        return self.tokenizer(
+            text,
+            return_tensors="pt",
+            max_length=ENCODE_MAX_LENGTH,
+            truncation=True
+        )
+    
+    def _generate_embeddings(self, text: str, encoding: Optional[Any] = None) -> np.ndarray:
         """
         Gera embeddings para o texto
         
         Args:
             text: Texto para gerar embeddings
+            encoding: Codificação já calculada por _encode (opcional)
             
         Returns:
             Array de embeddings
         """
         if self.slm is None or self.tokenizer is None:
             # Modo simulação
-            return np.random.rand(768)  # Embedding simulado
+            return self._sim_embedding  # Embedding simulado (somente leitura)
         
         try:
-            # Tokenizar texto
-            inputs = self.tokenizer(
-                text,
-                return_tensors="pt",
-                max_length=512,
-                truncation=True,
-                padding=True
-            )
+            inputs = encoding if encoding is not None else self._encode(text)
+            
+            if self._ort_session is not None:
+                return self._generate_embeddings_onnx(inputs)
             
-            # Gerar embeddings
-            with torch.no_grad():
+            # Gerar embeddings (BF16 em hardware compatível)
+            with torch.inference_mode(), torch.autocast(
+                device_type="cpu", dtype=torch.bfloat16, enabled=self._use_bf16()
+            ):
                 outputs = self.slm(**inputs)
                 embeddings = outputs.last_hidden_state.mean(dim=1)
             
-            return embeddings.numpy().flatten()
+            return embeddings.float().numpy().flatten()
             
         except Exception as e:
             self.logger.error(f"Erro ao gerar embeddings: {e}")
-            return np.random.rand(768)  # Fallback
+            return self._sim_embedding  # Fallback
+    
+    def _generate_embeddings_onnx(self, inputs: Any) -> np.ndarray:
+        """
+        Gera embeddings usando a sessão do ONNX Runtime
+        
+        Args:
+            inputs: Codificação do texto produzida por _encode
+            
+        Returns:
+            Array de embeddings
+        """
+        feed = {
+            node.name: inputs[node.name].numpy().astype(np.int64)
+            for node in self._ort_session.get_inputs()
+        }
+        last_hidden_state = self._ort_session.run(None, feed)[0]
+        
+        return last_hidden_state.mean(axis=1).flatten()
+    
+    def _generate_embeddings_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Gera embeddings para vários textos, agrupando por comprimento
+        
+        Args:
+            texts: Textos para gerar embeddings
+            
+        Returns:
+            Matriz (n_textos, dimensão) de embeddings
+        """
+        if self.slm is None or self.tokenizer is None:
+            # Modo simulação
+            return np.broadcast_to(self._sim_embedding, (len(texts), len(self._sim_embedding)))
+        
+        # Ordenar por comprimento para minimizar padding em cada sub-lote
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        sorted_texts = [texts[i] for i in order]
+        
+        chunks = []
+        for start in range(0, len(sorted_texts), EMBEDDING_BATCH_SIZE):
+            chunk = sorted_texts[start:start + EMBEDDING_BATCH_SIZE]
+            try:
+                chunks.append(self._embed_chunk(chunk))
+            except Exception as e:
+                self.logger.error(f"Erro ao gerar embeddings em lote: {e}")
+                # Fallback com a dimensão do modelo, para que o concatenate não falhe
+                chunks.append(np.zeros((len(chunk), self._embedding_dim()), dtype=np.float32))
+        
+        # Restaurar a ordem original
+        embeddings = np.empty((len(texts), chunks[0].shape[1]), dtype=chunks[0].dtype)
+        embeddings[order] = np.concatenate(chunks, axis=0)
+        return embeddings
+    
+    def _embed_chunk(self, texts: List[str]) -> np.ndarray:
+        """
+        Executa um único forward para um sub-lote de textos
+        
+        Args:
+            texts: Textos de comprimento semelhante
+            
+        Returns:
+            Matriz de embeddings com média ponderada pela máscara de atenção
+        """
+        if self._ort_session is not None:
+            inputs = self.tokenizer(
+                texts,
+                return_tensors="np",
+                max_length=512,
+                truncation=True,
+                padding=True
+            )
+            feed = {
+                node.name: inputs[node.name].astype(np.int64)
+                for node in self._ort_session.get_inputs()
+            }
+            hidden = self._ort_session.run(None, feed)[0]
+            mask = inputs["attention_mask"][..., None].astype(hidden.dtype)
+            return (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1.0)
+        
+        inputs = self.tokenizer(
+            texts,
+            return_tensors="pt",
+            max_length=512,
+            truncation=True,
+            padding=True
+        )
+        
+        with torch.inference_mode(), torch.autocast(
+            device_type="cpu", dtype=torch.bfloat16, enabled=self._use_bf16()
+        ):
+            hidden = self.slm(**inputs).last_hidden_state
+        
+        # Ignorar tokens de padding na média
+        hidden = hidden.float()
+        mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+        embeddings = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1.0)
+        return embeddings.numpy()
     
-    def _summarize_context(self, text: str) -> str:
+    def _summarize_context(self, text: str, encoding: Optional[Any] = None) -> str:
         """
         Sumariza texto para reduzir tamanho de transmissão
         
         Args:
             text: Texto original
+            encoding: Codificação já calculada por _encode (opcional)
             
         Returns:
             Texto sumarizado
@@ -213,6 +886,16 @@ class CognitivePipeline:
             return text
         
         try:
+            # Codificação truncada perde o fim do texto: só é reutilizada quando completa
+            if encoding is not None and encoding["input_ids"].shape[-1] < ENCODE_MAX_LENGTH:
+                # Reutilizar os ids já tokenizados, sem tokens especiais
+                ids = encoding["input_ids"][0].tolist()
+                special = self.tokenizer.get_special_tokens_mask(ids, already_has_special_tokens=True)
+                ids = [token_id for token_id, is_special in zip(ids, special) if not is_special]
+                if len(ids) > 100:
+                    return self.tokenizer.decode(ids[:50] + ids[-50:])
+                return text
+            
             # Tokenizar texto
             tokens = self.tokenizer.tokenize(text)
             
@@ -247,17 +930,13 @@ class CognitivePipeline:
             # 2. Comprimento do resumo
             # 3. Qualidade do texto (simplificado)
             
-            embedding_variance = np.var(embeddings)
-            summary_length = len(summary)
+            embedding_variance = float(embeddings.var())
             
-            # Normalizar métricas
-            variance_score = min(embedding_variance / 0.1, 1.0)  # Normalizar variância
-            length_score = min(summary_length / 1000, 1.0)  # Normalizar comprimento
+            # Normalizar métricas e calcular confiança combinada
+            variance_score = min(embedding_variance / 0.1, 1.0)
+            length_score = min(len(summary) / 1000, 1.0)
             
-            # Calcular confiança combinada
-            confidence = (variance_score * 0.6 + length_score * 0.4)
-            
-            return max(0.0, min(1.0, confidence))
+            return float(np.clip(variance_score * 0.6 + length_score * 0.4, 0.0, 1.0))
             
         except Exception as e:
             self.logger.error(f"Erro no cálculo de confiança: {e}")
@@ -286,15 +965,23 @@ class CognitivePipeline:
             }
             
             # Fazer requisição para o LLM
-            response = requests.post(
-                self.llm_endpoint,
-                json=llm_payload,
-                timeout=30,
-                headers={"Content-Type": "application/json"}
-            )
+            if self.wire_format == "msgpack":
+                response = self._http.post(
+                    self.llm_endpoint,
+                    data=msgpack.packb(llm_payload, use_single_float=True),
+                    timeout=30,
+                    headers={"Content-Type": "application/msgpack"}
+                )
+            else:
+                response = self._http.post(
+                    self.llm_endpoint,
+                    json=llm_payload,
+                    timeout=30,
+                    headers={"Content-Type": "application/json"}
+                )
             
             if response.status_code == 200:
-                result = response.json()
+                result = orjson.loads(response.content) if orjson is not None else response.json()
                 return {
                     "analysis": result.get("analysis", ""),
                     "recommendations": result.get("recommendations", []),
@@ -319,37 +1006,47 @@ class CognitivePipeline:
         Returns:
             Prompt estruturado
         """
+        devices = data.get("devices", [])
+        
         # Contar dispositivos
-        device_count = len(data.get("devices", []))
+        device_count = len(devices)
         
         # Extrair métricas principais
-        avg_confidence = np.mean([d.get("confidence", 0.0) for d in data.get("devices", [])])
+        avg_confidence = np.mean([d.get("confidence", 0.0) for d in devices])
         
-        # Construir prompt estruturado
-        prompt = f"""
-        Analise os seguintes dados agregados de {device_count} dispositivos IoT:
-        
-        **Métricas Gerais:**
-        - Número de dispositivos: {device_count}
-        - Confiança média: {avg_confidence:.3f}
-        - Timestamp: {time.strftime('%Y-%m-%d %H:%M:%S')}
-        
-        **Dados dos Dispositivos:**
-        {json.dumps(data, indent=2)}
-        
-        **Tarefas de Análise:**
-        1. Identifique padrões anômalos nos dados
-        2. Detecte tendências significativas
-        3. Sugira recomendações de ação
-        4. Proponha atualizações para modelos locais
-        5. Avalie a qualidade geral dos dados
+        # Remover vetores de embeddings antes de serializar: o LLM recebe apenas
+        # as estatísticas e os resumos de cada dispositivo
+        compact = {k: v for k, v in data.items() if k not in PROMPT_EXCLUDED_KEYS}
+        compact["devices"] = [
+            {k: v for k, v in device.items() if k not in PROMPT_EXCLUDED_KEYS}
+            for device in devices
+        ]
         
-        **Formato de Resposta:**
-        - Análise: Resumo das descobertas principais
-        - Recomendações: Lista de ações sugeridas
-        - Atualizações de Modelo: Sugestões para melhorar modelos SLM
-        - Confiança: Nível de confiança na análise (0-1)
-        """
+        # Construir prompt estruturado
+        prompt = "\n".join([
+            f"Analise os seguintes dados agregados de {device_count} dispositivos IoT:",
+            "",
+            "**Métricas Gerais:**",
+            f"- Número de dispositivos: {device_count}",
+            f"- Confiança média: {avg_confidence:.3f}",
+            f"- Timestamp: {time.strftime('%Y-%m-%d %H:%M:%S')}",
+            "",
+            "**Dados dos Dispositivos:**",
+            json.dumps(compact, separators=(",", ":")),
+            "",
+            "**Tarefas de Análise:**",
+            "1. Identifique padrões anômalos nos dados",
+            "2. Detecte tendências significativas",
+            "3. Sugira recomendações de ação",
+            "4. Proponha atualizações para modelos locais",
+            "5. Avalie a qualidade geral dos dados",
+            "",
+            "**Formato de Resposta:**",
+            "- Análise: Resumo das descobertas principais",
+            "- Recomendações: Lista de ações sugeridas",
+            "- Atualizações de Modelo: Sugestões para melhorar modelos SLM",
+            "- Confiança: Nível de confiança na análise (0-1)"
+        ])
         
         return prompt
     
@@ -373,8 +1070,8 @@ class CognitivePipeline:
             all_confidences = []
             
             for context in contexts:
-                if "embeddings" in context:
-                    all_embeddings.append(context["embeddings"])
+                if "embeddings" in context or "emb_q" in context:
+                    all_embeddings.append(dequantize_embeddings(context))
                 if "context_summary" in context:
                     all_summaries.append(context["context_summary"])
                 if "confidence" in context:
@@ -393,12 +1090,16 @@ class CognitivePipeline:
             
             # Calcular embeddings agregados se disponíveis
             if all_embeddings:
-                embeddings_array = np.array(all_embeddings)
+                embeddings_array = np.ascontiguousarray(all_embeddings, dtype=np.float32)
+                avg_embedding, embedding_variance = _embedding_moments(embeddings_array)
                 aggregated_data.update({
-                    "avg_embedding": embeddings_array.mean(axis=0).tolist(),
-                    "embedding_variance": embeddings_array.var(axis=0).tolist(),
-                    "embedding_correlation": np.corrcoef(embeddings_array.T).tolist()
+                    "avg_embedding": avg_embedding.tolist(),
+                    "embedding_variance": embedding_variance.tolist()
                 })
+                
+                # Correlação completa (O(N²D)) apenas sob demanda
+                if self.config.get("compute_embedding_correlation", False):
+                    aggregated_data.update(_embedding_correlation(embeddings_array))
             
             return aggregated_data
             
@@ -442,8 +1143,9 @@ class CognitivePipeline:
         elif hardware_config.get("memory_mb", 1024) > 2048:
             self.hardware_class = "medium"
         
-        # Reinicializar modelos
+        # Reinicializar modelos (embeddings em cache pertencem ao modelo anterior)
         self._initialize_models()
+        self.context_cache.clear()
         
         self.logger.info(f"Pipeline otimizado para hardware: {self.hardware_class}")
     
@@ -465,6 +1167,9 @@ class CognitivePipeline:
             "transformers_available": TRANSFORMERS_AVAILABLE,
             "model_loaded": self.slm is not None,
             "tokenizer_loaded": self.tokenizer is not None,
+            "quantized": self._quantized,
+            "onnx_runtime": self._ort_session is not None,
+            "compiled": self._compiled,
             "llm_endpoint": self.llm_endpoint
         }
 
@@ -8,6 +8,44 @@ import math
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from collections import deque
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+def _perf_numbers(sf: int, bw: int, cr: float, tx_power: float,
+                  range_const: float) -> Tuple[float, float, float]:
+    """
+    Calcula throughput, alcance e consumo em uma única chamada
+    
+    Args:
+        sf: Spreading factor
+        bw: Largura de banda (Hz)
+        cr: Fator da taxa de codificação
+        tx_power: Potência de transmissão (dBm)
+        range_const: Termos constantes do modelo de path loss
+        
+    Returns:
+        Tupla (throughput em bps, alcance em metros, consumo em mA)
+    """
+    # Fórmula LoRa: throughput = (SF * BW) / (2^SF * CR)
+    throughput = (sf * bw) / ((1 << sf) * cr)
+    
+    # Sensibilidade do receptor (dBm) e distância pelo modelo de path loss
+    sensitivity = -120.0 + (sf - 7) * 2.5
+    distance = 10.0 ** ((tx_power - sensitivity + range_const) / 20.0)
+    
+    # Consumo base (25 mA) + adicional por SF e por potência
+    consumption = 25.0 + (sf - 7) * 2.0 + (tx_power - 5) * 1.5
+    
+    return throughput, distance, consumption
+
+
+if numba is not None:
+    _perf_numbers = numba.njit(cache=True)(_perf_numbers)
 
 
 @dataclass
@@ -44,6 +82,12 @@ class LoraAdaptiveEngine:
         "coding_rate": ["4/5", "4/6", "4/7", "4/8"]
     }
     
+    # Fator numérico de cada taxa de codificação
+    CODING_RATE_VALUES = {"4/5": 0.8, "4/6": 0.67, "4/7": 0.57, "4/8": 0.5}
+    
+    # Peso do valor anterior na média móvel exponencial da perda de pacotes
+    PACKET_LOSS_EMA_ALPHA = 0.7
+    
     def __init__(self, base_config: Dict, history_size: int = 100):
         """
         Inicializa o motor de adaptação LoRa
@@ -56,14 +100,24 @@ class LoraAdaptiveEngine:
         self.region = base_config.get("region", "BR")
         self.logger = logging.getLogger(__name__)
         
-        # Histórico de métricas com janela deslizante
-        self.metrics_history = deque(maxlen=history_size)
+        # Histórico de métricas em ring buffer SoA: (rssi, snr, perda, timestamp)
+        # float64 para não perder resolução nos timestamps epoch
+        self.history_size = history_size
+        self._hist = np.zeros((history_size, 4), dtype=np.float64)
+        self._head = 0
+        self._count = 0
         self.metrics = {
             "rssi": deque(maxlen=history_size),
             "snr": deque(maxlen=history_size),
             "packet_loss": 0.0
         }
         
+        # Somas acumuladas das janelas de RSSI/SNR para médias em O(1)
+        self._rssi_sum = 0.0
+        self._rssi_sumsq = 0.0
+        self._snr_sum = 0.0
+        self._snr_sumsq = 0.0
+        
         # Contadores para estabilização
         self.adjustment_count = 0
         self.last_adjustment_time = 0
@@ -74,6 +128,16 @@ class LoraAdaptiveEngine:
         self.target_packet_loss = 0.05  # 5%
         self.target_snr = -7.5
         
+        # Tabela de decisão indexada por (alta perda << 1) | (boa SNR)
+        self._sf_max = self.PARAMETER_BOUNDS["spreading_factor"]["max"]
+        self._tx_power_min = self.PARAMETER_BOUNDS["tx_power"]["min"]
+        self._actions = (
+            self._noop,
+            self._lower_tx_power,
+            self._raise_spreading_factor,
+            self._raise_spreading_factor
+        )
+        
         # Validação inicial
         self._validate_config()
         self._setup_hardware()
@@ -92,6 +156,16 @@ class LoraAdaptiveEngine:
         if self.config["tx_power"] > max_power:
             self.logger.warning(f"Potência reduzida para {max_power}dBm (limite regional)")
             self.config["tx_power"] = max_power
+        
+        # Pré-calcula o fator da taxa de codificação usado no throughput
+        self._cr_value = self.CODING_RATE_VALUES.get(self.config.get("coding_rate"), 0.8)
+        self._update_range_constant()
+    
+    def _update_range_constant(self) -> None:
+        """Pré-calcula os termos constantes do modelo de alcance para a frequência atual"""
+        # PL = 20*log10(d) + 20*log10(f) + 32.44, com margem de segurança de 20 dB
+        frequency = self.config["frequency"] / 1000  # GHz
+        self._range_const = -20 * math.log10(frequency) - 32.44 - 20
     
     def _setup_hardware(self) -> None:
         """Configura interface com hardware LoRa"""
@@ -123,23 +197,107 @@ class LoraAdaptiveEngine:
         """
         timestamp = time.time()
         
+        # Remove das somas o valor que sairá da janela deslizante
+        rssi_window = self.metrics["rssi"]
+        snr_window = self.metrics["snr"]
+        if len(rssi_window) == rssi_window.maxlen:
+            oldest = rssi_window[0]
+            self._rssi_sum -= oldest
+            self._rssi_sumsq -= oldest * oldest
+        if len(snr_window) == snr_window.maxlen:
+            oldest = snr_window[0]
+            self._snr_sum -= oldest
+            self._snr_sumsq -= oldest * oldest
+        
         # Adiciona ao histórico
-        self.metrics["rssi"].append(rssi)
-        self.metrics["snr"].append(snr)
+        rssi_window.append(rssi)
+        snr_window.append(snr)
+        self._rssi_sum += rssi
+        self._rssi_sumsq += rssi * rssi
+        self._snr_sum += snr
+        self._snr_sumsq += snr * snr
         
         # Atualiza perda de pacotes com média móvel exponencial
-        alpha = 0.7
+        alpha = self.PACKET_LOSS_EMA_ALPHA
         self.metrics["packet_loss"] = (
             alpha * self.metrics["packet_loss"] + 
             (1 - alpha) * lost_packets
         )
         
-        # Armazena métrica completa
-        metric = LoraMetrics(rssi, snr, lost_packets, timestamp)
-        self.metrics_history.append(metric)
+        # Armazena métrica completa no ring buffer
+        self._hist[self._head] = (rssi, snr, lost_packets, timestamp)
+        self._head = (self._head + 1) % self.history_size
+        self._count = min(self._count + 1, self.history_size)
         
         self.logger.debug(f"Métricas: RSSI={rssi:.1f}dBm, SNR={snr:.1f}dB, Loss={lost_packets:.3f}")
     
+    def log_metrics_batch(self, rssi: np.ndarray, snr: np.ndarray, lost: np.ndarray) -> None:
+        """
+        Registra um lote de métricas (ex.: rajada após reconexão) de uma só vez
+        
+        Args:
+            rssi: Valores de RSSI (dBm), em ordem cronológica
+            snr: Valores de SNR (dB), em ordem cronológica
+            lost: Taxas de perda de pacotes (0-1), em ordem cronológica
+        """
+        rssi = np.asarray(rssi, dtype=np.float64)
+        snr = np.asarray(snr, dtype=np.float64)
+        lost = np.asarray(lost, dtype=np.float64)
+        n = len(rssi)
+        if n == 0:
+            return
+        if len(snr) != n or len(lost) != n:
+            raise ValueError("rssi, snr e lost devem ter o mesmo tamanho")
+        
+        timestamp = time.time()
+        
+        # Janelas deslizantes e somas acumuladas (recalculadas sobre a janela)
+        rssi_window = self.metrics["rssi"]
+        snr_window = self.metrics["snr"]
+        rssi_window.extend(rssi.tolist())
+        snr_window.extend(snr.tolist())
+        rssi_values = np.fromiter(rssi_window, dtype=np.float64, count=len(rssi_window))
+        snr_values = np.fromiter(snr_window, dtype=np.float64, count=len(snr_window))
+        self._rssi_sum = float(rssi_values.sum())
+        self._rssi_sumsq = float(rssi_values @ rssi_values)
+        self._snr_sum = float(snr_values.sum())
+        self._snr_sumsq = float(snr_values @ snr_values)
+        
+        # EMA em forma fechada: alpha^n * anterior + (1 - alpha) * sum(alpha^(n-k) * x_k)
+        alpha = self.PACKET_LOSS_EMA_ALPHA
+        weights = alpha ** np.arange(n - 1, -1, -1)
+        self.metrics["packet_loss"] = float(
+            alpha ** n * self.metrics["packet_loss"] + (1 - alpha) * np.dot(weights, lost)
+        )
+        
+        # Escrita vetorizada no ring buffer (apenas as últimas history_size amostras)
+        keep = min(n, self.history_size)
+        rows = (self._head + np.arange(keep)) % self.history_size
+        self._hist[rows, 0] = rssi[-keep:]
+        self._hist[rows, 1] = snr[-keep:]
+        self._hist[rows, 2] = lost[-keep:]
+        self._hist[rows, 3] = timestamp
+        self._head = (self._head + keep) % self.history_size
+        self._count = min(self._count + keep, self.history_size)
+        
+        self.logger.debug(f"Lote de {n} métricas registrado, Loss={self.metrics['packet_loss']:.3f}")
+    
+    def history_array(self) -> np.ndarray:
+        """
+        Retorna o histórico de métricas em ordem cronológica
+        
+        Returns:
+            Array (n, 4) com colunas rssi, snr, perda de pacotes e timestamp
+        """
+        if self._count < self.history_size:
+            return self._hist[:self._count].copy()
+        return np.concatenate((self._hist[self._head:], self._hist[:self._head]))
+    
+    @property
+    def metrics_history(self) -> List[LoraMetrics]:
+        """Histórico de métricas como objetos LoraMetrics (somente leitura)"""
+        return [LoraMetrics(*(float(v) for v in row)) for row in self.history_array()]
+    
     def adjust_parameters(self) -> bool:
         """
         Ajusta parâmetros baseado em condições do canal
@@ -154,30 +312,15 @@ class LoraAdaptiveEngine:
             return False
         
         # Precisa de histórico mínimo
-        if len(self.metrics_history) < 5:
+        if self._count < 5:
             return False
         
-        adjustments_made = False
-        region_limits = self.REGION_LIMITS[self.region]
-        
-        # Ajuste de spreading factor baseado em perda de pacotes
-        if self.metrics["packet_loss"] > self.target_packet_loss:
-            if self.config["spreading_factor"] < self.PARAMETER_BOUNDS["spreading_factor"]["max"]:
-                self.config["spreading_factor"] += 1
-                adjustments_made = True
-                self.logger.info(f"SF aumentado para {self.config['spreading_factor']} (alta perda)")
-        
-        # Ajuste de potência baseado em SNR
-        elif (self.metrics["snr"] and 
-              len(self.metrics["snr"]) > 0 and 
-              self.metrics["snr"][-1] > self.target_snr):
-            
-            if self.config["tx_power"] > self.PARAMETER_BOUNDS["tx_power"]["min"]:
-                new_power = self.config["tx_power"] - 2
-                max_power = region_limits["max_tx_power"]
-                self.config["tx_power"] = min(new_power, max_power)
-                adjustments_made = True
-                self.logger.info(f"Potência reduzida para {self.config['tx_power']}dBm (boa SNR)")
+        # Estado do canal codificado em bits: (alta perda << 1) | (boa SNR);
+        # alta perda tem prioridade sobre a redução de potência
+        snr_window = self.metrics["snr"]
+        high_loss = self.metrics["packet_loss"] > self.target_packet_loss
+        good_snr = bool(snr_window) and snr_window[-1] > self.target_snr
+        adjustments_made = self._actions[(high_loss << 1) | good_snr]()
         
         # Ajuste de largura de banda para otimização
         if self.optimization_mode == "energy" and adjustments_made:
@@ -192,6 +335,41 @@ class LoraAdaptiveEngine:
         
         return adjustments_made
     
+    def _noop(self) -> bool:
+        """Canal estável: nenhum ajuste necessário"""
+        return False
+    
+    def _raise_spreading_factor(self) -> bool:
+        """
+        Aumenta o spreading factor em caso de alta perda de pacotes
+        
+        Returns:
+            True se o parâmetro foi ajustado
+        """
+        sf = self.config["spreading_factor"]
+        if sf >= self._sf_max:
+            return False
+        
+        self.config["spreading_factor"] = sf + 1
+        self.logger.info(f"SF aumentado para {sf + 1} (alta perda)")
+        return True
+    
+    def _lower_tx_power(self) -> bool:
+        """
+        Reduz a potência de transmissão quando a SNR está acima do alvo
+        
+        Returns:
+            True se o parâmetro foi ajustado
+        """
+        tx_power = self.config["tx_power"]
+        if tx_power <= self._tx_power_min:
+            return False
+        
+        new_power = min(tx_power - 2, self.REGION_LIMITS[self.region]["max_tx_power"])
+        self.config["tx_power"] = new_power
+        self.logger.info(f"Potência reduzida para {new_power}dBm (boa SNR)")
+        return True
+    
     def _optimize_bandwidth_for_energy(self) -> None:
         """Otimiza largura de banda para economia de energia"""
         if self.config["bandwidth"] < self.PARAMETER_BOUNDS["bandwidth"]["max"]:
@@ -212,6 +390,8 @@ class LoraAdaptiveEngine:
     
     def _reconfigure_radio(self) -> None:
         """Aplica novas configurações ao hardware"""
+        self._update_range_constant()
+        
         if self.serial_available:
             try:
                 # Comandos AT para reconfigurar módulo LoRa
@@ -236,67 +416,71 @@ class LoraAdaptiveEngine:
             self.logger.info(f"Simulação: Reconfigurando rádio - SF={self.config['spreading_factor']}, "
                            f"TX={self.config['tx_power']}dBm, BW={self.config['bandwidth']}Hz")
     
+    def _performance_numbers(self) -> Tuple[float, float, float]:
+        """Calcula throughput, alcance e consumo para os parâmetros atuais"""
+        return _perf_numbers(
+            self.config["spreading_factor"],
+            self.config["bandwidth"],
+            self._cr_value,
+            self.config["tx_power"],
+            self._range_const
+        )
+    
     def _calculate_throughput(self) -> float:
         """Calcula throughput teórico baseado nos parâmetros atuais"""
-        # Fórmula LoRa: throughput = (SF * BW) / (2^SF * CR)
-        sf = self.config["spreading_factor"]
-        bw = self.config["bandwidth"]
-        
-        # Taxa de codificação
-        cr_map = {"4/5": 0.8, "4/6": 0.67, "4/7": 0.57, "4/8": 0.5}
-        cr = cr_map.get(self.config["coding_rate"], 0.8)
-        
-        # Throughput em bps
-        throughput = (sf * bw) / (2**sf * cr)
-        return throughput
+        return self._performance_numbers()[0]
     
     def _estimate_range(self) -> float:
         """Estima alcance baseado nos parâmetros atuais"""
-        # Modelo simplificado de path loss
-        tx_power = self.config["tx_power"]
-        sf = self.config["spreading_factor"]
-        
-        # Sensibilidade do receptor (dBm)
-        sensitivity = -120 + (sf - 7) * 2.5
-        
-        # Path loss model (simplificado)
-        path_loss = tx_power - sensitivity - 20  # Margem de segurança
-        
-        # Distância estimada (metros)
-        # PL = 20*log10(d) + 20*log10(f) + 32.44
-        frequency = self.config["frequency"] / 1000  # GHz
-        distance = 10**((path_loss - 20*math.log10(frequency) - 32.44) / 20)
-        
-        return distance
+        return self._performance_numbers()[1]
     
     def _estimate_energy_consumption(self) -> float:
         """Estima consumo energético (mA)"""
-        # Consumo base
-        base_consumption = 25  # mA
-        
-        # Adicional por spreading factor
-        sf_consumption = (self.config["spreading_factor"] - 7) * 2
-        
-        # Adicional por potência de transmissão
-        power_consumption = (self.config["tx_power"] - 5) * 1.5
+        return self._performance_numbers()[2]
+    
+    @staticmethod
+    def _window_stats(total: float, total_sq: float, count: int) -> Tuple[float, float]:
+        """
+        Calcula média e desvio padrão a partir das somas acumuladas
         
-        total_consumption = base_consumption + sf_consumption + power_consumption
-        return total_consumption
+        Args:
+            total: Soma dos valores da janela
+            total_sq: Soma dos quadrados dos valores da janela
+            count: Número de valores na janela
+            
+        Returns:
+            Tupla (média, desvio padrão)
+        """
+        if count == 0:
+            return 0, 0
+        mean = total / count
+        variance = max(total_sq / count - mean * mean, 0.0)
+        return mean, math.sqrt(variance)
     
     def get_performance_summary(self) -> Dict:
         """Retorna resumo de desempenho atual"""
+        avg_rssi, std_rssi = self._window_stats(
+            self._rssi_sum, self._rssi_sumsq, len(self.metrics["rssi"])
+        )
+        avg_snr, std_snr = self._window_stats(
+            self._snr_sum, self._snr_sumsq, len(self.metrics["snr"])
+        )
+        throughput, estimated_range, energy_consumption = self._performance_numbers()
+        
         return {
             "current_config": self.config.copy(),
             "metrics": {
-                "avg_rssi": sum(self.metrics["rssi"]) / len(self.metrics["rssi"]) if self.metrics["rssi"] else 0,
-                "avg_snr": sum(self.metrics["snr"]) / len(self.metrics["snr"]) if self.metrics["snr"] else 0,
+                "avg_rssi": avg_rssi,
+                "std_rssi": std_rssi,
+                "avg_snr": avg_snr,
+                "std_snr": std_snr,
                 "packet_loss": self.metrics["packet_loss"],
                 "adjustment_count": self.adjustment_count
             },
             "performance": {
-                "throughput": self._calculate_throughput(),
-                "estimated_range": self._estimate_range(),
-                "energy_consumption": self._estimate_energy_consumption()
+                "throughput": throughput,
+                "estimated_range": estimated_range,
+                "energy_consumption": energy_consumption
             },
             "region_limits": self.REGION_LIMITS[self.region]
         }
@@ -312,9 +496,14 @@ class LoraAdaptiveEngine:
     
     def reset_metrics(self) -> None:
         """Reseta histórico de métricas"""
-        self.metrics_history.clear()
+        self._head = 0
+        self._count = 0
         self.metrics["rssi"].clear()
         self.metrics["snr"].clear()
         self.metrics["packet_loss"] = 0.0
+        self._rssi_sum = 0.0
+        self._rssi_sumsq = 0.0
+        self._snr_sum = 0.0
+        self._snr_sumsq = 0.0
         self.adjustment_count = 0
         self.logger.info("Métricas resetadas")
\ No newline at end of file
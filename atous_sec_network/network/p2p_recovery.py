@@ -2,16 +2,63 @@
 P2P Recovery - Churn Mitigation System
 Sistema de mitigação de churn e recuperação para redes P2P
 """
+import asyncio
+import bisect
+import functools
 import threading
 import time
-import random
 import logging
 import hashlib
+import hmac
 import json
-from collections import defaultdict, deque
-from typing import Dict, List, Set, Optional, Any
-from dataclasses import dataclass
+import os
+from collections import defaultdict
+from collections.abc import MutableMapping
+from typing import Dict, List, Set, Optional, Any, Tuple, Sequence, Union
+from dataclasses import dataclass, field
+from enum import IntEnum
 from pathlib import Path
+import numpy as np
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+# Timeout (segundos) de cada sonda TCP de saúde
+PROBE_TIMEOUT = 2.0
+
+# Número máximo de sondas simultâneas por ciclo
+MAX_CONCURRENT_PROBES = 256
+
+# Intervalo (segundos) entre limpezas de nós falhados antigos
+CLEANUP_INTERVAL = 3600
+
+# Tamanho (bytes) do nonce AES-GCM prefixado em cada mensagem cifrada
+NONCE_SIZE = 12
+
+# Tamanho (bytes) do digest de integridade de cada shard
+SHARD_DIGEST_SIZE = 32
+
+# Capacidade do histórico de falhas (ring buffer)
+FAILURE_HISTORY_SIZE = 1000
+
+# Entradas do cache LRU de consultas de próximo salto
+ROUTE_CACHE_SIZE = 4096
+
+# Nós virtuais por nó físico no anel de hashing consistente
+RING_VIRTUAL_NODES = 128
+
+
+def _popcount(value: int) -> int:
+    """Conta bits ligados (int.bit_count no Python 3.10+)"""
+    return value.bit_count() if hasattr(value, "bit_count") else bin(value).count("1")
+
+
+def _ring_hash(key: str) -> int:
+    """Hash estável (independente do processo) usado no anel de hashing consistente"""
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
 
 
 @dataclass
@@ -24,6 +71,712 @@ class NodeHealth:
     is_active: bool
 
 
+def shard_digest(data: Any) -> bytes:
+    """
+    Calcula o digest de integridade de um shard
+    
+    Usa BLAKE3 (SIMD) quando disponível, senão BLAKE2b; os pares precisam
+    usar o mesmo algoritmo para que digests remotos sejam comparáveis.
+    
+    Args:
+        data: Conteúdo do shard (bytes, str ou objeto representável)
+        
+    Returns:
+        Digest de SHARD_DIGEST_SIZE bytes
+    """
+    if isinstance(data, str):
+        data = data.encode()
+    elif not isinstance(data, (bytes, bytearray, memoryview)):
+        data = str(data).encode()
+    if blake3 is not None:
+        return blake3.blake3(data).digest(length=SHARD_DIGEST_SIZE)
+    return hashlib.blake2b(data, digest_size=SHARD_DIGEST_SIZE).digest()
+
+
+@dataclass(frozen=True)
+class Shard:
+    """
+    Fragmento de dados imutável armazenado em um nó
+    
+    O digest é calculado na escrita; shards recebidos de outro nó podem
+    trazer o digest declarado pela origem, verificado por intact(). Como o
+    conteúdo é imutável, uma verificação bem-sucedida é lembrada no shard.
+    """
+    data: Any
+    corrupted: bool = False
+    digest: Optional[bytes] = field(default=None, compare=False)
+    verified: bool = field(default=False, init=False, compare=False, repr=False)
+    
+    def __post_init__(self):
+        if self.digest is None:
+            # Digest calculado localmente confere com o conteúdo por construção
+            object.__setattr__(self, "digest", shard_digest(self.data))
+            object.__setattr__(self, "verified", True)
+    
+    def intact(self) -> bool:
+        """Verifica (em tempo constante) se o conteúdo confere com o digest"""
+        if self.verified:
+            return True
+        if not hmac.compare_digest(self.digest, shard_digest(self.data)):
+            return False
+        object.__setattr__(self, "verified", True)
+        return True
+    
+    @classmethod
+    def wrap(cls, shard: Any) -> "Shard":
+        """
+        Converte um shard bruto em Shard, marcando corrupção na escrita
+        
+        Args:
+            shard: Shard existente ou dado bruto
+            
+        Returns:
+            Instância de Shard
+        """
+        if isinstance(shard, cls):
+            return shard
+        # Compatibilidade: dados brutos marcados como "corrupted" no conteúdo
+        return cls(shard, "corrupted" in str(shard))
+
+
+class HealthTable:
+    """
+    Tabela de saúde dos nós em layout SoA
+    
+    Cada campo de NodeHealth é um array NumPy contíguo indexado pela
+    posição do nó; o dicionário index mapeia node_id -> posição.
+    Atualizações em lote usam indexação vetorizada em vez de um
+    objeto Python por nó.
+    """
+    
+    def __init__(self, capacity: int = 64):
+        """
+        Inicializa a tabela
+        
+        Args:
+            capacity: Capacidade inicial (cresce por duplicação)
+        """
+        capacity = max(1, capacity)
+        self.last_seen = np.zeros(capacity, dtype=np.float64)
+        self.response_time = np.zeros(capacity, dtype=np.float32)
+        self.failure_count = np.zeros(capacity, dtype=np.int32)
+        self.is_active = np.zeros(capacity, dtype=np.bool_)
+        self.index: Dict[str, int] = {}
+        self.ids: List[str] = []
+        # Versão incrementada a cada mutação; invalida o cache de to_dict
+        self.version = 0
+        self._dict_cache: Optional[Dict[str, Dict[str, Any]]] = None
+        self._dict_version = -1
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def __contains__(self, node_id: str) -> bool:
+        return node_id in self.index
+    
+    def _grow(self) -> None:
+        """Duplica a capacidade dos arrays (crescimento amortizado)"""
+        capacity = 2 * len(self.last_seen)
+        for name in ("last_seen", "response_time", "failure_count", "is_active"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+    
+    def add(self, node_id: str, now: float) -> int:
+        """
+        Adiciona (ou reinicia) um nó na tabela
+        
+        Args:
+            node_id: ID do nó
+            now: Timestamp atual
+            
+        Returns:
+            Posição do nó
+        """
+        idx = self.index.get(node_id)
+        if idx is None:
+            if len(self.ids) == len(self.last_seen):
+                self._grow()
+            idx = len(self.ids)
+            self.index[node_id] = idx
+            self.ids.append(node_id)
+        
+        self.last_seen[idx] = now
+        self.response_time[idx] = 0.0
+        self.failure_count[idx] = 0
+        self.is_active[idx] = True
+        self.version += 1
+        return idx
+    
+    def remove(self, node_id: str) -> None:
+        """
+        Remove um nó movendo o último registro para a posição liberada
+        
+        Args:
+            node_id: ID do nó
+        """
+        idx = self.index.pop(node_id, None)
+        if idx is None:
+            return
+        
+        last = len(self.ids) - 1
+        if idx != last:
+            moved = self.ids[last]
+            self.ids[idx] = moved
+            self.index[moved] = idx
+            for array in (self.last_seen, self.response_time, self.failure_count, self.is_active):
+                array[idx] = array[last]
+        self.ids.pop()
+        self.version += 1
+    
+    def indices(self, node_ids: List[str]) -> np.ndarray:
+        """
+        Converte IDs em posições, ignorando nós desconhecidos
+        
+        Args:
+            node_ids: IDs dos nós
+            
+        Returns:
+            Array de posições
+        """
+        index = self.index
+        return np.fromiter(
+            (index[node] for node in node_ids if node in index), dtype=np.intp
+        )
+    
+    def mark_alive(self, idxs: np.ndarray, now: float, response_times: np.ndarray) -> None:
+        """
+        Registra resposta de um lote de nós
+        
+        Args:
+            idxs: Posições dos nós
+            now: Timestamp da verificação
+            response_times: Tempos de resposta de cada nó
+        """
+        self.last_seen[idxs] = now
+        self.response_time[idxs] = response_times
+        self.failure_count[idxs] = 0
+        self.is_active[idxs] = True
+        self.version += 1
+    
+    def mark_failed(self, node_id: str) -> int:
+        """
+        Registra falha de um nó
+        
+        Args:
+            node_id: ID do nó
+            
+        Returns:
+            Número de falhas acumuladas
+        """
+        idx = self.index[node_id]
+        self.failure_count[idx] += 1
+        self.is_active[idx] = False
+        self.version += 1
+        return int(self.failure_count[idx])
+    
+    def mark_restored(self, node_id: str) -> None:
+        """
+        Registra recuperação de um nó
+        
+        Args:
+            node_id: ID do nó
+        """
+        idx = self.index[node_id]
+        self.failure_count[idx] = 0
+        self.is_active[idx] = True
+        self.version += 1
+    
+    def get(self, node_id: str) -> NodeHealth:
+        """
+        Retorna uma cópia da saúde de um nó como NodeHealth
+        
+        Args:
+            node_id: ID do nó
+            
+        Returns:
+            Snapshot da saúde do nó
+        """
+        idx = self.index[node_id]
+        return NodeHealth(
+            node_id=node_id,
+            last_seen=float(self.last_seen[idx]),
+            response_time=float(self.response_time[idx]),
+            failure_count=int(self.failure_count[idx]),
+            is_active=bool(self.is_active[idx])
+        )
+    
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Exporta a tabela como dicionário de métricas por nó
+        
+        As linhas são memoizadas até a próxima mutação; cada chamada recebe
+        uma cópia rasa do dicionário externo (as métricas internas são
+        compartilhadas e devem ser tratadas como somente leitura).
+        
+        Returns:
+            Dicionário node_id -> métricas
+        """
+        # Versão lida antes da reconstrução: mutação concorrente invalida o cache
+        version = self.version
+        if self._dict_version == version:
+            return dict(self._dict_cache)
+        
+        n = len(self.ids)
+        rows = zip(
+            self.ids,
+            self.last_seen[:n].tolist(),
+            self.response_time[:n].tolist(),
+            self.failure_count[:n].tolist(),
+            self.is_active[:n].tolist()
+        )
+        self._dict_cache = {
+            node: {
+                "last_seen": last_seen,
+                "response_time": response_time,
+                "failure_count": failure_count,
+                "is_active": is_active
+            }
+            for node, last_seen, response_time, failure_count, is_active in rows
+        }
+        self._dict_version = version
+        return dict(self._dict_cache)
+
+
+class FailureTable(MutableMapping):
+    """
+    Mapeamento node_id -> timestamp de falha em layout SoA
+    
+    Os timestamps ficam em um array float64 contíguo, permitindo que as
+    varreduras de recuperação e limpeza sejam uma única comparação
+    vetorizada em vez de um loop sobre o dicionário.
+    """
+    
+    def __init__(self, initial: Optional[Dict[str, float]] = None, capacity: int = 64):
+        """
+        Inicializa a tabela
+        
+        Args:
+            initial: Falhas iniciais (node_id -> timestamp)
+            capacity: Capacidade inicial (cresce por duplicação)
+        """
+        self.fail_ts = np.zeros(max(1, capacity), dtype=np.float64)
+        self.index: Dict[str, int] = {}
+        self.ids: List[str] = []
+        if initial:
+            self.update(initial)
+    
+    def __getitem__(self, node_id: str) -> float:
+        return float(self.fail_ts[self.index[node_id]])
+    
+    def __setitem__(self, node_id: str, failure_time: float) -> None:
+        idx = self.index.get(node_id)
+        if idx is None:
+            if len(self.ids) == len(self.fail_ts):
+                grown = np.zeros(2 * len(self.fail_ts), dtype=np.float64)
+                grown[:len(self.ids)] = self.fail_ts[:len(self.ids)]
+                self.fail_ts = grown
+            idx = len(self.ids)
+            self.index[node_id] = idx
+            self.ids.append(node_id)
+        self.fail_ts[idx] = failure_time
+    
+    def __delitem__(self, node_id: str) -> None:
+        idx = self.index.pop(node_id)
+        last = len(self.ids) - 1
+        if idx != last:
+            moved = self.ids[last]
+            self.ids[idx] = moved
+            self.index[moved] = idx
+            self.fail_ts[idx] = self.fail_ts[last]
+        self.ids.pop()
+    
+    def __contains__(self, node_id: object) -> bool:
+        return node_id in self.index
+    
+    def __iter__(self):
+        return iter(list(self.ids))
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def older_than(self, now: float, max_age: float) -> List[str]:
+        """
+        Retorna os nós cuja falha ocorreu há mais de max_age segundos
+        
+        Args:
+            now: Timestamp atual
+            max_age: Idade mínima da falha (segundos)
+            
+        Returns:
+            IDs dos nós selecionados
+        """
+        n = len(self.ids)
+        stale = np.flatnonzero((now - self.fail_ts[:n]) > max_age)
+        return [self.ids[i] for i in stale]
+
+
+class NodeRegistry:
+    """
+    Registro de IDs inteiros (uint32) dos nós
+    
+    Cada nó recebe um índice monotônico na primeira vez que é visto; o
+    índice nunca é reutilizado, então pode indexar arrays NumPy (ex.:
+    máscara de nós ativos) sem novas buscas por string.
+    """
+    
+    def __init__(self, nodes: Optional[List[str]] = None, capacity: int = 64):
+        """
+        Inicializa o registro
+        
+        Args:
+            nodes: Nós iniciais
+            capacity: Capacidade inicial da máscara (cresce por duplicação)
+        """
+        self.index: Dict[str, int] = {}
+        self.ids: List[str] = []
+        self.active = np.zeros(max(1, capacity), dtype=bool)
+        # Mesmo conjunto como bitmask inteiro (bit i = nó i ativo) para quórum por popcount
+        self.active_bits = 0
+        for node in nodes or []:
+            self.intern(node)
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def intern(self, node: str) -> int:
+        """Retorna o índice inteiro de um nó, registrando-o se necessário"""
+        idx = self.index.get(node)
+        if idx is None:
+            idx = len(self.ids)
+            self.index[node] = idx
+            self.ids.append(node)
+            if idx == len(self.active):
+                grown = np.zeros(2 * len(self.active), dtype=bool)
+                grown[:idx] = self.active
+                self.active = grown
+        return idx
+    
+    def set_active(self, node: str, active: bool) -> None:
+        """Atualiza a máscara de nós ativos"""
+        idx = self.intern(node)  # Pode realocar a máscara
+        self.active[idx] = active
+        if active:
+            self.active_bits |= 1 << idx
+        else:
+            self.active_bits &= ~(1 << idx)
+    
+    def active_count(self) -> int:
+        """Número de nós ativos (popcount do bitmask)"""
+        return _popcount(self.active_bits)
+
+
+class RoutingTable(MutableMapping):
+    """
+    Tabela de roteamento (nó -> vizinhos) em formato CSR
+    
+    As adjacências ficam em dois arrays int32 (indptr/indices) indexados
+    pelos IDs inteiros do NodeRegistry. Remover um nó de todas as rotas é
+    uma máscara vetorizada e uma compactação, sem percorrer listas Python.
+    Os valores retornados são listas novas; altere rotas por atribuição.
+    """
+    
+    def __init__(self, registry: NodeRegistry, initial: Optional[Dict[str, List[str]]] = None):
+        """
+        Inicializa a tabela
+        
+        Args:
+            registry: Registro de IDs inteiros compartilhado
+            initial: Rotas iniciais (nó -> lista de vizinhos)
+        """
+        self.registry = registry
+        self.indptr = np.zeros(1, dtype=np.int32)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.present = np.zeros(0, dtype=bool)
+        # Incrementada a cada mutação; invalida caches de consulta
+        self.version = 0
+        if initial:
+            self.update(initial)
+    
+    def _ensure_rows(self) -> None:
+        """Estende indptr/present para cobrir todos os IDs do registro"""
+        missing = len(self.registry) - len(self.present)
+        if missing > 0:
+            self.indptr = np.concatenate(
+                (self.indptr, np.full(missing, self.indptr[-1], dtype=np.int32))
+            )
+            self.present = np.concatenate((self.present, np.zeros(missing, dtype=bool)))
+    
+    def _splice(self, idx: int, neighbors: np.ndarray) -> None:
+        """Substitui a linha idx pelos vizinhos informados"""
+        start, end = self.indptr[idx], self.indptr[idx + 1]
+        self.indices = np.concatenate((self.indices[:start], neighbors, self.indices[end:]))
+        self.indptr[idx + 1:] += len(neighbors) - (end - start)
+        self.version += 1
+    
+    def __getitem__(self, node: str) -> List[str]:
+        idx = self.registry.index.get(node)
+        if idx is None or idx >= len(self.present) or not self.present[idx]:
+            raise KeyError(node)
+        ids = self.registry.ids
+        return [ids[j] for j in self.indices[self.indptr[idx]:self.indptr[idx + 1]].tolist()]
+    
+    def __setitem__(self, node: str, routes: List[str]) -> None:
+        idx = self.registry.intern(node)
+        neighbors = np.fromiter((self.registry.intern(n) for n in routes), dtype=np.int32)
+        self._ensure_rows()
+        self._splice(idx, neighbors)
+        self.present[idx] = True
+    
+    def __delitem__(self, node: str) -> None:
+        idx = self.registry.index.get(node)
+        if idx is None or idx >= len(self.present) or not self.present[idx]:
+            raise KeyError(node)
+        self._splice(idx, np.zeros(0, dtype=np.int32))
+        self.present[idx] = False
+    
+    def __contains__(self, node: object) -> bool:
+        idx = self.registry.index.get(node)
+        return idx is not None and idx < len(self.present) and bool(self.present[idx])
+    
+    def __iter__(self):
+        ids = self.registry.ids
+        return iter([ids[i] for i in np.flatnonzero(self.present)])
+    
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.present))
+    
+    def remove_node(self, node: str) -> None:
+        """
+        Remove a linha de um nó e todas as rotas que apontam para ele
+        
+        Args:
+            node: ID do nó
+        """
+        if node in self:
+            del self[node]
+        idx = self.registry.index.get(node)
+        if idx is None or len(self.indices) == 0:
+            return
+        
+        keep = self.indices != idx
+        if keep.all():
+            return
+        # Arestas removidas por linha -> novo indptr por soma acumulada
+        counts = np.diff(self.indptr)
+        edge_rows = np.repeat(np.arange(len(counts)), counts)
+        removed = np.bincount(edge_rows[~keep], minlength=len(counts))
+        self.indptr[1:] = np.cumsum(counts - removed, dtype=np.int32)
+        self.indices = self.indices[keep]
+        self.version += 1
+    
+    def next_hop(self, source: int, destination: int) -> int:
+        """
+        Primeiro salto do menor caminho (BFS) entre dois IDs inteiros
+        
+        Args:
+            source: ID inteiro de origem
+            destination: ID inteiro de destino
+            
+        Returns:
+            ID inteiro do próximo salto, ou -1 se não houver rota
+        """
+        if source == destination:
+            return destination
+        if source >= len(self.present):
+            return -1
+        
+        indptr, indices = self.indptr, self.indices
+        # first_hop[v]: vizinho de source pelo qual v foi alcançado
+        first_hop = {int(n): int(n) for n in indices[indptr[source]:indptr[source + 1]]}
+        frontier = list(first_hop)
+        while frontier:
+            if destination in first_hop:
+                return first_hop[destination]
+            next_frontier = []
+            for node in frontier:
+                if node >= len(self.present):
+                    continue
+                hop = first_hop[node]
+                for neighbor in indices[indptr[node]:indptr[node + 1]].tolist():
+                    if neighbor != source and neighbor not in first_hop:
+                        first_hop[neighbor] = hop
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+        return first_hop.get(destination, -1)
+
+
+class FailureType(IntEnum):
+    """Tipos de falha registrados no histórico"""
+    CONNECTION_FAILURE = 0
+
+
+class FailureHistory:
+    """
+    Histórico de falhas em ring buffer com arrays paralelos
+    
+    Timestamps e índices de nó ficam em arrays NumPy de tamanho fixo; a
+    janela recente é localizada com np.searchsorted em vez de percorrer
+    todas as entradas.
+    """
+    
+    def __init__(self, capacity: int = FAILURE_HISTORY_SIZE,
+                 registry: Optional[NodeRegistry] = None):
+        """
+        Inicializa o histórico
+        
+        Args:
+            capacity: Número máximo de falhas mantidas
+            registry: Registro de IDs inteiros compartilhado
+        """
+        self.capacity = capacity
+        self.times = np.empty(capacity, dtype=np.float64)
+        self.node_idx = np.empty(capacity, dtype=np.int32)
+        self.kinds = np.empty(capacity, dtype=np.int8)
+        self.head = 0
+        self.count = 0
+        self.registry = registry if registry is not None else NodeRegistry()
+        # Falso se algum timestamp chegou fora de ordem (desabilita searchsorted)
+        self._ordered = True
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def __iter__(self):
+        rows = zip(
+            self._chronological(self.times).tolist(),
+            self._chronological(self.node_idx).tolist(),
+            self._chronological(self.kinds).tolist()
+        )
+        for t, idx, kind in rows:
+            yield {"node": self.registry.ids[idx], "timestamp": t, "type": FailureType(kind).name.lower()}
+    
+    def _chronological(self, values: np.ndarray) -> np.ndarray:
+        """Retorna as entradas válidas em ordem de inserção"""
+        if self.count < self.capacity:
+            return values[:self.count]
+        return np.concatenate((values[self.head:], values[:self.head]))
+    
+    def append(self, node: str, timestamp: float,
+               kind: FailureType = FailureType.CONNECTION_FAILURE) -> None:
+        """
+        Registra uma falha
+        
+        Args:
+            node: ID do nó falhado
+            timestamp: Timestamp da falha
+            kind: Tipo da falha
+        """
+        if self.count and timestamp < self.times[(self.head - 1) % self.capacity]:
+            self._ordered = False
+        self.times[self.head] = timestamp
+        self.node_idx[self.head] = self.registry.intern(node)
+        self.kinds[self.head] = kind
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+    
+    def recent(self, cutoff: float) -> np.ndarray:
+        """
+        Retorna os índices de nó das falhas com timestamp >= cutoff
+        
+        Args:
+            cutoff: Timestamp mínimo
+            
+        Returns:
+            Array de índices de nó (com repetições)
+        """
+        times = self._chronological(self.times)
+        nodes = self._chronological(self.node_idx)
+        if self._ordered:
+            return nodes[np.searchsorted(times, cutoff, side="left"):]
+        return nodes[times >= cutoff]
+    
+    def recovered_count(self, recent_idx: np.ndarray) -> int:
+        """
+        Conta nós ativos (máscara do registro) que aparecem entre as falhas recentes
+        
+        Args:
+            recent_idx: Índices retornados por recent()
+            
+        Returns:
+            Número de nós recuperados
+        """
+        if len(recent_idx) == 0:
+            return 0
+        return int(np.count_nonzero(self.registry.active[np.unique(recent_idx)]))
+
+
+class HashRing:
+    """
+    Anel de hashing consistente para atribuição de serviços
+    
+    Cada nó ocupa RING_VIRTUAL_NODES posições no anel; um serviço é
+    atribuído ao primeiro nó no sentido horário a partir do hash do seu
+    nome. Quando um nó sai, apenas os serviços que estavam nele mudam.
+    """
+    
+    def __init__(self, nodes: Optional[List[str]] = None, virtual_nodes: int = RING_VIRTUAL_NODES):
+        """
+        Inicializa o anel
+        
+        Args:
+            nodes: Nós iniciais
+            virtual_nodes: Nós virtuais por nó físico
+        """
+        self.virtual_nodes = virtual_nodes
+        self._keys: List[int] = []
+        self._owners: List[str] = []
+        self._members: Set[str] = set()
+        for node in nodes or []:
+            self.add(node)
+    
+    def __contains__(self, node: str) -> bool:
+        return node in self._members
+    
+    def add(self, node: str) -> None:
+        """Insere os nós virtuais de um nó no anel"""
+        if node in self._members:
+            return
+        self._members.add(node)
+        for v in range(self.virtual_nodes):
+            key = _ring_hash(f"{node}#{v}")
+            pos = bisect.bisect_left(self._keys, key)
+            self._keys.insert(pos, key)
+            self._owners.insert(pos, node)
+    
+    def remove(self, node: str) -> None:
+        """Remove os nós virtuais de um nó do anel"""
+        if node not in self._members:
+            return
+        self._members.discard(node)
+        kept = [(k, o) for k, o in zip(self._keys, self._owners) if o != node]
+        self._keys = [k for k, _ in kept]
+        self._owners = [o for _, o in kept]
+    
+    def lookup(self, key: str, allowed: Optional[Set[str]] = None) -> Optional[str]:
+        """
+        Retorna o nó responsável por uma chave
+        
+        Args:
+            key: Chave (ex.: nome do serviço)
+            allowed: Se informado, pula nós fora deste conjunto
+            
+        Returns:
+            ID do nó ou None se o anel estiver vazio
+        """
+        if not self._keys:
+            return None
+        
+        start = bisect.bisect_right(self._keys, _ring_hash(key))
+        total = len(self._keys)
+        for offset in range(total):
+            owner = self._owners[(start + offset) % total]
+            if allowed is None or owner in allowed:
+                return owner
+        return None
+
+
 class ChurnMitigation:
     """
     Sistema de mitigação de churn para redes P2P
@@ -32,33 +785,60 @@ class ChurnMitigation:
     reassignação de serviços e recuperação automática.
     """
     
-    def __init__(self, node_list: List[str], health_check_interval: int = 300):
+    def __init__(self, node_list: List[str], health_check_interval: int = 300,
+                 node_id: str = ""):
         """
         Inicializa o sistema de mitigação de churn
         
         Args:
             node_list: Lista inicial de nós
             health_check_interval: Intervalo de verificação de saúde (segundos)
+            node_id: ID deste nó (remetente/destinatário no dado associado do AES-GCM)
         """
+        self.node_id = node_id
+        # Protege o estado em memória; nunca é mantido durante as sondas
+        self._lock = threading.RLock()
         self.active_nodes = set(node_list)
-        self.failed_nodes = {}  # node_id -> timestamp
+        # IDs inteiros estáveis dos nós; strings só nas fronteiras da API
+        self._nodes = NodeRegistry(node_list, capacity=len(node_list))
+        for node in node_list:
+            self._nodes.set_active(node, True)
+        # Snapshot imutável dos nós ativos, reutilizado pelos handlers de falha
+        self._active_snapshot: Tuple[str, ...] = tuple(dict.fromkeys(node_list))
+        self.failed_nodes = FailureTable(capacity=len(node_list))  # node_id -> timestamp
         self.health_check_interval = health_check_interval
         self.erasure_factor = 1.5  # Redundância de dados
         
         # Estruturas de dados
-        self.data_shards = defaultdict(list)
+        self.data_shards: Dict[str, List[Shard]] = defaultdict(list)
         self.service_assignments = {}
-        self.routing_table = {}
+        # Cache LRU (por instância) de próximo salto: (origem, destino) -> salto
+        self._route_cache = functools.lru_cache(maxsize=ROUTE_CACHE_SIZE)(self._compute_next_hop)
+        self._route_cache_version = 0
+        self.routing_table = RoutingTable(self._nodes)
+        self._ring = HashRing(node_list)
+        
+        # Endereços (host, porta) usados nas sondas TCP; nós sem endereço usam _ping_node
+        self.node_addresses: Dict[str, Tuple[str, int]] = {}
+        
+        # Chaves simétricas por par e instâncias AESGCM em cache
+        self._node_keys: Dict[str, bytes] = {}
+        self._ciphers: Dict[str, AESGCM] = {}
         
         # Monitoramento
         self._monitor_thread = None
+        self._probe_loop = None
         self._stop_event = threading.Event()
+        # Gerador PCG64 da instância para as simulações (sem estado global)
+        self._rng = np.random.default_rng()
         self.logger = logging.getLogger(__name__)
         
         # Métricas
         self.start_time = time.time()
-        self.node_health = {}
-        self.failure_history = deque(maxlen=1000)
+        # Prazo monotônico da próxima limpeza (imune a saltos do relógio)
+        self._next_cleanup = time.monotonic() + CLEANUP_INTERVAL
+        self._health = HealthTable(len(node_list))
+        self.failure_history = FailureHistory(registry=self._nodes)
         
         # Configurações
         self.max_failures_before_removal = 3
@@ -66,14 +846,77 @@ class ChurnMitigation:
         self.consensus_quorum = 0.6  # 60% dos nós ativos
         
         # Inicializar saúde dos nós
+        now = time.time()
         for node in node_list:
-            self.node_health[node] = NodeHealth(
-                node_id=node,
-                last_seen=time.time(),
-                response_time=0.0,
-                failure_count=0,
-                is_active=True
-            )
+            self._health.add(node, now)
+    
+    @property
+    def failed_nodes(self) -> FailureTable:
+        """Nós falhados e o timestamp de cada falha"""
+        return self._failed_nodes
+    
+    @failed_nodes.setter
+    def failed_nodes(self, value: Dict[str, float]) -> None:
+        self._failed_nodes = value if isinstance(value, FailureTable) else FailureTable(value)
+    
+    @property
+    def routing_table(self) -> RoutingTable:
+        """Tabela de roteamento (nó -> vizinhos) em formato CSR"""
+        return self._routing_table
+    
+    @routing_table.setter
+    def routing_table(self, value: Dict[str, List[str]]) -> None:
+        table = value if isinstance(value, RoutingTable) else RoutingTable(self._nodes, value)
+        with self._lock:
+            self._routing_table = table
+            self._route_cache.cache_clear()
+            self._route_cache_version = table.version
+    
+    def _compute_next_hop(self, source: int, destination: int) -> int:
+        """Calcula o próximo salto sem cache (IDs inteiros)"""
+        return self._routing_table.next_hop(source, destination)
+    
+    def lookup_route(self, source: str, destination: str) -> Optional[str]:
+        """
+        Retorna o próximo salto de source para destination
+        
+        Consultas repetidas são servidas por um cache LRU, invalidado a cada
+        mutação da tabela de roteamento. A consulta roda sob self._lock para
+        não ler o CSR durante um remove_node da thread de monitoramento.
+        
+        Args:
+            source: Nó de origem
+            destination: Nó de destino
+            
+        Returns:
+            ID do próximo salto ou None se não houver rota
+        """
+        with self._lock:
+            index = self._nodes.index
+            if source not in index or destination not in index:
+                return None
+            if self._route_cache_version != self._routing_table.version:
+                self._route_cache.cache_clear()
+                self._route_cache_version = self._routing_table.version
+            
+            hop = self._route_cache(index[source], index[destination])
+            return self._nodes.ids[hop] if hop >= 0 else None
+    
+    @property
+    def data_shards(self) -> Dict[str, List[Shard]]:
+        """Shards armazenados por nó"""
+        return self._data_shards
+    
+    @data_shards.setter
+    def data_shards(self, value: Dict[str, List[Any]]) -> None:
+        self._data_shards = defaultdict(list, {
+            node: [Shard.wrap(shard) for shard in shards] for node, shards in value.items()
+        })
+    
+    @property
+    def node_health(self) -> Dict[str, NodeHealth]:
+        """Snapshot da saúde de todos os nós (somente leitura)"""
+        return {node: self._health.get(node) for node in self._health.ids}
     
     def start_health_monitor(self) -> None:
         """Inicia monitoramento de saúde dos nós"""
@@ -95,35 +938,126 @@ class ChurnMitigation:
     
     def _monitor_loop(self) -> None:
         """Loop principal de monitoramento"""
-        while not self._stop_event.is_set():
+        # Event loop dedicado à thread de monitoramento para as sondas em lote
+        self._probe_loop = asyncio.new_event_loop()
+        try:
+            self._run_monitor_cycles()
+        finally:
+            self._probe_loop.close()
+            self._probe_loop = None
+    
+    def _run_monitor_cycles(self) -> None:
+        """
+        Executa os ciclos de verificação até o monitoramento ser parado
+        
+        Referências constantes durante o monitoramento (evento de parada,
+        relógios, handlers e intervalo) são vinculadas a variáveis locais uma
+        única vez; mudanças em health_check_interval valem no próximo início.
+        """
+        stop_is_set = self._stop_event.is_set
+        stop_wait = self._stop_event.wait
+        wall_clock = time.time
+        monotonic = time.monotonic
+        probe_nodes = self._probe_nodes
+        handle_failure = self._handle_node_failure
+        update_health = self._update_nodes_health
+        check_recovery = self._check_node_recovery
+        cleanup = self._cleanup_old_failures
+        warning = self.logger.warning
+        interval = self.health_check_interval
+        
+        while not stop_is_set():
             try:
-                current_time = time.time()
+                current_time = wall_clock()
                 
-                # Verificar saúde de todos os nós ativos
-                for node in list(self.active_nodes):
-                    if not self._ping_node(node):
-                        self.logger.warning(f"Nó {node} inacessível!")
-                        self._handle_node_failure(node, current_time)
+                # Verificar saúde de todos os nós ativos (sondas concorrentes)
+                nodes = self._active_snapshot
+                alive_nodes = []
+                for node, alive in zip(nodes, probe_nodes(nodes)):
+                    if not alive:
+                        warning("Nó %s inacessível!", node)
+                        handle_failure(node, current_time)
                     else:
-                        # Atualizar métricas de saúde
-                        self._update_node_health(node, current_time)
+                        alive_nodes.append(node)
+                
+                # Atualizar métricas de saúde dos nós que responderam em lote
+                update_health(alive_nodes, current_time)
                 
                 # Verificar recuperação de nós falhados
-                self._check_node_recovery(current_time)
+                check_recovery(current_time)
                 
-                # Limpeza periódica
-                if current_time % 3600 < self.health_check_interval:  # A cada hora
-                    self._cleanup_old_failures()
-
-                # Sleep in shorter intervals to allow for quick stopping
-                for _ in range(self.health_check_interval):
-                    if self._stop_event.is_set():
-                        break
-                    time.sleep(1)
-                time.sleep(self.health_check_interval)        
+                # Limpeza periódica (a cada CLEANUP_INTERVAL segundos)
+                now_m = monotonic()
+                if now_m >= self._next_cleanup:
+                    cleanup()
+                    self._next_cleanup = now_m + CLEANUP_INTERVAL
+
+                # Aguardar o próximo ciclo; retorna imediatamente ao parar
+                if stop_wait(timeout=interval):
+                    break
             except Exception as e:
-                self.logger.error(f"Erro no loop de monitoramento: {e}")
-                time.sleep(10)  # Pausa antes de tentar novamente
+                self.logger.error("Erro no loop de monitoramento: %s", e)
+                stop_wait(timeout=10)  # Pausa antes de tentar novamente
+    
+    def set_node_address(self, node_id: str, host: str, port: int) -> None:
+        """
+        Define o endereço usado nas sondas de saúde de um nó
+        
+        Args:
+            node_id: ID do nó
+            host: Host do nó
+            port: Porta TCP do nó
+        """
+        self.node_addresses[node_id] = (host, port)
+    
+    def _probe_nodes(self, nodes: List[str]) -> List[bool]:
+        """
+        Sonda vários nós concorrentemente: um ciclo custa ~1 RTT em vez de N
+        
+        Args:
+            nodes: IDs dos nós
+            
+        Returns:
+            Lista com o resultado de cada sonda, na mesma ordem dos nós
+        """
+        if not nodes:
+            return []
+        
+        if threading.current_thread() is self._monitor_thread and self._probe_loop is not None:
+            return self._probe_loop.run_until_complete(self._probe_all(nodes))
+        return asyncio.run(self._probe_all(nodes))
+    
+    async def _probe_all(self, nodes: List[str]) -> List[bool]:
+        """Dispara as sondas de todos os nós com asyncio.gather"""
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_PROBES)
+        return await asyncio.gather(*(self._probe(node, semaphore) for node in nodes))
+    
+    async def _probe(self, node: str, semaphore: asyncio.Semaphore) -> bool:
+        """
+        Sonda um nó abrindo uma conexão TCP com seu endereço
+        
+        Args:
+            node: ID do nó
+            semaphore: Limite de sondas simultâneas
+            
+        Returns:
+            True se o nó responde, False caso contrário
+        """
+        address = self.node_addresses.get(node)
+        if address is None:
+            return self._ping_node(node)
+        
+        try:
+            async with semaphore:
+                _, writer = await asyncio.wait_for(
+                    asyncio.open_connection(*address), timeout=PROBE_TIMEOUT
+                )
+                writer.close()
+                await writer.wait_closed()
+            return True
+        except (OSError, asyncio.TimeoutError) as e:
+            self.logger.debug("Sonda de %s falhou: %s", node, e)
+            return False
     
     def _ping_node(self, node: str) -> bool:
         """
@@ -138,19 +1072,29 @@ class ChurnMitigation:
         try:
             # Implementação real dependerá da infraestrutura de rede
             # Por enquanto, simulação com 95% de taxa de sucesso
-            return random.random() > 0.05
+            return bool(self._rng.random() > 0.05)
         except Exception as e:
-            self.logger.debug(f"Erro ao fazer ping em {node}: {e}")
+            self.logger.debug("Erro ao fazer ping em %s: %s", node, e)
             return False
     
     def _update_node_health(self, node: str, current_time: float) -> None:
         """Atualiza métricas de saúde de um nó"""
-        if node in self.node_health:
-            health = self.node_health[node]
-            health.last_seen = current_time
-            health.response_time = random.uniform(0.01, 0.1)  # Simulação
-            health.failure_count = 0
-            health.is_active = True
+        self._update_nodes_health([node], current_time)
+    
+    def _update_nodes_health(self, nodes: List[str], current_time: float) -> None:
+        """
+        Atualiza métricas de saúde de vários nós com uma escrita vetorizada
+        
+        Args:
+            nodes: IDs dos nós que responderam
+            current_time: Timestamp da verificação
+        """
+        with self._lock:
+            idxs = self._health.indices(nodes)
+            if len(idxs) == 0:
+                return
+            response_times = self._rng.uniform(0.01, 0.1, len(idxs))  # Simulação (lote)
+            self._health.mark_alive(idxs, current_time, response_times)
     
     def _handle_node_failure(self, node: str, failure_time: float) -> None:
         """
@@ -160,38 +1104,34 @@ class ChurnMitigation:
             node: ID do nó falhado
             failure_time: Timestamp da falha
         """
-        if node in self.active_nodes:
-            self.active_nodes.remove(node)
-            self.failed_nodes[node] = failure_time
-            
-            # Atualizar saúde do nó
-            if node in self.node_health:
-                self.node_health[node].failure_count += 1
-                self.node_health[node].is_active = False
-            
-            # Registrar falha
-            self.failure_history.append({
-                "node": node,
-                "timestamp": failure_time,
-                "type": "connection_failure"
-            })
-            
-            # Executar ações de recuperação
-            self._redistribute_data(node)
-            self._reassign_services(node)
-            self._update_routing_table(node)
-            
-            self.logger.info(f"Nó {node} marcado como falhado")
+        with self._lock:
+            if node in self.active_nodes:
+                self._deactivate(node)
+                self.failed_nodes[node] = failure_time
+                
+                # Atualizar saúde do nó
+                if node in self._health:
+                    self._health.mark_failed(node)
+                
+                # Registrar falha
+                self.failure_history.append(node, failure_time)
+                
+                # Executar ações de recuperação (mesmo snapshot para ambos)
+                available = self._active_snapshot
+                self._redistribute_data(node, available)
+                self._reassign_services(node, available)
+                self._update_routing_table(node)
+                
+                self.logger.info("Nó %s marcado como falhado", node)
     
     def _check_node_recovery(self, current_time: float) -> None:
         """Verifica se nós falhados se recuperaram"""
-        recovered_nodes = []
-        
-        for node, failure_time in list(self.failed_nodes.items()):
-            # Verificar se passou tempo suficiente para tentar recuperação
-            if current_time - failure_time > self.recovery_timeout:
-                if self._ping_node(node):
-                    recovered_nodes.append(node)
+        # Verificar se passou tempo suficiente para tentar recuperação
+        with self._lock:
+            candidates = self.failed_nodes.older_than(current_time, self.recovery_timeout)
+        recovered_nodes = [
+            node for node, alive in zip(candidates, self._probe_nodes(candidates)) if alive
+        ]
         
         # Restaurar nós recuperados
         for node in recovered_nodes:
@@ -199,16 +1139,32 @@ class ChurnMitigation:
     
     def _restore_node(self, node: str) -> None:
         """Restaura um nó que se recuperou"""
-        if node in self.failed_nodes:
-            del self.failed_nodes[node]
-            self.active_nodes.add(node)
-            
-            # Atualizar saúde
-            if node in self.node_health:
-                self.node_health[node].is_active = True
-                self.node_health[node].failure_count = 0
-            
-            self.logger.info(f"Nó {node} restaurado")
+        with self._lock:
+            if node in self.failed_nodes:
+                del self.failed_nodes[node]
+                self._activate(node)
+                
+                # Atualizar saúde
+                if node in self._health:
+                    self._health.mark_restored(node)
+                
+                self.logger.info("Nó %s restaurado", node)
+    
+    def _activate(self, node: str) -> None:
+        """Marca um nó como ativo no conjunto, no snapshot e no anel"""
+        if node in self.active_nodes:
+            return  # Já ativo: não duplicar no snapshot (sondas e pesos dobrados)
+        self.active_nodes.add(node)
+        self._nodes.set_active(node, True)
+        self._active_snapshot += (node,)
+        self._ring.add(node)
+    
+    def _deactivate(self, node: str) -> None:
+        """Remove um nó ativo do conjunto, do snapshot e do anel"""
+        self.active_nodes.discard(node)
+        self._nodes.set_active(node, False)
+        self._active_snapshot = tuple(n for n in self._active_snapshot if n != node)
+        self._ring.remove(node)
     
     def _update_routing_table(self, failed_node: str) -> None:
         """
@@ -217,27 +1173,24 @@ class ChurnMitigation:
         Args:
             failed_node: ID do nó falhado
         """
-        # Remover o nó falhado da tabela de roteamento
-        if failed_node in self.routing_table:
-            del self.routing_table[failed_node]
-        
-        # Remover rotas para o nó falhado de todos os outros nós
-        for node_routes in self.routing_table.values():
-            if failed_node in node_routes:
-                node_routes.remove(failed_node)
+        # Remover a linha do nó falhado e as rotas para ele (compactação CSR)
+        self.routing_table.remove_node(failed_node)
     
-    def _redistribute_data(self, failed_node: str) -> None:
+    def _redistribute_data(self, failed_node: str,
+                           available_nodes: Optional[Tuple[str, ...]] = None) -> None:
         """
         Redistribui dados de um nó falhado
         
         Args:
             failed_node: ID do nó falhado
+            available_nodes: Nós de destino (padrão: snapshot dos ativos)
         """
         if failed_node not in self.data_shards:
             return
         
         failed_shards = self.data_shards.pop(failed_node)
-        available_nodes = list(self.active_nodes - {failed_node})
+        if available_nodes is None:
+            available_nodes = tuple(n for n in self._active_snapshot if n != failed_node)
         
         if not available_nodes:
             self.logger.error("Nenhum nó disponível para redistribuição de dados")
@@ -251,31 +1204,36 @@ class ChurnMitigation:
         # Distribuir shards para nós disponíveis
         shards_per_node = max(1, int(len(failed_shards) * self.erasure_factor // len(available_nodes)))
         
-        for i, shard in enumerate(failed_shards):
-            target_node = available_nodes[i % len(available_nodes)]
-            self.data_shards[target_node].append(shard)
+        # Round-robin: o nó i recebe os shards i, i+k, i+2k... (fatia com passo k)
+        k = len(available_nodes)
+        for i, target_node in enumerate(available_nodes[:len(failed_shards)]):
+            self.data_shards[target_node].extend(failed_shards[i::k])
         
-        self.logger.info(f"Dados redistribuídos de {failed_node} para {len(available_nodes)} nós")
+        self.logger.info("Dados redistribuídos de %s para %d nós", failed_node, len(available_nodes))
     
-    def _reassign_services(self, failed_node: str) -> None:
+    def _reassign_services(self, failed_node: str,
+                           available_nodes: Optional[Tuple[str, ...]] = None) -> None:
         """
         Reassigna serviços de um nó falhado
         
         Args:
             failed_node: ID do nó falhado
+            available_nodes: Nós de destino (padrão: snapshot dos ativos)
         """
+        if available_nodes is None:
+            available_nodes = tuple(n for n in self._active_snapshot if n != failed_node)
+        
         for service, assigned_node in list(self.service_assignments.items()):
             if assigned_node == failed_node:
-                available_nodes = list(self.active_nodes - {failed_node})
                 if available_nodes:
                     # Selecionar nó com menor carga
                     new_node = self._select_best_node_for_service(service, available_nodes)
                     self.service_assignments[service] = new_node
-                    self.logger.info(f"Serviço {service} reassignado para {new_node}")
+                    self.logger.info("Serviço %s reassignado para %s", service, new_node)
                 else:
-                    self.logger.error(f"Nenhum nó disponível para o serviço {service}")
+                    self.logger.error("Nenhum nó disponível para o serviço %s", service)
     
-    def _select_best_node_for_service(self, service: str, available_nodes: List[str]) -> str:
+    def _select_best_node_for_service(self, service: str, available_nodes: Sequence[str]) -> str:
         """
         Seleciona o melhor nó para um serviço
         
@@ -286,9 +1244,15 @@ class ChurnMitigation:
         Returns:
             ID do melhor nó
         """
-        # Implementação básica - seleção aleatória
-        # Em produção, considerar carga, recursos, latência, etc.
-        return random.choice(available_nodes)
+        # Hashing consistente: o serviço vai para o sucessor no anel,
+        # de modo que falhas movem apenas os serviços do nó que saiu
+        # O anel contém exatamente os nós do snapshot ativo: sem filtro
+        allowed = None if available_nodes is self._active_snapshot else set(available_nodes)
+        node = self._ring.lookup(service, allowed)
+        if node is None:
+            # Nós disponíveis fora do anel (ex.: lista fornecida externamente)
+            node = HashRing(available_nodes).lookup(service)
+        return node
     
     def _cleanup_old_failures(self, max_age_minutes: int = 30) -> int:
         """
@@ -300,17 +1264,16 @@ class ChurnMitigation:
         Returns:
             Número de nós removidos
         """
-        current_time = time.time()
-        max_age_seconds = max_age_minutes * 60
-        removed_count = 0
-        
-        for node, failure_time in list(self.failed_nodes.items()):
-            if current_time - failure_time > max_age_seconds:
+        with self._lock:
+            stale_nodes = self.failed_nodes.older_than(time.time(), max_age_minutes * 60)
+            
+            debug = self.logger.isEnabledFor(logging.DEBUG)
+            for node in stale_nodes:
                 del self.failed_nodes[node]
-                removed_count += 1
-                self.logger.debug(f"Nó falhado antigo removido: {node}")
-        
-        return removed_count
+                if debug:
+                    self.logger.debug("Nó falhado antigo removido: %s", node)
+            
+            return len(stale_nodes)
     
     def handle_node_failure(self, node: str) -> None:
         """
@@ -328,38 +1291,27 @@ class ChurnMitigation:
         Returns:
             Dicionário com métricas
         """
-        current_time = time.time()
-        uptime = current_time - self.start_time
-        
-        # Calcular taxa de recuperação
-        recent_failures = [
-            f for f in self.failure_history 
-            if current_time - f["timestamp"] < 3600  # Última hora
-        ]
-        
-        recovery_rate = 0.0
-        if recent_failures:
-            recovered_count = len([n for n in self.active_nodes 
-                                 if n in [f["node"] for f in recent_failures]])
-            recovery_rate = recovered_count / len(recent_failures)
-        
-        return {
-            "active_nodes": len(self.active_nodes),
-            "failed_nodes": len(self.failed_nodes),
-            "total_nodes": len(self.active_nodes) + len(self.failed_nodes),
-            "uptime": uptime,
-            "recovery_rate": recovery_rate,
-            "health_check_interval": self.health_check_interval,
-            "node_health": {
-                node: {
-                    "last_seen": health.last_seen,
-                    "response_time": health.response_time,
-                    "failure_count": health.failure_count,
-                    "is_active": health.is_active
-                }
-                for node, health in self.node_health.items()
+        with self._lock:
+            current_time = time.time()
+            uptime = current_time - self.start_time
+            
+            # Calcular taxa de recuperação
+            recent_failures = self.failure_history.recent(current_time - 3600)  # Última hora
+            
+            recovery_rate = 0.0
+            if len(recent_failures):
+                recovered_count = self.failure_history.recovered_count(recent_failures)
+                recovery_rate = recovered_count / len(recent_failures)
+            
+            return {
+                "active_nodes": len(self.active_nodes),
+                "failed_nodes": len(self.failed_nodes),
+                "total_nodes": len(self.active_nodes) + len(self.failed_nodes),
+                "uptime": uptime,
+                "recovery_rate": recovery_rate,
+                "health_check_interval": self.health_check_interval,
+                "node_health": self._health.to_dict()
             }
-        }
     
     def add_node(self, node_id: str) -> None:
         """
@@ -368,16 +1320,11 @@ class ChurnMitigation:
         Args:
             node_id: ID do novo nó
         """
-        if node_id not in self.active_nodes:
-            self.active_nodes.add(node_id)
-            self.node_health[node_id] = NodeHealth(
-                node_id=node_id,
-                last_seen=time.time(),
-                response_time=0.0,
-                failure_count=0,
-                is_active=True
-            )
-            self.logger.info(f"Novo nó adicionado: {node_id}")
+        with self._lock:
+            if node_id not in self.active_nodes:
+                self._activate(node_id)
+                self._health.add(node_id, time.time())
+                self.logger.info("Novo nó adicionado: %s", node_id)
     
     def remove_node(self, node_id: str) -> None:
         """
@@ -386,18 +1333,19 @@ class ChurnMitigation:
         Args:
             node_id: ID do nó a ser removido
         """
-        if node_id in self.active_nodes:
-            self.active_nodes.remove(node_id)
-            
-            # Redistribuir dados e serviços
-            self._redistribute_data(node_id)
-            self._reassign_services(node_id)
-            
-            # Limpar dados do nó
-            if node_id in self.node_health:
-                del self.node_health[node_id]
-            
-            self.logger.info(f"Nó removido graciosamente: {node_id}")
+        with self._lock:
+            if node_id in self.active_nodes:
+                self._deactivate(node_id)
+                
+                # Redistribuir dados e serviços
+                available = self._active_snapshot
+                self._redistribute_data(node_id, available)
+                self._reassign_services(node_id, available)
+                
+                # Limpar dados do nó
+                self._health.remove(node_id)
+                
+                self.logger.info("Nó removido graciosamente: %s", node_id)
     
     def _detect_byzantine_failures(self) -> List[str]:
         """
@@ -425,17 +1373,18 @@ class ChurnMitigation:
         Returns:
             True se o nó é bizantino
         """
-        # Implementação básica - verificar se o nó tem dados corrompidos
-        if node in self.data_shards:
-            for shard in self.data_shards[node]:
-                if "corrupted" in str(shard):
-                    return True  
-        Returns:
-            True se o nó é bizantino
-        """
-        # Implementação básica - sempre retorna False
-        # Em produção, implementar verificações de consistência
-        return False
+        shards = self._data_shards.get(node, [])
+        # Shards acrescentados direto à lista (sem passar pelo setter) chegam brutos
+        for i, shard in enumerate(shards):
+            if not isinstance(shard, Shard):
+                shards[i] = Shard.wrap(shard)
+        
+        # Flag de corrupção definida na escrita do shard
+        if any(shard.corrupted for shard in shards):
+            return True
+        
+        # Cada shard é re-hasheado no máximo até a primeira verificação bem-sucedida
+        return not all(shard.intact() for shard in shards)
     
     def _reach_consensus(self, decision_data: Dict, quorum: float = None) -> bool:
         """
@@ -443,7 +1392,8 @@ class ChurnMitigation:
         
         Args:
             decision_data: Dados da decisão
-            quorum: Fração necessária para consenso (0-1)
+            quorum: Fração necessária para consenso (0-1) ou, se maior
+                que 1, número absoluto de nós ativos
             
         Returns:
             True se consenso foi alcançado
@@ -451,41 +1401,83 @@ class ChurnMitigation:
         if quorum is None:
             quorum = self.consensus_quorum
         
-        # Implementação básica - simula consenso
+        # Implementação básica - quórum sobre os nós ativos (popcount do bitmask)
         # Em produção, implementar protocolo de consenso real
-        return len(self.active_nodes) >= 2  # Mínimo 2 nós ativos
+        active = self._nodes.active_count()
+        if active < 2:  # Mínimo 2 nós ativos
+            return False
+        if quorum > 1:
+            return active >= quorum
+        total = active + len(self.failed_nodes)
+        return active * 100 >= round(quorum * 100) * total
+    
+    def set_node_key(self, node: str, key: bytes) -> None:
+        """
+        Define a chave simétrica AES-GCM compartilhada com um nó
+        
+        Args:
+            node: ID do nó par
+            key: Chave AES de 128, 192 ou 256 bits
+        """
+        self._node_keys[node] = key
+        self._ciphers[node] = AESGCM(key)
     
-    def _encrypt_message(self, message: str, target_node: str) -> str:
+    def _cipher_for(self, node: str) -> AESGCM:
         """
-        Criptografa mensagem para um nó específico
+        Retorna o AESGCM em cache do par
+        
+        Raises:
+            KeyError: Se nenhuma chave foi configurada para o par (ver set_node_key)
+        """
+        cipher = self._ciphers.get(node)
+        if cipher is None:
+            raise KeyError(f"Nenhuma chave configurada para o nó {node}")
+        return cipher
+    
+    @staticmethod
+    def _associated_data(sender: str, recipient: str) -> bytes:
+        """Dado associado do AES-GCM: remetente e destinatário, nessa ordem"""
+        return f"{sender}\x00{recipient}".encode()
+    
+    def _encrypt_message(self, message: Union[str, bytes], target_node: str) -> bytes:
+        """
+        Criptografa mensagem para um nó específico (AES-GCM)
         
         Args:
             message: Mensagem a ser criptografada
             target_node: Nó de destino
             
         Returns:
-            Mensagem criptografada
+            Nonce seguido do texto cifrado com tag de autenticação
+            
+        Raises:
+            KeyError: Se nenhuma chave foi configurada para o nó
         """
-        # Implementação básica - simulação
-        # Em produção, usar criptografia real
-        return f"encrypted_{message}_{target_node}"
+        if isinstance(message, str):
+            message = message.encode()
+        cipher = self._cipher_for(target_node)
+        nonce = os.urandom(NONCE_SIZE)
+        return nonce + cipher.encrypt(nonce, message, self._associated_data(self.node_id, target_node))
     
-    def _decrypt_message(self, encrypted_message: str, source_node: str) -> str:
+    def _decrypt_message(self, encrypted_message: bytes, source_node: str) -> bytes:
         """
-        Descriptografa mensagem de um nó específico
+        Descriptografa mensagem de um nó específico (AES-GCM)
         
         Args:
-            encrypted_message: Mensagem criptografada
-            source_node: Nó de origem
+            encrypted_message: Nonce seguido do texto cifrado
+            source_node: Nó remetente
             
         Returns:
             Mensagem descriptografada
+            
+        Raises:
+            KeyError: Se nenhuma chave foi configurada para o nó
+            cryptography.exceptions.InvalidTag: Se a mensagem foi adulterada,
+                cifrada com outra chave ou endereçada a outro par
         """
-        # Implementação básica - simulação
-        # Em produção, usar descriptografia real
-        if encrypted_message.startswith("encrypted_"):
-            return encrypted_message.replace(f"encrypted_", "").replace(f"_{source_node}", "")
-        return encrypted_message
+        cipher = self._cipher_for(source_node)
+        nonce, ciphertext = encrypted_message[:NONCE_SIZE], encrypted_message[NONCE_SIZE:]
+        return cipher.decrypt(nonce, ciphertext, self._associated_data(source_node, self.node_id))
     
     def _calculate_network_diameter(self) -> int:
         """
@@ -507,5 +1499,3 @@ class ChurnMitigation:
             timeout: Timeout em segundos
         """
         self.recovery_timeout = timeout
-=======
-        return len(self.routing_table) // 2
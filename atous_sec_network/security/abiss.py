@@ -3,8 +3,32 @@ ABISS - Adaptive Behaviour Intelligence Security System
 Sistema adaptativo de detecção e resposta a ameaças em tempo real
 """
 import logging
+import os
 from typing import Any, Dict, List, Optional
 
+import numpy as np
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+# Default behavioural features, in feature-matrix column order
+DEFAULT_FEATURE_KEYS = ("cpu", "mem", "disk", "net_in", "net_out", "connections")
+
+# Initial row capacity of the feature matrix (grows by doubling)
+FEATURE_CAPACITY = 64
+
+# |z-score| above which a feature is anomalous (statistical fallback)
+ZSCORE_THRESHOLD = 3.0
+
+# Scale factors turning MAD / mean absolute deviation into a standard deviation estimate
+MAD_TO_STD = 1.4826
+MEAN_AD_TO_STD = 1.2533
+
+# Model score above which a node is anomalous (ONNX model)
+ANOMALY_SCORE_THRESHOLD = 0.5
+
 class ABISS:
     """
     Adaptive Behaviour Intelligence Security System (ABISS)
@@ -19,8 +43,14 @@ class ABISS:
         self.behavior_profiles = {}
         self.anomaly_history = []
         self.response_history = []
+        # Fixed-shape feature matrix: one float32 row per profiled node
+        self.feature_keys = tuple(self.config.get("feature_keys", DEFAULT_FEATURE_KEYS))
+        self._feat = np.zeros((FEATURE_CAPACITY, len(self.feature_keys)), dtype=np.float32)
+        self._node_idx: Dict[str, int] = {}
+        self._node_ids: List[str] = []
         # Placeholder for Gemma 3N model integration
         self.gemma_model = None
+        self._session = None
         self._initialize_models()
 
     def _initialize_models(self):
@@ -28,18 +58,122 @@ class ABISS:
         self.logger.info("Initializing Gemma 3N model (placeholder)")
         # TODO: Load Gemma 3N or other models
         self.gemma_model = None
+        self._session = self._load_anomaly_session(self.config.get("anomaly_model_path"))
+
+    def _load_anomaly_session(self, model_path: Optional[str]) -> Optional[Any]:
+        """
+        Load the exported anomaly head as an ONNX Runtime session
+
+        The model takes a float32 input "x" of shape (batch, features) and
+        returns one anomaly score per row. An int8 "<name>.int8.onnx" variant
+        produced by quantize_dynamic is preferred when present.
+        """
+        if ort is None or not model_path:
+            return None
+
+        root, ext = os.path.splitext(model_path)
+        quantized_path = f"{root}.int8{ext}"
+        path = quantized_path if os.path.exists(quantized_path) else model_path
+        try:
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+            self.logger.info(f"Anomaly model loaded from {path}")
+            return session
+        except Exception as e:
+            self.logger.warning(f"Failed to load anomaly model {path}: {e}")
+            return None
+
+    def _features(self, data: Dict[str, Any]) -> np.ndarray:
+        """
+        Convert a behaviour sample into a float32 feature vector
+
+        Missing, non-numeric (e.g. "high", None) or non-finite (nan, inf,
+        beyond float32 range) values become 0.0.
+        """
+        values = []
+        for key in self.feature_keys:
+            value = data.get(key, 0.0)
+            try:
+                values.append(float(value))
+            except (TypeError, ValueError):
+                self.logger.debug(f"Non-numeric feature {key}={value!r}, using 0.0")
+                values.append(0.0)
+        with np.errstate(over="ignore"):
+            features = np.array(values, dtype=np.float32)
+        non_finite = ~np.isfinite(features)
+        if non_finite.any():
+            self.logger.debug(f"Non-finite features {np.asarray(self.feature_keys)[non_finite].tolist()}, using 0.0")
+            features[non_finite] = 0.0
+        return features
 
     def profile_behavior(self, node_id: str, data: Dict[str, Any]) -> None:
         """Update behavioral profile for a node"""
         self.logger.debug(f"Profiling behavior for node {node_id}")
-        # TODO: Implement behavioral profiling logic
         self.behavior_profiles[node_id] = data
 
+        idx = self._node_idx.get(node_id)
+        if idx is None:
+            idx = len(self._node_ids)
+            if idx == len(self._feat):
+                grown = np.zeros((2 * len(self._feat), self._feat.shape[1]), dtype=np.float32)
+                grown[:idx] = self._feat
+                self._feat = grown
+            self._node_idx[node_id] = idx
+            self._node_ids.append(node_id)
+        self._feat[idx] = self._features(data)
+
+    def _score_batch(self, features: np.ndarray) -> np.ndarray:
+        """
+        Flag anomalous rows of a feature matrix
+
+        Uses the ONNX model in a single session call when loaded; otherwise
+        flags rows with any feature beyond ZSCORE_THRESHOLD robust z-scores
+        (median and MAD of the profiled population). A row scored against a
+        population it belongs to cannot mask itself, unlike mean/std where
+        |z| <= sqrt(n - 1).
+        """
+        if self._session is not None:
+            scores = self._session.run(None, {"x": features})[0]
+            threshold = self.config.get("anomaly_threshold", ANOMALY_SCORE_THRESHOLD)
+            return np.asarray(scores).reshape(len(features), -1)[:, 0] > threshold
+
+        n = len(self._node_ids)
+        if n < 2:
+            return np.zeros(len(features), dtype=bool)
+        population = self._feat[:n].astype(np.float64)
+        median = np.median(population, axis=0)
+        deviation = np.abs(population - median)
+        scale = MAD_TO_STD * np.median(deviation, axis=0)
+        # More than half the nodes at the median: fall back to the mean absolute deviation
+        scale = np.where(scale == 0, MEAN_AD_TO_STD * deviation.mean(axis=0), scale)
+        scale[scale == 0] = 1.0
+        z = np.abs(features - median) / scale
+        return (z > self.config.get("zscore_threshold", ZSCORE_THRESHOLD)).any(axis=1)
+
+    def detect_anomalies_batch(self) -> np.ndarray:
+        """
+        Detect anomalies for all profiled nodes at once
+
+        Returns:
+            Boolean array aligned with the profiling order of the nodes
+        """
+        n = len(self._node_ids)
+        if n == 0:
+            return np.zeros(0, dtype=bool)
+
+        anomalies = self._score_batch(self._feat[:n])
+        for idx in np.flatnonzero(anomalies):
+            self.anomaly_history.append({"node": self._node_ids[idx]})
+        return anomalies
+
     def detect_anomaly(self, node_id: str, data: Dict[str, Any]) -> bool:
         """Detect anomalies in node behavior"""
         self.logger.debug(f"Detecting anomaly for node {node_id}")
-        # TODO: Implement anomaly detection logic (statistical, ML, rule-based)
-        return False
+        anomaly = bool(self._score_batch(self._features(data)[np.newaxis, :])[0])
+        if anomaly:
+            self.anomaly_history.append({"node": node_id})
+        return anomaly
 
     def adaptive_response(self, node_id: str, anomaly: bool) -> None:
         """Trigger adaptive response to detected anomaly"""
@@ -3,24 +3,381 @@ ABISS System - Adaptive Behaviour Intelligence Security System
 Sistema de segurança inteligente com comportamento adaptativo usando Gemma 3N
 """
 import time
+import re
+import sys
+import copy
+import asyncio
 import json
+import queue
+import functools
+import ipaddress
 import logging
-import hashlib
+import secrets
 import threading
-from typing import Dict, List, Optional, Any, Tuple
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, List, Optional, Tuple
 from dataclasses import dataclass, field
-from collections import defaultdict, deque
+from collections import OrderedDict, defaultdict, deque
 import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import numba
+except ImportError:
+    numba = None
 
 try:
     import torch
-    from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline
+    from transformers import AutoTokenizer, AutoModelForCausalLM
     TRANSFORMERS_AVAILABLE = True
 except ImportError:
     TRANSFORMERS_AVAILABLE = False
     logging.warning("Transformers não disponível - funcionalidade limitada")
 
+try:
+    from transformers import StaticCache
+except ImportError:
+    StaticCache = None
+
+try:
+    import intel_extension_for_pytorch as ipex
+except ImportError:
+    ipex = None
+
+try:
+    from torchao.quantization import quantize_, int4_weight_only, int8_weight_only
+except ImportError:
+    quantize_ = None
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+# Modos de quantização de pesos suportados (config["quantization"])
+QUANTIZATION_MODES = ("none", "int8", "int4")
+
+# Tamanho do grupo na quantização int4 por grupos
+INT4_GROUP_SIZE = 64
+
+# Fração mínima de indicadores presentes para considerar correspondência
+PATTERN_MATCH_THRESHOLD = 0.5
+
+# Faixas inclusivas (tolerável_min, típico_min, típico_max, tolerável_max):
+# login 08:00-11:00 / 09:00-10:00, logout 15:00-19:00 / 16:00-18:00 (minutos)
+LOGIN_BAND = (480.0, 540.0, 600.0, 660.0)
+LOGOUT_BAND = (900.0, 960.0, 1080.0, 1140.0)
+
+# Uso de rede (bytes): típico 5MB-50MB, tolerável 1MB-100MB
+NETWORK_BAND = (1e6, 5e6, 5e7, 1e8)
+
+# Score indexado pelo nível da faixa: 0 = atípico, 1 = tolerável, 2 = típico
+BAND_SCORES = (0.3, 0.7, 0.9)
+
+# Janela de login considerada anômala (02:00-06:00, em minutos)
+UNUSUAL_LOGIN_START = 120.0
+UNUSUAL_LOGIN_END = 360.0
+
+# Uso de rede (bytes) acima do qual o consumo é considerado excessivo
+EXCESSIVE_NETWORK_USAGE = 1e8
+
+# Arquivos considerados típicos nos padrões de acesso
+TYPICAL_FILES = ("file1", "file2", "file3", "document", "report")
+
+# Layout colunar dos registros de comportamento histórico
+BEHAVIOR_RECORD_DTYPE = np.dtype([
+    ("login_min", np.int16),
+    ("access_count", np.float64),
+    ("network", np.float64),
+])
+
+# Implementações de atenção com kernels fundidos (não exigem BetterTransformer)
+FUSED_ATTENTION_IMPLEMENTATIONS = ("sdpa", "flash_attention_2")
+
+# Parte fixa do prompt de segurança; seu KV-cache é calculado uma única vez
+SECURITY_PROMPT_PREFIX = (
+    "Analise os dados de rede abaixo para detectar ameaças de segurança.\n"
+    "Avalie se há ameaças de segurança e responda no formato:\n"
+    "THREAT_SCORE: [0.0-1.0]\n"
+    "THREAT_TYPE: [tipo_da_ameaça]\n"
+    "CONFIDENCE: [0.0-1.0]\n"
+    "\n"
+    "Dados de Rede:\n"
+)
+
+# Parte variável do prompt de segurança (apenas ela é tokenizada por requisição)
+SECURITY_PROMPT_FIELDS = (
+    "- Pacotes: {packet_count}\n"
+    "- Tentativas de conexão: {connection_attempts}\n"
+    "- Taxa de transferência: {data_transfer_rate}\n"
+    "- IPs de origem: {source_ips}\n"
+    "- Portas de destino: {destination_ports}\n"
+)
+
+# Comprimento fixo (tokens) dos prompts; shapes fixos evitam recompilação do grafo
+PROMPT_MAX_TOKENS = 256
+
+# Tokens gerados por inferência
+MAX_NEW_TOKENS = 64
+
+# Campos da resposta do modelo (início de linha, valor até ":" ou fim da linha)
+AI_SCORE_RE = re.compile(r"^THREAT_SCORE:([^:\n]*)", re.M)
+AI_TYPE_RE = re.compile(r"^THREAT_TYPE:([^:\n]*)", re.M)
+
+# Respostas recentes consideradas no ajuste de threshold
+RECENT_EFFECTIVENESS_WINDOW = 10
+
+# Horário assumido quando a string não é um "HH:MM" válido (09:00)
+DEFAULT_MINUTES = 540
+
+# Entradas do cache de conversão "HH:MM" -> minutos (1440 horários distintos)
+TIME_CACHE_SIZE = 2048
+
+# Entradas do cache de conversão de IPs de origem para inteiros
+IP_CACHE_SIZE = 4096
+
+# Chaves acima de 2**32 identificam origens que não são IPv4 (IPv6, "unknown", ...)
+NON_IPV4_KEY_BASE = 1 << 32
+
+# Cadeias de ameaças conhecidas, em ordem de prioridade
+KNOWN_THREAT_CHAINS = (
+    ("port_scan", "brute_force", "data_exfiltration"),
+    ("phishing", "malware_infection", "data_exfiltration"),
+    ("ddos_attack", "data_exfiltration"),
+)
+
+# Cadeias conhecidas como frozenset, alinhadas com KNOWN_THREAT_CHAINS
+KNOWN_THREAT_CHAIN_SETS = tuple(frozenset(chain) for chain in KNOWN_THREAT_CHAINS)
+
+# Entradas do cache de cadeias por conjunto de tipos observados
+THREAT_CHAIN_CACHE_SIZE = 1024
+
+# Entradas padrão do cache de resultados de correlate_threats (janelas repetidas)
+CORRELATION_CACHE_SIZE = 1024
+
+# Limites do threat_threshold ajustado por fatores ambientais
+THRESHOLD_MIN = 0.5
+THRESHOLD_MAX = 0.9
+
+# Ajuste do threshold por paisagem de ameaças (demais valores não alteram)
+LANDSCAPE_THRESHOLD_DELTA = {"high": -0.1, "low": 0.1}
+
+# Taxa de falsos positivos abaixo/acima da qual o threshold cai/sobe um passo
+FALSE_POSITIVE_LOW = 0.05
+FALSE_POSITIVE_HIGH = 0.15
+FALSE_POSITIVE_STEP = 0.05
+
+# Scores aleatórios pré-gerados por vez no modo simulação (potência de 2)
+SIMULATION_BUFFER_SIZE = 1 << 16
+
+# Intervalo padrão (segundos) entre coletas do monitoramento em tempo real
+POLL_INTERVAL = 1.0
+
+# Pool de conexões HTTP para compartilhamento de inteligência de ameaças
+HTTP_POOL_CONNECTIONS = 4
+HTTP_POOL_MAXSIZE = 16
+
+# Timeout (segundos) do envio de inteligência de ameaças
+THREAT_INTEL_TIMEOUT = 2.0
+
+# Máximo de prompts agregados em uma única chamada a model.generate
+AI_BATCH_SIZE = 8
+
+# Janela (segundos) para agregar prompts pendentes em um micro-lote
+AI_BATCH_WINDOW = 0.005
+
+# Tempo máximo (segundos) de espera pelo resultado de uma inferência
+AI_RESULT_TIMEOUT = 10.0
+
+
+def _pattern_match_scores(present: np.ndarray, offsets: np.ndarray,
+                          indicator_ids: np.ndarray) -> np.ndarray:
+    """
+    Fração de indicadores presentes de cada padrão (layout CSR)
+    
+    Args:
+        present: Presença de cada indicador do vocabulário no evento
+        offsets: Início dos indicadores de cada padrão (tamanho P + 1)
+        indicator_ids: IDs dos indicadores, concatenados por padrão
+        
+    Returns:
+        Score de correspondência (0-1) de cada padrão
+    """
+    n_patterns = len(offsets) - 1
+    scores = np.zeros(n_patterns)
+    for p in range(n_patterns):
+        start, end = offsets[p], offsets[p + 1]
+        if end > start:
+            hits = 0
+            for k in range(start, end):
+                if present[indicator_ids[k]]:
+                    hits += 1
+            scores[p] = hits / (end - start)
+    return scores
+
+
+def _best_pattern_match(present: np.ndarray, offsets: np.ndarray, indicator_ids: np.ndarray,
+                        severities: np.ndarray, threshold: float) -> Tuple[float, int]:
+    """
+    Padrão de maior score ponderado (correspondência * severidade) acima do threshold
+    
+    Args:
+        present: Presença de cada indicador do vocabulário no evento
+        offsets: Início dos indicadores de cada padrão (tamanho P + 1)
+        indicator_ids: IDs dos indicadores, concatenados por padrão
+        severities: Severidade de cada padrão
+        threshold: Fração mínima de indicadores presentes
+        
+    Returns:
+        Tuple (score_ponderado, índice_do_padrão), ou (-1.0, -1) sem correspondência
+    """
+    best_score = -1.0
+    best_idx = -1
+    for p in range(len(offsets) - 1):
+        start, end = offsets[p], offsets[p + 1]
+        if end == start:
+            continue
+        hits = 0
+        for k in range(start, end):
+            if present[indicator_ids[k]]:
+                hits += 1
+        ratio = hits / (end - start)
+        if ratio > threshold:
+            weighted = ratio * severities[p]
+            if weighted > best_score:
+                best_score = weighted
+                best_idx = p
+    return best_score, best_idx
+
+
+if numba is not None:
+    _pattern_match_scores = numba.njit(cache=True)(_pattern_match_scores)
+    _best_pattern_match = numba.njit(cache=True, fastmath=True)(_best_pattern_match)
+
+
+def _best_pattern_match_batch(present: np.ndarray, offsets: np.ndarray, indicator_ids: np.ndarray,
+                              severities: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    _best_pattern_match aplicado a cada linha de uma matriz de presença (N, V)
+    
+    Returns:
+        Tuple (scores_ponderados, índices_dos_padrões) com N elementos cada
+    """
+    n = present.shape[0]
+    scores = np.empty(n)
+    indices = np.empty(n, dtype=np.int64)
+    for i in range(n):
+        scores[i], indices[i] = _best_pattern_match(present[i], offsets, indicator_ids, severities, threshold)
+    return scores, indices
+
+
+if numba is not None:
+    _best_pattern_match_batch = numba.njit(cache=True)(_best_pattern_match_batch)
+
+
+@functools.lru_cache(maxsize=TIME_CACHE_SIZE)
+def _parse_minutes(time_str: str) -> int:
+    """Converte "HH:MM" em minutos desde 00:00 (memoizado)"""
+    try:
+        hours, minutes = map(int, time_str.split(":"))
+        return hours * 60 + minutes
+    except Exception:
+        return DEFAULT_MINUTES
+
+
+def _band_level(value: float, band: Tuple[float, float, float, float]) -> int:
+    """Nível (0-2) de um valor em uma faixa inclusiva, sem desvios de fluxo"""
+    return (int(value >= band[0]) + int(value >= band[1])
+            - int(value > band[2]) - int(value > band[3]))
+
+
+def _score_behavior(login_minutes: float, logout_minutes: float, typical_ratio: float,
+                    network_usage: float) -> Tuple[float, bool, bool]:
+    """
+    Score comportamental combinado e flags de anomalia em um único kernel
+    
+    Args:
+        login_minutes: Horário de login (minutos desde 00:00)
+        logout_minutes: Horário de logout (minutos desde 00:00)
+        typical_ratio: Fração de acessos a arquivos típicos (0-1)
+        network_usage: Uso de rede (bytes)
+        
+    Returns:
+        Tuple (score, login_anômalo, uso_de_rede_excessivo)
+    """
+    time_level = min(_band_level(login_minutes, LOGIN_BAND), _band_level(logout_minutes, LOGOUT_BAND))
+    network_level = _band_level(network_usage, NETWORK_BAND)
+    score = (BAND_SCORES[time_level] + typical_ratio + BAND_SCORES[network_level]) / 3
+    unusual_login = UNUSUAL_LOGIN_START <= login_minutes <= UNUSUAL_LOGIN_END
+    excessive_network = network_usage > EXCESSIVE_NETWORK_USAGE
+    return score, unusual_login, excessive_network
+
+
+if numba is not None:
+    _band_level = numba.njit(cache=True)(_band_level)
+    _score_behavior = numba.njit(cache=True)(_score_behavior)
+
+
+@functools.lru_cache(maxsize=IP_CACHE_SIZE)
+def _ipv4_to_int(ip: str) -> Optional[int]:
+    """Converte IPv4 textual em inteiro de 32 bits (None se não for IPv4)"""
+    try:
+        return int.from_bytes(ipaddress.IPv4Address(ip).packed, "big")
+    except (ipaddress.AddressValueError, TypeError):
+        return None
+
+
+@functools.lru_cache(maxsize=THREAT_CHAIN_CACHE_SIZE)
+def _match_threat_chain(threat_types: FrozenSet[str]) -> Optional[Tuple[str, ...]]:
+    """Primeira cadeia conhecida contida no conjunto de tipos (memoizado)"""
+    # Subconjunto frozenset <= frozenset é resolvido em C, sem iterar a tupla da cadeia
+    for chain_set, chain in zip(KNOWN_THREAT_CHAIN_SETS, KNOWN_THREAT_CHAINS):
+        if chain_set <= threat_types:
+            return chain
+    return None
+
+
+def _static_cache_tensors(cache: Any) -> List[Tuple[Any, Any]]:
+    """Pares (K, V) por camada de um StaticCache (API com layers ou key_cache/value_cache)"""
+    if hasattr(cache, "layers"):
+        return [(layer.keys, layer.values) for layer in cache.layers]
+    return list(zip(cache.key_cache, cache.value_cache))
+
+
+def _tagged_repr(obj: Any) -> Dict[str, str]:
+    """Representação de valores não JSON na chave de cache, marcada com o tipo"""
+    return {"__repr__": f"{type(obj).__qualname__}:{obj!r}"}
+
+
+def _correlation_key(threats: List[Dict[str, Any]]) -> str:
+    """
+    Chave de cache de uma janela de ameaças
+    
+    Serializa (source_ip, type, timestamp, severity) de cada ameaça na ordem de
+    entrada, que também define a ordem das campanhas no resultado. A chave é a
+    própria serialização: source_ip e type vêm do atacante, e um digest curto
+    sem comparação de igualdade permitiria colisões entre janelas. O json da
+    biblioteca padrão mantém NaN, Infinity e null distintos e aceita inteiros
+    de qualquer tamanho.
+    
+    Returns:
+        Serialização da janela
+        
+    Raises:
+        TypeError, ValueError: Se a janela não puder ser serializada
+    """
+    fields = [
+        (t.get("source_ip", "unknown"), t.get("type", "unknown"), t.get("timestamp", 0), t.get("severity", 0))
+        for t in threats
+    ]
+    return json.dumps(fields, separators=(",", ":"), default=_tagged_repr)
+
+
+def _join_values(data: Dict[str, Any]) -> str:
+    """Concatena os valores de um evento (uma vez) para busca de indicadores"""
+    return "\x00".join(map(str, data.values()))
+
 
 @dataclass
 class ThreatPattern:
@@ -31,26 +388,36 @@ class ThreatPattern:
     frequency: float
     description: str = ""
     created_at: float = field(default_factory=time.time)
-    pattern_id: str = field(default_factory=lambda: hashlib.md5(str(time.time()).encode()).hexdigest()[:8])
+    pattern_id: str = field(default_factory=lambda: secrets.token_hex(4))
+    _indicator_set: FrozenSet[str] = field(init=False, repr=False, compare=False)
     
-    def match(self, data: Dict[str, Any]) -> float:
+    def __post_init__(self):
+        # Tipos se repetem entre padrões e estatísticas: interning torna o hash/comparação O(1)
+        self.pattern_type = sys.intern(self.pattern_type)
+        self._indicator_set = frozenset(self.indicators)
+    
+    def match(self, data: Dict[str, Any], values_text: Optional[str] = None) -> float:
         """
         Calcula score de correspondência com dados
         
         Args:
             data: Dados para comparação
+            values_text: Valores de data já concatenados (ver _join_values);
+                calculado aqui se omitido
             
         Returns:
             Score de correspondência (0-1)
         """
-        match_count = 0
-        total_indicators = len(self.indicators)
-        
-        for indicator in self.indicators:
-            if indicator in data or any(indicator in str(v) for v in data.values()):
-                match_count += 1
-        
-        return match_count / total_indicators if total_indicators > 0 else 0.0
+        if not self._indicator_set:
+            return 0.0
+        if values_text is None:
+            values_text = _join_values(data)
+        
+        match_count = sum(
+            1 for indicator in self._indicator_set
+            if indicator in data or indicator in values_text
+        )
+        return match_count / len(self._indicator_set)
 
 
 @dataclass
@@ -60,7 +427,7 @@ class AdaptiveResponse:
     priority: int
     parameters: Dict[str, Any]
     timestamp: float = field(default_factory=time.time)
-    response_id: str = field(default_factory=lambda: hashlib.md5(str(time.time()).encode()).hexdigest()[:8])
+    response_id: str = field(default_factory=lambda: secrets.token_hex(4))
     
     def execute(self) -> Dict[str, Any]:
         """
@@ -110,6 +477,47 @@ class AdaptiveResponse:
             }
 
 
+@dataclass
+class ThreatBatch:
+    """Lote de ameaças em layout colunar (SoA) para correlação vetorizada"""
+    ips: np.ndarray
+    ip_keys: np.ndarray
+    ts: np.ndarray
+    sev: np.ndarray
+    types: np.ndarray
+    
+    @classmethod
+    def from_threats(cls, threats: List[Dict[str, Any]]) -> "ThreatBatch":
+        """
+        Converte lista de ameaças (AoS) em colunas
+        
+        Args:
+            threats: Ameaças com source_ip, timestamp, severity e type
+            
+        Returns:
+            Lote colunar alinhado com a ordem de entrada
+        """
+        n = len(threats)
+        ips = [t.get("source_ip", "unknown") for t in threats]
+        
+        # IPv4 vira o próprio inteiro de 32 bits; demais origens recebem IDs sequenciais
+        ip_keys = np.empty(n, dtype=np.uint64)
+        other_keys: Dict[Any, int] = {}
+        for i, ip in enumerate(ips):
+            key = _ipv4_to_int(ip)
+            if key is None:
+                key = other_keys.setdefault(ip, NON_IPV4_KEY_BASE + len(other_keys))
+            ip_keys[i] = key
+        
+        return cls(
+            ips=np.array(ips, dtype=object),
+            ip_keys=ip_keys,
+            ts=np.fromiter((t.get("timestamp", 0) for t in threats), dtype=np.float64, count=n),
+            sev=np.fromiter((t.get("severity", 0) for t in threats), dtype=np.float64, count=n),
+            types=np.array([t.get("type", "unknown") for t in threats], dtype=object)
+        )
+
+
 class ABISSSystem:
     """
     Sistema ABISS - Adaptive Behaviour Intelligence Security System
@@ -134,18 +542,61 @@ class ABISSSystem:
         # Modelo Gemma 3N
         self.model = None
         self.tokenizer = None
-        self.pipeline = None
+        # Tokens e KV-cache do prefixo fixo do prompt (ver _cache_prompt_prefix)
+        self._prefix_ids = None
+        self._prefix_cache = None
+        # Cópia dos tensores K/V do prefixo, restaurada no cache de trabalho a cada lote
+        self._prefix_kv = None
         self.model_name = config.get("model_name", "google/gemma-3n-2b")
+        self.quantization = config.get("quantization", "int8")
+        if self.quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Modo de quantização não suportado: {self.quantization}")
         
         # Estruturas de dados
         self.threat_patterns = {}
+        # Índice SoA dos padrões (reconstruído quando os padrões mudam)
+        self._pattern_index = None
+        self._pattern_index_size = -1
+        # Banco Hyperscan com todos os indicadores (varredura única por evento)
+        self._indicator_db = None
+        self._scan_lock = threading.Lock()
         self.adaptive_responses = {}
         self.learning_history = deque(maxlen=config.get("memory_size", 1000))
+        # Eficácias do learning_history em buffer circular (mesma capacidade)
+        self._eff_buf = np.zeros(self.learning_history.maxlen, dtype=np.float64)
+        self._eff_head = 0
+        # Histórico comportamental em layout colunar (ver BEHAVIOR_RECORD_DTYPE)
+        self._history_arr = np.empty(0, dtype=BEHAVIOR_RECORD_DTYPE)
+        # Cache LRU de correlações por janela de ameaças (ver _correlation_key)
+        self._correlation_cache = OrderedDict()
+        self._correlation_cache_size = config.get("correlation_cache_size", CORRELATION_CACHE_SIZE)
+        self._correlation_lock = threading.Lock()
         
         # Monitoramento em tempo real
         self.is_monitoring = False
         self.monitor_thread = None
         self.stop_monitoring = threading.Event()
+        # Fontes assíncronas de dados, coletadas em conjunto a cada ciclo
+        self.data_sources: List[Callable[[], Awaitable[Optional[Dict[str, Any]]]]] = []
+        self._monitor_loop = None
+        self._monitor_task = None
+        
+        # Sessão HTTP persistente para compartilhamento de inteligência
+        self.threat_intel_endpoint = config.get("threat_intel_endpoint")
+        self._http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE)
+        self._http.mount("http://", adapter)
+        self._http.mount("https://", adapter)
+        
+        # Fila de micro-lotes para inferência (worker iniciado sob demanda)
+        self._pending = queue.Queue()
+        self._batch_worker = None
+        self._batch_lock = threading.Lock()
+        
+        # Scores do modo simulação, pré-gerados em bloco (PCG64)
+        self._rng = np.random.default_rng()
+        self._rng_buf = self._rng.random(SIMULATION_BUFFER_SIZE)
+        self._rng_i = 0
         
         # Métricas e estatísticas
         self.threat_stats = defaultdict(int)
@@ -174,17 +625,26 @@ class ABISSSystem:
             self.model = AutoModelForCausalLM.from_pretrained(
                 self.model_name,
                 torch_dtype=torch.float16,
-                device_map="auto"
+                device_map="auto",
+                attn_implementation=self.config.get("attn_implementation", "sdpa")
             )
+            self._enable_fused_attention()
             
-            # Configurar pipeline
-            self.pipeline = pipeline(
-                "text-generation",
-                model=self.model,
-                tokenizer=self.tokenizer,
-                max_length=512,
-                temperature=0.7
-            )
+            # Padding à esquerda para prompts de tamanho fixo em modelos causais
+            self.tokenizer.padding_side = "left"
+            if self.tokenizer.pad_token is None:
+                self.tokenizer.pad_token = self.tokenizer.eos_token
+            
+            # KV-cache estático: alocado uma vez para prompt + tokens gerados
+            self.model.generation_config.cache_implementation = "static"
+            self.model.generation_config.max_length = PROMPT_MAX_TOKENS + MAX_NEW_TOKENS
+            
+            # Quantizar antes de compilar para que os kernels int8/int4 entrem no grafo
+            self._quantize_model()
+            self._optimize_for_cpu()
+            self._cache_prompt_prefix()
+            self._compile_model()
+            self._warmup_model()
             
             self.logger.info(f"Modelo Gemma 3N carregado: {self.model_name}")
             
@@ -193,6 +653,247 @@ class ABISSSystem:
             self.model = None
             self.tokenizer = None
     
+    def _enable_fused_attention(self) -> None:
+        """Converte para BetterTransformer quando o modelo não carregou com atenção SDPA/Flash"""
+        attn_implementation = getattr(self.model.config, "_attn_implementation", None)
+        if attn_implementation in FUSED_ATTENTION_IMPLEMENTATIONS:
+            return
+        
+        try:
+            self.model = self.model.to_bettertransformer()
+            self.logger.info("Modelo convertido para BetterTransformer")
+        except Exception as e:
+            self.logger.warning(f"BetterTransformer não suportado, mantendo atenção {attn_implementation}: {e}")
+    
+    def _quantize_model(self) -> None:
+        """Quantiza os pesos do modelo (int8/int4 weight-only) com TorchAO"""
+        if self.quantization == "none":
+            return
+        if quantize_ is None:
+            self.logger.warning("torchao não disponível - modelo mantido em fp16")
+            return
+        
+        if self.quantization == "int4":
+            quantize_(self.model, int4_weight_only(group_size=INT4_GROUP_SIZE))
+        else:
+            quantize_(self.model, int8_weight_only())
+        self.logger.info(f"Pesos do modelo quantizados ({self.quantization})")
+    
+    def _optimize_for_cpu(self) -> None:
+        """Aplica as fusões de operadores do IPEX (bf16) em implantações somente CPU"""
+        if (ipex is None or not self.config.get("use_ipex", True)
+                or self.quantization != "none" or torch.cuda.is_available()):
+            return
+        
+        try:
+            self.model = ipex.optimize(self.model.eval(), dtype=torch.bfloat16)
+            self.logger.info("Modelo otimizado com IPEX (bf16)")
+        except Exception as e:
+            self.logger.warning(f"Otimização IPEX falhou, mantendo modelo original: {e}")
+    
+    def _compile_model(self) -> None:
+        """Compila o forward do modelo com torch.compile (desabilitável via config["use_compile"])"""
+        if not self.config.get("use_compile", True) or not hasattr(torch, "compile"):
+            return
+        
+        try:
+            self.model.forward = torch.compile(
+                self.model.forward, mode="reduce-overhead", fullgraph=True
+            )
+        except Exception as e:
+            self.logger.warning(f"torch.compile indisponível, usando modo eager: {e}")
+    
+    def _warmup_model(self) -> None:
+        """
+        Executa um lote de aquecimento antes de liberar o modelo
+        
+        A primeira chamada a model.generate dispara a compilação do forward,
+        que costuma levar mais que AI_RESULT_TIMEOUT; aquecer aqui evita que
+        as primeiras detecções expirem enquanto o worker ainda compila.
+        """
+        try:
+            self._generate_batch([self._build_security_prompt({})])
+        except Exception as e:
+            self.logger.warning(f"Aquecimento do modelo falhou: {e}")
+    
+    def _cache_prompt_prefix(self) -> None:
+        """
+        Calcula uma vez o KV-cache do prefixo fixo do prompt de segurança
+        
+        O cache é um StaticCache com o mesmo shape da geração (AI_BATCH_SIZE x
+        PROMPT_MAX_TOKENS + MAX_NEW_TOKENS), alocado uma única vez e reutilizado
+        como cache de trabalho: os endereços dos buffers ficam fixos para o
+        forward compilado (CUDA graphs). Uma cópia dos tensores K/V do prefixo
+        é guardada para restaurar o cache antes de cada lote. Sem StaticCache o
+        caminho com prefixo é desativado.
+        """
+        try:
+            if StaticCache is None:
+                raise RuntimeError("transformers sem StaticCache")
+            prefix_ids = self.tokenizer(SECURITY_PROMPT_PREFIX, return_tensors="pt").input_ids.to(self.model.device)
+            static_cache = StaticCache(
+                config=self.model.config,
+                max_batch_size=AI_BATCH_SIZE,
+                max_cache_len=PROMPT_MAX_TOKENS + MAX_NEW_TOKENS,
+                device=self.model.device,
+                dtype=self.model.dtype
+            )
+            with torch.inference_mode():
+                self._prefix_cache = self.model(
+                    prefix_ids.expand(AI_BATCH_SIZE, -1), past_key_values=static_cache, use_cache=True
+                ).past_key_values
+                self._prefix_kv = [
+                    (keys.clone(), values.clone()) for keys, values in _static_cache_tensors(self._prefix_cache)
+                ]
+            self._prefix_ids = prefix_ids
+        except Exception as e:
+            self.logger.warning(f"Cache do prefixo do prompt indisponível, usando prompt completo: {e}")
+            self._prefix_ids = None
+            self._prefix_cache = None
+            self._prefix_kv = None
+    
+    def _generate(self, prompt: str) -> str:
+        """
+        Gera texto com model.generate sobre um prompt de tamanho fixo
+        
+        A geração passa pelo worker de micro-lotes: o modelo, o cache estático
+        e o grafo compilado só são usados por uma thread.
+        
+        Args:
+            prompt: Texto de entrada
+            
+        Returns:
+            Texto gerado (sem o prompt)
+        """
+        return self._submit(prompt).result(timeout=AI_RESULT_TIMEOUT)
+    
+    def _generate_batch(self, prompts: List[str]) -> List[str]:
+        """
+        Gera texto para vários prompts em uma única chamada a model.generate
+        
+        O lote é completado até AI_BATCH_SIZE repetindo o último prompt, para
+        que o cache estático e o grafo compilado vejam sempre o mesmo shape.
+        
+        Args:
+            prompts: Textos de entrada (até AI_BATCH_SIZE)
+            
+        Returns:
+            Textos gerados (sem os prompts), na ordem de entrada
+        """
+        count = len(prompts)
+        prompts = prompts + [prompts[-1]] * (AI_BATCH_SIZE - count)
+        
+        if self._prefix_cache is not None and all(p.startswith(SECURITY_PROMPT_PREFIX) for p in prompts):
+            tails = [p[len(SECURITY_PROMPT_PREFIX):] for p in prompts]
+            return self._generate_batch_with_prefix(tails)[:count]
+        
+        inputs = self.tokenizer(
+            prompts,
+            return_tensors="pt",
+            padding="max_length",
+            truncation=True,
+            max_length=PROMPT_MAX_TOKENS
+        ).to(self.model.device)
+        
+        with torch.inference_mode():
+            output = self.model.generate(**inputs, max_new_tokens=MAX_NEW_TOKENS)
+        
+        return self.tokenizer.batch_decode(
+            output[:, inputs["input_ids"].shape[1]:], skip_special_tokens=True
+        )[:count]
+    
+    def _generate_batch_with_prefix(self, tails: List[str]) -> List[str]:
+        """
+        Gera texto reutilizando o KV-cache do prefixo: só a parte variável passa pelo prefill
+        
+        Args:
+            tails: Parte variável de cada prompt (sem SECURITY_PROMPT_PREFIX), AI_BATCH_SIZE itens
+            
+        Returns:
+            Textos gerados, na ordem de entrada
+        """
+        batch_size = len(tails)
+        prefix_len = self._prefix_ids.shape[1]
+        tail_inputs = self.tokenizer(
+            tails,
+            return_tensors="pt",
+            padding="max_length",
+            truncation=True,
+            max_length=PROMPT_MAX_TOKENS - prefix_len,
+            add_special_tokens=False
+        ).to(self.model.device)
+        
+        prefix_ids = self._prefix_ids.expand(batch_size, -1)
+        input_ids = torch.cat([prefix_ids, tail_inputs["input_ids"]], dim=1)
+        attention_mask = torch.cat(
+            [torch.ones_like(prefix_ids), tail_inputs["attention_mask"]], dim=1
+        )
+        
+        with torch.inference_mode():
+            # Restaurar o prefixo in-place: generate sobrescreve o cache de trabalho,
+            # que mantém os mesmos buffers (endereços estáticos) entre lotes
+            for (keys, values), (prefix_keys, prefix_values) in zip(
+                _static_cache_tensors(self._prefix_cache), self._prefix_kv
+            ):
+                keys.copy_(prefix_keys)
+                values.copy_(prefix_values)
+            
+            output = self.model.generate(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                past_key_values=self._prefix_cache,
+                cache_implementation=None,
+                max_new_tokens=MAX_NEW_TOKENS
+            )
+        
+        return self.tokenizer.batch_decode(
+            output[:, input_ids.shape[1]:], skip_special_tokens=True
+        )
+    
+    def _submit(self, prompt: str) -> Future:
+        """
+        Enfileira prompt para inferência em micro-lote
+        
+        Args:
+            prompt: Texto de entrada
+            
+        Returns:
+            Future com o texto gerado
+        """
+        with self._batch_lock:
+            if self._batch_worker is None or not self._batch_worker.is_alive():
+                self._batch_worker = threading.Thread(target=self._batch_loop, daemon=True)
+                self._batch_worker.start()
+        
+        future = Future()
+        self._pending.put((prompt, future))
+        return future
+    
+    def _batch_loop(self) -> None:
+        """Agrega prompts pendentes e executa um model.generate por lote"""
+        while True:
+            batch = [self._pending.get()]
+            deadline = time.monotonic() + AI_BATCH_WINDOW
+            while len(batch) < AI_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            prompts = [prompt for prompt, _ in batch]
+            try:
+                results = self._generate_batch(prompts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+    
     def _load_known_patterns(self) -> None:
         """Carrega padrões de ameaça conhecidos"""
         known_patterns = [
@@ -230,6 +931,111 @@ class ABISSSystem:
             pattern = ThreatPattern(**pattern_data)
             self.threat_patterns[pattern.pattern_id] = pattern
     
+    def _build_pattern_index(self) -> Tuple[Dict[str, int], np.ndarray, np.ndarray, np.ndarray, List[str]]:
+        """
+        Constrói o índice SoA dos padrões: vocabulário de indicadores,
+        offsets/IDs no layout CSR, severidades e tipos
+        """
+        vocabulary: Dict[str, int] = {}
+        offsets = [0]
+        indicator_ids = []
+        severities = []
+        types = []
+        for pattern in self.threat_patterns.values():
+            for indicator in pattern._indicator_set:
+                indicator_ids.append(vocabulary.setdefault(indicator, len(vocabulary)))
+            offsets.append(len(indicator_ids))
+            severities.append(pattern.severity)
+            types.append(pattern.pattern_type)
+        
+        self._indicator_db = self._compile_indicator_db(vocabulary)
+        
+        return (
+            vocabulary,
+            np.array(offsets, dtype=np.int32),
+            np.array(indicator_ids, dtype=np.int32),
+            np.array(severities, dtype=np.float64),
+            types
+        )
+    
+    def _compile_indicator_db(self, vocabulary: Dict[str, int]):
+        """
+        Compila os indicadores em um banco Hyperscan multi-padrão (literais)
+        
+        Args:
+            vocabulary: Indicador -> ID no vocabulário
+            
+        Returns:
+            Banco compilado, ou None sem Hyperscan/indicadores
+        """
+        if hyperscan is None or not vocabulary:
+            return None
+        
+        try:
+            db = hyperscan.Database()
+            db.compile(
+                expressions=[re.escape(indicator.encode()) for indicator in vocabulary],
+                ids=list(vocabulary.values()),
+                elements=len(vocabulary),
+                flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(vocabulary)
+            )
+            return db
+        except Exception as e:
+            self.logger.warning(f"Falha ao compilar indicadores no Hyperscan, usando busca Python: {e}")
+            return None
+    
+    def _indicator_presence(self, network_data: Dict[str, Any]) -> np.ndarray:
+        """
+        Marca quais indicadores do vocabulário aparecem no evento (chave ou valor)
+        
+        Args:
+            network_data: Dados de rede
+            
+        Returns:
+            Máscara booleana alinhada com o vocabulário do índice de padrões
+        """
+        if self._pattern_index is None or self._pattern_index_size != len(self.threat_patterns):
+            self._pattern_index = self._build_pattern_index()
+            self._pattern_index_size = len(self.threat_patterns)
+        vocabulary = self._pattern_index[0]
+        
+        # Indicadores presentes como chave do evento
+        present = np.zeros(len(vocabulary), dtype=np.bool_)
+        for key in network_data:
+            idx = vocabulary.get(key)
+            if idx is not None:
+                present[idx] = True
+        
+        # Indicadores presentes nos valores: uma varredura multi-padrão ou um teste por indicador
+        values_text = _join_values(network_data)
+        db = self._indicator_db
+        if db is not None:
+            def on_match(idx, start, end, flags, context):
+                present[idx] = True
+            
+            with self._scan_lock:  # Scratch do Hyperscan não é compartilhável entre threads
+                db.scan(values_text.encode(), match_event_handler=on_match)
+        else:
+            for indicator, idx in vocabulary.items():
+                if not present[idx] and indicator in values_text:
+                    present[idx] = True
+        
+        return present
+    
+    def _score_patterns(self, network_data: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """
+        Calcula o score de correspondência de todos os padrões em uma chamada
+        
+        Args:
+            network_data: Dados de rede
+            
+        Returns:
+            Tuple (scores, severidades, tipos) alinhados por padrão
+        """
+        present = self._indicator_presence(network_data)
+        _, offsets, indicator_ids, severities, types = self._pattern_index
+        return _pattern_match_scores(present, offsets, indicator_ids), severities, types
+    
     def detect_threat(self, network_data: Dict[str, Any]) -> Tuple[float, str]:
         """
         Detecta ameaças usando IA e análise de padrões
@@ -241,34 +1047,70 @@ class ABISSSystem:
             Tuple (score_ameaça, tipo_ameaça)
         """
         try:
-            # Análise baseada em padrões
-            pattern_scores = []
-            for pattern in self.threat_patterns.values():
-                match_score = pattern.match(network_data)
-                if match_score > 0.5:  # Threshold para considerar correspondência
-                    pattern_scores.append((match_score * pattern.severity, pattern.pattern_type))
+            # Análise baseada em padrões: correspondência, threshold e seleção em um único kernel
+            present = self._indicator_presence(network_data)
+            _, offsets, indicator_ids, severities, types = self._pattern_index
+            best_pattern_score, best = _best_pattern_match(
+                present, offsets, indicator_ids, severities, PATTERN_MATCH_THRESHOLD
+            )
             
             # Análise com IA (Gemma 3N)
             ai_score, ai_type = self._analyze_with_ai(network_data)
             
-            # Combinar resultados
-            if pattern_scores:
-                best_pattern_score, best_pattern_type = max(pattern_scores, key=lambda x: x[0])
-                combined_score = (best_pattern_score + ai_score) / 2
-                combined_type = best_pattern_type if best_pattern_score > ai_score else ai_type
-            else:
-                combined_score = ai_score
-                combined_type = ai_type
-            
-            # Atualizar estatísticas
-            self.threat_stats[combined_type] += 1
-            
-            return combined_score, combined_type
+            return self._combine_threat_scores(best_pattern_score, best, types, ai_score, ai_type)
             
         except Exception as e:
             self.logger.error(f"Erro na detecção de ameaças: {e}")
             return 0.0, "unknown"
     
+    def detect_threats_batch(self, network_data_batch: List[Dict[str, Any]]) -> List[Tuple[float, str]]:
+        """
+        Detecta ameaças em um lote de eventos
+        
+        A presença de indicadores é montada como matriz (N, V) e pontuada em um
+        único kernel; os prompts do lote seguem juntos para o micro-lote da IA.
+        
+        Args:
+            network_data_batch: Eventos de rede
+            
+        Returns:
+            Tuple (score_ameaça, tipo_ameaça) de cada evento, na ordem de entrada
+        """
+        if not network_data_batch:
+            return []
+        
+        try:
+            present = np.stack([self._indicator_presence(data) for data in network_data_batch])
+            _, offsets, indicator_ids, severities, types = self._pattern_index
+            best_scores, best_indices = _best_pattern_match_batch(
+                present, offsets, indicator_ids, severities, PATTERN_MATCH_THRESHOLD
+            )
+        except Exception as e:
+            self.logger.error(f"Erro na detecção de ameaças em lote: {e}")
+            return [self.detect_threat(data) for data in network_data_batch]
+        
+        ai_results = self._analyze_with_ai_batch(network_data_batch)
+        return [
+            self._combine_threat_scores(best_scores[i], int(best_indices[i]), types, ai_score, ai_type)
+            for i, (ai_score, ai_type) in enumerate(ai_results)
+        ]
+    
+    def _combine_threat_scores(self, best_pattern_score: float, best: int, types: List[str],
+                               ai_score: float, ai_type: str) -> Tuple[float, str]:
+        """Combina o melhor padrão com a análise da IA e atualiza as estatísticas"""
+        if best >= 0:
+            best_pattern_score, best_pattern_type = float(best_pattern_score), types[best]
+            combined_score = (best_pattern_score + ai_score) / 2
+            combined_type = best_pattern_type if best_pattern_score > ai_score else ai_type
+        else:
+            combined_score = ai_score
+            combined_type = ai_type
+        
+        # Atualizar estatísticas
+        self.threat_stats[combined_type] += 1
+        
+        return combined_score, combined_type
+    
     def _analyze_with_ai(self, network_data: Dict[str, Any]) -> Tuple[float, str]:
         """
         Analisa dados usando modelo Gemma 3N
@@ -279,28 +1121,53 @@ class ABISSSystem:
         Returns:
             Tuple (score, tipo_ameaça)
         """
-        if self.pipeline is None:
-            # Modo simulação
-            return np.random.uniform(0.0, 1.0), "simulated_threat"
+        return self._analyze_with_ai_batch([network_data])[0]
+    
+    def _analyze_with_ai_batch(self, network_data_batch: List[Dict[str, Any]]) -> List[Tuple[float, str]]:
+        """
+        Analisa um lote de eventos com o modelo, enfileirando todos os prompts de uma vez
         
-        try:
-            # Preparar prompt para o modelo
-            prompt = self._build_security_prompt(network_data)
-            
-            # Executar inferência
-            response = self.pipeline(prompt, max_length=200, num_return_sequences=1)
-            
-            # Analisar resposta
-            ai_response = response[0]["generated_text"]
-            
-            # Extrair score e tipo da resposta
-            score, threat_type = self._parse_ai_response(ai_response)
-            
-            return score, threat_type
+        Args:
+            network_data_batch: Dados para análise
             
-        except Exception as e:
-            self.logger.error(f"Erro na análise com IA: {e}")
-            return 0.0, "ai_error"
+        Returns:
+            Tuple (score, tipo_ameaça) de cada evento
+        """
+        if self.model is None:
+            # Modo simulação
+            return [(self._simulated_score(), "simulated_threat") for _ in network_data_batch]
+        
+        # Enfileirar antes de aguardar: os prompts do lote caem no mesmo micro-lote
+        futures = []
+        for network_data in network_data_batch:
+            try:
+                futures.append(self._submit(self._build_security_prompt(network_data)))
+            except Exception as e:
+                futures.append(e)
+        
+        results = []
+        for future in futures:
+            try:
+                if isinstance(future, Exception):
+                    raise future
+                ai_response = future.result(timeout=AI_RESULT_TIMEOUT)
+                
+                # Extrair score e tipo da resposta
+                results.append(self._parse_ai_response(ai_response))
+                
+            except Exception as e:
+                self.logger.error(f"Erro na análise com IA: {e}")
+                results.append((0.0, "ai_error"))
+        
+        return results
+    
+    def _simulated_score(self) -> float:
+        """Próximo score aleatório do buffer, regenerado ao se esgotar"""
+        i = self._rng_i & (SIMULATION_BUFFER_SIZE - 1)
+        if i == 0 and self._rng_i:
+            self._rng_buf = self._rng.random(SIMULATION_BUFFER_SIZE)
+        self._rng_i += 1
+        return float(self._rng_buf[i])
     
     def _build_security_prompt(self, network_data: Dict[str, Any]) -> str:
         """
@@ -312,23 +1179,14 @@ class ABISSSystem:
         Returns:
             Prompt estruturado
         """
-        prompt = f"""
-        Analise os seguintes dados de rede para detectar ameaças de segurança:
-        
-        Dados de Rede:
-        - Pacotes: {network_data.get('packet_count', 0)}
-        - Tentativas de conexão: {network_data.get('connection_attempts', 0)}
-        - Taxa de transferência: {network_data.get('data_transfer_rate', 0)}
-        - IPs de origem: {network_data.get('source_ips', [])}
-        - Portas de destino: {network_data.get('destination_ports', [])}
-        
-        Avalie se há ameaças de segurança e responda no formato:
-        THREAT_SCORE: [0.0-1.0]
-        THREAT_TYPE: [tipo_da_ameaça]
-        CONFIDENCE: [0.0-1.0]
-        """
-        
-        return prompt
+        # Prefixo fixo primeiro, para que seu KV-cache seja reaproveitado
+        return SECURITY_PROMPT_PREFIX + SECURITY_PROMPT_FIELDS.format(
+            packet_count=network_data.get('packet_count', 0),
+            connection_attempts=network_data.get('connection_attempts', 0),
+            data_transfer_rate=network_data.get('data_transfer_rate', 0),
+            source_ips=network_data.get('source_ips', []),
+            destination_ports=network_data.get('destination_ports', [])
+        )
     
     def _parse_ai_response(self, response: str) -> Tuple[float, str]:
         """
@@ -341,15 +1199,11 @@ class ABISSSystem:
             Tuple (score, tipo_ameaça)
         """
         try:
-            lines = response.split('\n')
-            score = 0.0
-            threat_type = "unknown"
+            score_match = AI_SCORE_RE.search(response)
+            type_match = AI_TYPE_RE.search(response)
             
-            for line in lines:
-                if line.startswith("THREAT_SCORE:"):
-                    score = float(line.split(":")[1].strip())
-                elif line.startswith("THREAT_TYPE:"):
-                    threat_type = line.split(":")[1].strip()
+            score = float(score_match.group(1)) if score_match else 0.0
+            threat_type = sys.intern(type_match.group(1).strip()) if type_match else "unknown"
             
             return score, threat_type
             
@@ -368,22 +1222,20 @@ class ABISSSystem:
             Tuple (score_comportamento, anomalias_detectadas)
         """
         try:
-            # Análise temporal
-            time_score = self._analyze_temporal_patterns(user_behavior)
-            
-            # Análise de padrões de acesso
-            access_score = self._analyze_access_patterns(user_behavior)
-            
-            # Análise de uso de rede
-            network_score = self._analyze_network_usage(user_behavior)
-            
-            # Score combinado
-            behavior_score = (time_score + access_score + network_score) / 3
+            # Extrair features e pontuar temporal/acesso/rede em um único kernel
+            login_time = user_behavior.get("login_time", "")
+            network_usage = user_behavior.get("network_usage", 0)
+            behavior_score, unusual_login, excessive_network = _score_behavior(
+                self._time_to_minutes(login_time or "09:00"),
+                self._time_to_minutes(user_behavior.get("logout_time", "17:00")),
+                self._analyze_access_patterns(user_behavior),
+                float(network_usage)
+            )
             
             # Detectar anomalias
-            anomalies = self._detect_behavior_anomalies(user_behavior)
+            anomalies = self._detect_behavior_anomalies(login_time, network_usage, unusual_login, excessive_network)
             
-            return behavior_score, anomalies
+            return float(behavior_score), anomalies
             
         except Exception as e:
             self.logger.error(f"Erro na análise comportamental: {e}")
@@ -391,47 +1243,34 @@ class ABISSSystem:
     
     def _analyze_temporal_patterns(self, behavior: Dict[str, Any]) -> float:
         """Analisa padrões temporais"""
-        # Implementação básica
-        login_time = behavior.get("login_time", "09:00")
-        logout_time = behavior.get("logout_time", "17:00")
-        
-        # Verificar horários normais de trabalho
-        if "09:00" <= login_time <= "10:00" and "16:00" <= logout_time <= "18:00":
-            return 0.9
-        elif "08:00" <= login_time <= "11:00" and "15:00" <= logout_time <= "19:00":
-            return 0.7
-        else:
-            return 0.3
+        login_minutes = self._time_to_minutes(behavior.get("login_time", "09:00"))
+        logout_minutes = self._time_to_minutes(behavior.get("logout_time", "17:00"))
+        
+        # Score pelo menor nível entre as faixas de login e de logout
+        return BAND_SCORES[min(_band_level(login_minutes, LOGIN_BAND),
+                               _band_level(logout_minutes, LOGOUT_BAND))]
     
     def _analyze_access_patterns(self, behavior: Dict[str, Any]) -> float:
         """Analisa padrões de acesso"""
         access_pattern = behavior.get("data_access_pattern", [])
         
         # Verificar se acessa arquivos típicos
-        typical_files = ["file1", "file2", "file3", "document", "report"]
-        typical_count = sum(1 for file in access_pattern if any(tf in file.lower() for tf in typical_files))
+        typical_count = sum(1 for file in access_pattern if any(tf in file.lower() for tf in TYPICAL_FILES))
         
         return min(1.0, typical_count / len(access_pattern)) if access_pattern else 0.5
     
     def _analyze_network_usage(self, behavior: Dict[str, Any]) -> float:
         """Analisa uso de rede"""
-        network_usage = behavior.get("network_usage", 0)
-        
         # Verificar se está dentro de limites normais (5MB - 50MB)
-        if 5000000 <= network_usage <= 50000000:
-            return 0.9
-        elif 1000000 <= network_usage <= 100000000:
-            return 0.7
-        else:
-            return 0.3
+        return BAND_SCORES[_band_level(behavior.get("network_usage", 0), NETWORK_BAND)]
     
-    def _detect_behavior_anomalies(self, behavior: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Detecta anomalias comportamentais"""
+    def _detect_behavior_anomalies(self, login_time: str, network_usage: float,
+                                   unusual_login: bool, excessive_network: bool) -> List[Dict[str, Any]]:
+        """Detecta anomalias comportamentais a partir das flags calculadas em _score_behavior"""
         anomalies = []
         
         # Verificar horário de login anômalo
-        login_time = behavior.get("login_time", "")
-        if login_time and ("02:00" <= login_time <= "06:00"):
+        if unusual_login:
             anomalies.append({
                 "type": "anomalous_login_time",
                 "severity": 0.7,
@@ -439,8 +1278,7 @@ class ABISSSystem:
             })
         
         # Verificar uso excessivo de rede
-        network_usage = behavior.get("network_usage", 0)
-        if network_usage > 100000000:  # 100MB
+        if excessive_network:
             anomalies.append({
                 "type": "excessive_network_usage",
                 "severity": 0.8,
@@ -507,6 +1345,7 @@ class ABISSSystem:
         """
         pattern = ThreatPattern(**pattern_data)
         self.threat_patterns[pattern.pattern_id] = pattern
+        self._pattern_index = None  # Invalida o índice SoA
         
         self.logger.info(f"Novo padrão aprendido: {pattern.pattern_type}")
         return pattern.pattern_id
@@ -572,6 +1411,8 @@ class ABISSSystem:
         }
         
         self.learning_history.append(learning_entry)
+        self._eff_buf[self._eff_head % len(self._eff_buf)] = effectiveness
+        self._eff_head += 1
         
         # Atualizar estatísticas
         self.response_stats[response.action] += 1
@@ -585,11 +1426,11 @@ class ABISSSystem:
         current_threshold = self.config["threat_threshold"]
         
         # Aumentar threshold se muitas respostas ineficazes
-        if len(self.learning_history) > 10:
-            recent_effectiveness = np.mean([
-                entry["effectiveness"] 
-                for entry in list(self.learning_history)[-10:]
-            ])
+        window = RECENT_EFFECTIVENESS_WINDOW
+        if min(self._eff_head, len(self._eff_buf)) > window:
+            recent_effectiveness = self._eff_buf.take(
+                range(self._eff_head - window, self._eff_head), mode="wrap"
+            ).mean()
             
             if recent_effectiveness < 0.5:
                 self.config["threat_threshold"] = min(0.9, current_threshold + 0.05)
@@ -614,6 +1455,19 @@ class ABISSSystem:
             "region": self.config.get("region", "unknown")
         }
         
+        # Publicar no endpoint configurado, reutilizando as conexões da sessão
+        if self.threat_intel_endpoint:
+            try:
+                response = self._http.post(
+                    self.threat_intel_endpoint,
+                    json=shared_data,
+                    timeout=THREAT_INTEL_TIMEOUT
+                )
+                if response.status_code >= 400:
+                    self.logger.warning(f"Falha ao compartilhar inteligência: HTTP {response.status_code}")
+            except requests.RequestException as e:
+                self.logger.warning(f"Falha ao compartilhar inteligência: {e}")
+        
         return shared_data
     
     def establish_behavioral_baseline(self, historical_data: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -629,19 +1483,21 @@ class ABISSSystem:
         if not historical_data:
             return {}
         
+        # Uma única passada sobre os dicts; o restante opera sobre colunas
+        arr = self._history_arr = self._to_behavior_records(historical_data)
+        
         # Analisar padrões de login
-        login_times = [data.get("login_time", "09:00") for data in historical_data]
-        avg_login_time = np.mean([self._time_to_minutes(lt) for lt in login_times])
+        avg_login_time = arr["login_min"].mean()
         
         # Analisar padrões de acesso
-        access_counts = [data.get("data_access_count", 0) for data in historical_data]
-        avg_access_count = np.mean(access_counts)
-        std_access_count = np.std(access_counts)
+        access_counts = arr["access_count"]
+        avg_access_count = access_counts.mean()
+        std_access_count = access_counts.std()
         
         # Analisar uso de rede
-        network_usages = [data.get("network_usage", 0) for data in historical_data]
-        avg_network_usage = np.mean(network_usages)
-        std_network_usage = np.std(network_usages)
+        network_usages = arr["network"]
+        avg_network_usage = network_usages.mean()
+        std_network_usage = network_usages.std()
         
         baseline = {
             "login_patterns": {
@@ -660,13 +1516,31 @@ class ABISSSystem:
         
         return baseline
     
+    def _to_behavior_records(self, historical_data: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Converte registros de comportamento (AoS) em array estruturado (SoA)
+        
+        Args:
+            historical_data: Dados históricos de comportamento
+            
+        Returns:
+            Array com dtype BEHAVIOR_RECORD_DTYPE, horário de login já em minutos
+        """
+        return np.array([
+            (
+                self._time_to_minutes(data.get("login_time", "09:00")),
+                data.get("data_access_count", 0),
+                data.get("network_usage", 0)
+            )
+            for data in historical_data
+        ], dtype=BEHAVIOR_RECORD_DTYPE)
+    
     def _time_to_minutes(self, time_str: str) -> float:
         """Converte string de tempo para minutos"""
         try:
-            hours, minutes = map(int, time_str.split(":"))
-            return hours * 60 + minutes
-        except:
-            return 540  # 9:00 como padrão
+            return _parse_minutes(time_str)
+        except TypeError:  # Valor não hashable
+            return DEFAULT_MINUTES
     
     def _minutes_to_time(self, minutes: float) -> str:
         """Converte minutos para string de tempo"""
@@ -730,27 +1604,29 @@ class ABISSSystem:
         if not response_history:
             return {}
         
-        # Analisar eficácia por ação
-        action_effectiveness = defaultdict(list)
-        for response, outcome in response_history:
-            effectiveness = self.evaluate_response_effectiveness(response, outcome)
-            action_effectiveness[response.action].append(effectiveness)
+        # Colunas do histórico em uma única passada
+        n = len(response_history)
+        actions = np.array([response.action for response, _ in response_history], dtype=object)
+        effectiveness = np.fromiter(
+            (self.evaluate_response_effectiveness(response, outcome) for response, outcome in response_history),
+            dtype=np.float64, count=n
+        )
         
-        # Encontrar melhores ações
-        best_actions = {}
-        for action, effectiveness_list in action_effectiveness.items():
-            avg_effectiveness = np.mean(effectiveness_list)
-            best_actions[action] = avg_effectiveness
+        # Eficácia média por ação (agrupamento vetorizado)
+        unique_actions, inverse = np.unique(actions, return_inverse=True)
+        means = np.bincount(inverse, weights=effectiveness) / np.bincount(inverse)
+        best_actions = dict(zip(unique_actions.tolist(), means.tolist()))
         
         # Otimizar parâmetros
         parameter_optimizations = {}
-        for action in best_actions:
-            if action == "block_ip":
-                # Otimizar duração do bloqueio
-                durations = [r.parameters.get("duration", 3600) for r, _ in response_history if r.action == action]
-                if durations:
-                    optimal_duration = np.median(durations)
-                    parameter_optimizations[action] = {"optimal_duration": optimal_duration}
+        if "block_ip" in best_actions:
+            # Otimizar duração do bloqueio
+            block_rows = np.flatnonzero(actions == "block_ip")
+            durations = np.fromiter(
+                (response_history[i][0].parameters.get("duration", 3600) for i in block_rows),
+                dtype=np.float64, count=len(block_rows)
+            )
+            parameter_optimizations["block_ip"] = {"optimal_duration": float(np.median(durations))}
         
         return {
             "best_actions": best_actions,
@@ -763,6 +1639,7 @@ class ABISSSystem:
             "model_name": self.model_name,
             "model_loaded": self.model is not None,
             "model_size": "2B" if "2b" in self.model_name else "Unknown",
+            "quantization": self.quantization,
             "transformers_available": TRANSFORMERS_AVAILABLE
         }
     
@@ -776,7 +1653,7 @@ class ABISSSystem:
         Returns:
             Resultado da inferência
         """
-        if self.pipeline is None:
+        if self.model is None:
             return {
                 "analysis": "Model not available",
                 "confidence": 0.0,
@@ -784,8 +1661,7 @@ class ABISSSystem:
             }
         
         try:
-            response = self.pipeline(input_text, max_length=200, num_return_sequences=1)
-            result_text = response[0]["generated_text"]
+            result_text = self._generate(input_text)
             
             return {
                 "analysis": result_text,
@@ -819,21 +1695,68 @@ class ABISSSystem:
         self.is_monitoring = False
         self.stop_monitoring.set()
         
+        # Cancelar a task interrompe a espera atual sem aguardar o intervalo
+        loop, task = self._monitor_loop, self._monitor_task
+        if loop is not None and task is not None:
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:  # Loop já encerrado
+                pass
+        
         if self.monitor_thread:
             self.monitor_thread.join()
         
         self.logger.info("Monitoramento em tempo real parado")
     
+    def register_data_source(self, source: Callable[[], Awaitable[Optional[Dict[str, Any]]]]) -> None:
+        """
+        Registra fonte assíncrona de dados para o monitoramento
+        
+        Args:
+            source: Corrotina sem argumentos que retorna dados de rede (ou None)
+        """
+        self.data_sources.append(source)
+    
     def _monitoring_loop(self) -> None:
-        """Loop de monitoramento em tempo real"""
+        """Executa o monitoramento em um event loop dedicado a esta thread"""
+        loop = asyncio.new_event_loop()
+        self._monitor_loop = loop
+        try:
+            self._monitor_task = loop.create_task(self._monitoring_loop_async())
+            loop.run_until_complete(self._monitor_task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._monitor_task = None
+            self._monitor_loop = None
+            loop.close()
+    
+    async def _monitoring_loop_async(self) -> None:
+        """Loop de monitoramento em tempo real: coleta todas as fontes a cada intervalo"""
+        loop = asyncio.get_running_loop()
+        interval = self.config.get("poll_interval", POLL_INTERVAL)
+        
         while not self.stop_monitoring.is_set():
             try:
-                # Aqui seria integrado com coleta real de dados
-                time.sleep(1)  # Intervalo de verificação
+                results = await asyncio.gather(
+                    *(source() for source in self.data_sources), return_exceptions=True
+                )
+                batch = []
+                for data in results:
+                    if isinstance(data, Exception):
+                        self.logger.warning(f"Falha na coleta de dados: {data}")
+                    elif data:
+                        batch.append(data)
+                
+                # Inferência bloqueante fica fora do event loop, um lote por ciclo
+                if batch:
+                    await loop.run_in_executor(None, self.process_real_time_data_batch, batch)
+                
+                await asyncio.sleep(interval)
                 
             except Exception as e:
                 self.logger.error(f"Erro no loop de monitoramento: {e}")
-                time.sleep(5)
+                await asyncio.sleep(5 * interval)
     
     def process_real_time_data(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
@@ -845,17 +1768,31 @@ class ABISSSystem:
         Returns:
             Lista de alertas gerados
         """
-        alerts = []
-        
-        # Detectar ameaças
-        threat_score, threat_type = self.detect_threat(data)
+        return self.process_real_time_data_batch([data])[0]
+    
+    def process_real_time_data_batch(self, data_batch: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        Processa um lote de dados em tempo real
         
-        if threat_score > self.config["threat_threshold"]:
-            alerts.append({
+        Args:
+            data_batch: Eventos em tempo real
+            
+        Returns:
+            Lista de alertas gerados para cada evento, na ordem de entrada
+        """
+        detections = self.detect_threats_batch(data_batch)
+        scores = np.fromiter((score for score, _ in detections), dtype=np.float64, count=len(detections))
+        
+        # Somente eventos acima do threshold materializam alertas
+        alerts: List[List[Dict[str, Any]]] = [[] for _ in data_batch]
+        now = time.time()
+        for i in np.flatnonzero(scores > self.config["threat_threshold"]):
+            threat_score, threat_type = detections[i]
+            alerts[i].append({
                 "type": "threat_detected",
                 "severity": threat_score,
                 "description": f"Threat detected: {threat_type}",
-                "timestamp": time.time()
+                "timestamp": now
             })
         
         return alerts
@@ -873,52 +1810,88 @@ class ABISSSystem:
         if len(threats) < 2:
             return {"campaign_detected": False}
         
-        # Agrupar por IP de origem
-        ip_groups = defaultdict(list)
-        for threat in threats:
-            source_ip = threat.get("source_ip", "unknown")
-            ip_groups[source_ip].append(threat)
-        
-        # Verificar campanhas
-        campaigns = []
-        for ip, ip_threats in ip_groups.items():
-            if len(ip_threats) >= 2:
-                # Verificar sequência temporal
-                sorted_threats = sorted(ip_threats, key=lambda x: x.get("timestamp", 0))
-                
-                campaign = {
-                    "source_ip": ip,
-                    "threat_count": len(ip_threats),
-                    "time_span": sorted_threats[-1]["timestamp"] - sorted_threats[0]["timestamp"],
-                    "threat_types": [t.get("type", "unknown") for t in ip_threats],
-                    "max_severity": max(t.get("severity", 0) for t in ip_threats)
-                }
-                campaigns.append(campaign)
+        # Janelas deslizantes repetem o mesmo conjunto de ameaças entre chamadas
+        try:
+            key = _correlation_key(threats)
+        except (TypeError, ValueError, RecursionError) as e:
+            self.logger.debug(f"Janela sem chave de cache, correlacionando diretamente: {e}")
+            return self._correlate_threats_uncached(threats)
+        
+        with self._correlation_lock:
+            cached = self._correlation_cache.get(key)
+            if cached is not None:
+                self._correlation_cache.move_to_end(key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
+        result = self._correlate_threats_uncached(threats)
+        
+        with self._correlation_lock:
+            self._correlation_cache[key] = copy.deepcopy(result)
+            if len(self._correlation_cache) > self._correlation_cache_size:
+                self._correlation_cache.popitem(last=False)
+        
+        return result
+    
+    def _correlate_threats_uncached(self, threats: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Correlaciona uma janela de 2+ ameaças (sem consultar o cache)"""
+        batch = ThreatBatch.from_threats(threats)
+        
+        # Agrupar pela chave inteira do IP de origem com uma única ordenação estável:
+        # cada grupo mantém a ordem original e seu primeiro elemento é a primeira aparição
+        order = np.argsort(batch.ip_keys, kind="stable")
+        keys = batch.ip_keys[order]
+        starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+        counts = np.diff(np.append(starts, len(keys)))
+        first_seen = order[starts]
+        
+        # Reduções por grupo em uma passada cada
+        ts = batch.ts[order]
+        time_spans = np.maximum.reduceat(ts, starts) - np.minimum.reduceat(ts, starts)
+        max_severities = np.maximum.reduceat(batch.sev[order], starts)
+        types = batch.types[order]
+        
+        # Verificar campanhas (grupos com 2+ ameaças, na ordem de primeira aparição)
+        campaign_groups = np.flatnonzero(counts >= 2)
+        campaign_groups = campaign_groups[np.argsort(first_seen[campaign_groups])].tolist()
+        campaigns = [
+            {
+                "source_ip": batch.ips[first_seen[g]],
+                "threat_count": int(counts[g]),
+                "time_span": float(time_spans[g]),
+                "threat_types": types[starts[g]:starts[g] + counts[g]].tolist(),
+                "max_severity": float(max_severities[g])
+            }
+            for g in campaign_groups
+        ]
         
         return {
             "campaign_detected": len(campaigns) > 0,
             "campaigns": campaigns,
-            "threat_chain": self._identify_threat_chain(threats),
-            "overall_severity": max(t.get("severity", 0) for t in threats)
+            "threat_chain": self._identify_threat_chain(threats, batch.types.tolist()),
+            # Os grupos cobrem todas as ameaças: o máximo global sai dos máximos por grupo
+            "overall_severity": float(max_severities.max())
         }
     
-    def _identify_threat_chain(self, threats: List[Dict[str, Any]]) -> List[str]:
-        """Identifica cadeia de ameaças"""
-        # Implementação básica - em produção usar análise mais sofisticada
-        threat_types = [t.get("type", "unknown") for t in threats]
-        
-        # Padrões conhecidos de cadeias de ameaças
-        known_chains = [
-            ["port_scan", "brute_force", "data_exfiltration"],
-            ["phishing", "malware_infection", "data_exfiltration"],
-            ["ddos_attack", "data_exfiltration"]
-        ]
+    def _identify_threat_chain(self, threats: List[Dict[str, Any]],
+                               threat_types: Optional[List[str]] = None) -> List[str]:
+        """
+        Identifica cadeia de ameaças
         
-        for chain in known_chains:
-            if all(tt in threat_types for tt in chain):
-                return chain
+        Args:
+            threats: Lista de ameaças
+            threat_types: Tipos já extraídos das ameaças (ex.: coluna do ThreatBatch), na mesma ordem
+            
+        Returns:
+            Cadeia conhecida contida nos tipos observados, ou os próprios tipos
+        """
+        # Implementação básica - em produção usar análise mais sofisticada
+        if threat_types is None:
+            threat_types = [t.get("type", "unknown") for t in threats]
         
-        return threat_types
+        # Campanhas repetem os mesmos tipos: a busca é memoizada pelo conjunto
+        chain = _match_threat_chain(frozenset(threat_types))
+        return list(chain) if chain is not None else threat_types
     
     def adjust_thresholds(self, environmental_factors: Dict[str, Any]) -> None:
         """
@@ -927,20 +1900,14 @@ class ABISSSystem:
         Args:
             environmental_factors: Fatores ambientais
         """
-        network_load = environmental_factors.get("network_load", 0.5)
         threat_landscape = environmental_factors.get("threat_landscape", "medium")
         false_positive_rate = environmental_factors.get("false_positive_rate", 0.1)
         
-        # Ajustar threshold baseado na paisagem de ameaças
-        if threat_landscape == "high":
-            self.config["threat_threshold"] = max(0.5, self.config["threat_threshold"] - 0.1)
-        elif threat_landscape == "low":
-            self.config["threat_threshold"] = min(0.9, self.config["threat_threshold"] + 0.1)
-        
-        # Ajustar baseado na taxa de falsos positivos
-        if false_positive_rate > 0.15:
-            self.config["threat_threshold"] = min(0.9, self.config["threat_threshold"] + 0.05)
-        elif false_positive_rate < 0.05:
-            self.config["threat_threshold"] = max(0.5, self.config["threat_threshold"] - 0.05)
+        # Deltas por tabela (paisagem) e por comparação (falsos positivos), somados e limitados uma vez
+        delta = LANDSCAPE_THRESHOLD_DELTA.get(threat_landscape, 0.0) + FALSE_POSITIVE_STEP * (
+            (false_positive_rate > FALSE_POSITIVE_HIGH) - (false_positive_rate < FALSE_POSITIVE_LOW)
+        )
+        threshold = self.config["threat_threshold"] + delta
+        self.config["threat_threshold"] = min(THRESHOLD_MAX, max(THRESHOLD_MIN, threshold))
         
         self.logger.info(f"Thresholds ajustados para: {self.config['threat_threshold']}")
\ No newline at end of file
@@ -2,8 +2,24 @@
 NNIS - Neural Network Immune System
 Sistema imune neural para defesa adaptativa distribuída
 """
+import hashlib
+import json
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+
+# Default capacity of the distributed response ring buffer
+DEFAULT_LOG_CAPACITY = 1 << 16
+
+# Digest size (bytes) of canonical pattern signatures
+PATTERN_SIGNATURE_SIZE = 16
+
+
+def pattern_signature(pattern: Dict[str, Any]) -> bytes:
+    """Canonical signature of a pattern: key order and whitespace do not matter"""
+    canonical = json.dumps(pattern, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(canonical.encode(), digest_size=PATTERN_SIGNATURE_SIZE).digest()
 
 class NNIS:
     """
@@ -17,7 +33,15 @@ class NNIS:
         self.config = config or {}
         self.logger = logging.getLogger(__name__)
         self.pattern_memory = {}
-        self.response_log = []
+        # Signature -> labels storing that pattern, so recognition is a single hash lookup
+        self._signatures: Dict[bytes, Set[str]] = {}
+        # Response log: fixed-capacity ring buffer of interned node ids + threat flags
+        self._log_cap = int(self.config.get("log_capacity", DEFAULT_LOG_CAPACITY))
+        self._log_nodes = np.empty(self._log_cap, dtype=np.int32)
+        self._log_threat = np.zeros(self._log_cap, dtype=np.bool_)
+        self._log_pos = 0
+        self._node_ids: Dict[str, int] = {}
+        self._node_names: List[str] = []
         self.model_version = 0
         # Placeholder for Gemma 3N model
         self.gemma_model = None
@@ -31,21 +55,44 @@ class NNIS:
 
     def recognize_pattern(self, data: Dict[str, Any]) -> bool:
         """Recognize attack or benign patterns"""
-        self.logger.debug("Recognizing pattern (placeholder)")
-        # TODO: Implement pattern recognition logic
-        return False
+        self.logger.debug("Recognizing pattern")
+        return pattern_signature(data) in self._signatures
 
     def update_immune_memory(self, pattern: Dict[str, Any], label: str) -> None:
         """Update immune memory with new pattern"""
         self.logger.debug(f"Updating immune memory with label {label}")
-        # TODO: Implement immune memory update
+        previous = self.pattern_memory.get(label)
+        if previous is not None:
+            previous_sig = pattern_signature(previous)
+            labels = self._signatures.get(previous_sig, set())
+            labels.discard(label)
+            if not labels:
+                self._signatures.pop(previous_sig, None)
         self.pattern_memory[label] = pattern
+        self._signatures.setdefault(pattern_signature(pattern), set()).add(label)
 
     def distributed_response(self, node_id: str, threat: bool) -> None:
         """Coordinate distributed immune response"""
         self.logger.info(f"Distributed response for node {node_id}, threat={threat}")
         # TODO: Implement distributed response logic
-        self.response_log.append({"node": node_id, "threat": threat})
+        node = self._node_ids.get(node_id)
+        if node is None:
+            node = self._node_ids[node_id] = len(self._node_names)
+            self._node_names.append(node_id)
+        slot = self._log_pos % self._log_cap
+        self._log_nodes[slot] = node
+        self._log_threat[slot] = threat
+        self._log_pos += 1
+
+    @property
+    def response_log(self) -> List[Dict[str, Any]]:
+        """Retained responses, oldest first (materialized on demand)"""
+        count = min(self._log_pos, self._log_cap)
+        order = np.arange(self._log_pos - count, self._log_pos) % self._log_cap
+        return [
+            {"node": self._node_names[node], "threat": bool(threat)}
+            for node, threat in zip(self._log_nodes[order].tolist(), self._log_threat[order].tolist())
+        ]
 
     def update_model(self, new_model: Any, version: int) -> None:
         """Update neural model (federated learning)"""
@@ -63,6 +110,6 @@ class NNIS:
         """Return current immune system status"""
         return {
             "patterns": list(self.pattern_memory.keys()),
-            "responses": len(self.response_log),
+            "responses": int(min(self._log_pos, self._log_cap)),
             "model_version": self.model_version
         }
\ No newline at end of file
@@ -4,6 +4,9 @@ Testa o sistema ABISS (Adaptive Behaviour Intelligence Security System)
 """
 import unittest
 from unittest.mock import MagicMock
+
+import numpy as np
+
 from atous_sec_network.security.abiss import ABISS
 
 class TestABISS(unittest.TestCase):
@@ -26,6 +29,60 @@ class TestABISS(unittest.TestCase):
         result = self.abiss.detect_anomaly(node_id, data)
         self.assertIsInstance(result, bool)
 
+    def test_non_numeric_features(self):
+        """Testa que valores não numéricos viram 0.0 em vez de lançar exceção"""
+        data = {"cpu": "high", "mem": None, "disk": "42"}
+        self.abiss.profile_behavior("node1", data)
+
+        self.assertIsInstance(self.abiss.detect_anomaly("node1", data), bool)
+        np.testing.assert_array_equal(self.abiss._feat[0, :3], [0.0, 0.0, 42.0])
+
+    def test_non_finite_features(self):
+        """Testa que nan/inf viram 0.0 e não desativam a detecção da população"""
+        for i in range(9):
+            self.abiss.profile_behavior(f"node{i}", {"cpu": 1})
+        self.abiss.profile_behavior("node_nan", {"cpu": float("nan"), "mem": "inf"})
+
+        self.assertTrue(np.isfinite(self.abiss._feat[:10]).all())
+        self.assertTrue(self.abiss.detect_anomaly("probe", {"cpu": 1e9}))
+
+    def test_batch_anomaly_detection_small_population(self):
+        """Testa que um outlier é detectado mesmo em populações pequenas"""
+        for i in range(9):
+            self.abiss.profile_behavior(f"node{i}", {"cpu": 1})
+        self.abiss.profile_behavior("node_hot", {"cpu": 1e9})
+
+        self.assertEqual(self.abiss.detect_anomalies_batch().tolist(), [False] * 9 + [True])
+
+    def test_batch_anomaly_detection(self):
+        """Testa detecção de anomalias em lote sobre a matriz de features"""
+        for i in range(20):
+            self.abiss.profile_behavior(f"node{i}", {"cpu": 10 + i % 3, "mem": 20 + i % 2})
+        self.abiss.profile_behavior("node_hot", {"cpu": 99, "mem": 21})
+
+        anomalies = self.abiss.detect_anomalies_batch()
+
+        self.assertEqual(anomalies.shape, (21,))
+        self.assertEqual(anomalies.tolist(), [False] * 20 + [True])
+        self.assertTrue(self.abiss.detect_anomaly("probe", {"cpu": 99, "mem": 21}))
+        self.assertFalse(self.abiss.detect_anomaly("probe", {"cpu": 11, "mem": 20}))
+
+    def test_batch_anomaly_detection_onnx_session(self):
+        """Testa que o lote usa uma única chamada à sessão ONNX"""
+        for i in range(3):
+            self.abiss.profile_behavior(f"node{i}", {"cpu": i})
+        session = MagicMock()
+        session.run.return_value = [np.array([[0.1], [0.9], [0.2]], dtype=np.float32)]
+        self.abiss._session = session
+
+        anomalies = self.abiss.detect_anomalies_batch()
+
+        session.run.assert_called_once()
+        features = session.run.call_args[0][1]["x"]
+        self.assertEqual(features.dtype, np.float32)
+        self.assertEqual(features.shape, (3, len(self.abiss.feature_keys)))
+        self.assertEqual(anomalies.tolist(), [False, True, False])
+
     def test_adaptive_response(self):
         """Testa resposta adaptativa a anomalias"""
         node_id = "node3"
@@ -25,12 +25,51 @@ class TestNNIS(unittest.TestCase):
         self.nnis.update_immune_memory(pattern, label)
         self.assertIn(label, self.nnis.pattern_memory)
 
+    def test_recognize_stored_pattern(self):
+        """Testa reconhecimento por assinatura canônica, independente da ordem das chaves"""
+        self.nnis.update_immune_memory({"event": "attack", "type": "DoS"}, "attack_DoS")
+
+        self.assertTrue(self.nnis.recognize_pattern({"type": "DoS", "event": "attack"}))
+        self.assertFalse(self.nnis.recognize_pattern({"event": "attack", "type": "scan"}))
+
+        # Regravar o rótulo substitui a assinatura antiga
+        self.nnis.update_immune_memory({"event": "attack", "type": "DDoS"}, "attack_DoS")
+        self.assertFalse(self.nnis.recognize_pattern({"event": "attack", "type": "DoS"}))
+        self.assertTrue(self.nnis.recognize_pattern({"event": "attack", "type": "DDoS"}))
+
+    def test_recognize_pattern_shared_by_labels(self):
+        """Testa que o padrão continua reconhecido enquanto algum rótulo o mantém"""
+        pattern = {"event": "attack", "type": "DoS"}
+        self.nnis.update_immune_memory(pattern, "a")
+        self.nnis.update_immune_memory(dict(pattern), "b")
+
+        self.nnis.update_immune_memory({"event": "benign"}, "b")
+        self.assertTrue(self.nnis.recognize_pattern(pattern))
+
+        self.nnis.update_immune_memory({"event": "benign"}, "a")
+        self.assertFalse(self.nnis.recognize_pattern(pattern))
+
     def test_distributed_response(self):
         """Testa resposta imune distribuída"""
         node_id = "nodeX"
         self.nnis.distributed_response(node_id, threat=True)
         self.assertGreaterEqual(len(self.nnis.response_log), 1)
 
+    def test_response_log_ring_buffer(self):
+        """Testa que o log de respostas é limitado à capacidade configurada"""
+        nnis = NNIS({"log_capacity": 4})
+        for i in range(6):
+            nnis.distributed_response(f"node{i % 2}", threat=bool(i % 3 == 0))
+
+        self.assertEqual(nnis.get_status()["responses"], 4)
+        self.assertEqual(nnis.response_log, [
+            {"node": "node0", "threat": False},
+            {"node": "node1", "threat": True},
+            {"node": "node0", "threat": False},
+            {"node": "node1", "threat": False},
+        ])
+        self.assertEqual(len(nnis._node_names), 2)
+
     def test_model_update(self):
         """Testa atualização do modelo neural"""
         new_model = MagicMock()
@@ -6,8 +6,12 @@ import unittest
 from unittest.mock import Mock, patch, MagicMock
 import time
 import json
+import threading
 from typing import Dict, List, Any
 
+import numpy as np
+
+from atous_sec_network.security import abiss_system
 from atous_sec_network.security.abiss_system import ABISSSystem, ThreatPattern, AdaptiveResponse
 
 
@@ -34,6 +38,17 @@ class TestABISSSystem(unittest.TestCase):
         self.assertIsNotNone(self.abiss.threat_patterns)
         self.assertIsNotNone(self.abiss.adaptive_responses)
     
+    def test_known_patterns_have_unique_ids(self):
+        """Testa que padrões criados no mesmo instante não colidem de ID"""
+        self.assertEqual(len(self.abiss.threat_patterns), 4)
+        
+        with patch("time.time", return_value=1000.0):
+            ids = {ThreatPattern("t", [], 0.5, 0.1).pattern_id for _ in range(100)}
+            ids |= {AdaptiveResponse("block", 1, {}).response_id for _ in range(100)}
+        self.assertEqual(len(ids), 200)
+        # IDs mantêm o formato de 8 dígitos hexadecimais
+        self.assertTrue(all(len(i) == 8 and int(i, 16) >= 0 for i in ids))
+    
     def test_threat_detection(self):
         """Testa detecção de ameaças"""
         # Simular dados de rede suspeitos
@@ -74,6 +89,46 @@ class TestABISSSystem(unittest.TestCase):
         self.assertLessEqual(behavior_score, 1.0)
         self.assertIsInstance(anomalies, list)
     
+    def test_fused_behavior_score_matches_components(self):
+        """Testa que o kernel fundido equivale à média das análises individuais"""
+        behaviors = [
+            {"login_time": "09:00", "logout_time": "17:00",
+             "data_access_pattern": ["file1", "notes"], "network_usage": 5000000},
+            {"login_time": "03:00", "logout_time": "19:00", "network_usage": 150000000},
+            {"logout_time": "15:30", "network_usage": 50000000.5},
+        ]
+        for behavior in behaviors:
+            with self.subTest(behavior=behavior):
+                score, anomalies = self.abiss.analyze_behavior(behavior)
+                expected = (self.abiss._analyze_temporal_patterns(behavior)
+                            + self.abiss._analyze_access_patterns(behavior)
+                            + self.abiss._analyze_network_usage(behavior)) / 3
+                self.assertAlmostEqual(score, expected)
+        
+        self.assertEqual(
+            [anomaly["type"] for anomaly in self.abiss.analyze_behavior(behaviors[1])[1]],
+            ["anomalous_login_time", "excessive_network_usage"]
+        )
+        self.assertEqual(self.abiss._analyze_network_usage(behaviors[2]), 0.7)
+    
+    def test_temporal_pattern_windows(self):
+        """Testa faixas de horário de login/logout, inclusive nos limites"""
+        cases = [
+            ("09:00", "17:00", 0.9),
+            ("10:00", "18:00", 0.9),
+            ("10:01", "17:00", 0.7),
+            ("08:00", "15:00", 0.7),
+            ("11:00", "19:00", 0.7),
+            ("11:01", "17:00", 0.3),
+            ("09:30", "19:01", 0.3),
+            ("03:00", "17:00", 0.3),
+            ("8:30", "16:30", 0.7),
+        ]
+        for login, logout, expected in cases:
+            with self.subTest(login=login, logout=logout):
+                score = self.abiss._analyze_temporal_patterns({"login_time": login, "logout_time": logout})
+                self.assertEqual(score, expected)
+    
     def test_adaptive_response_generation(self):
         """Testa geração de respostas adaptativas"""
         # Simular ameaça detectada
@@ -183,6 +238,26 @@ class TestABISSSystem(unittest.TestCase):
         # Verificar que o sistema aprendeu
         self.assertGreater(len(self.abiss.learning_history), 0)
     
+    def test_threshold_adjustment_uses_recent_window(self):
+        """Testa ajuste de threshold pela média das últimas eficácias (buffer circular)"""
+        abiss = ABISSSystem({**self.config, "memory_size": 12})
+        abiss.config["threat_threshold"] = 0.5
+        response = AdaptiveResponse("block_ip", 1, {})
+        
+        # Eficácias altas seguidas de 10 baixas: apenas a janela recente conta
+        effectiveness = iter([0.9] * 5 + [0.1] * 10)
+        with patch.object(abiss, "evaluate_response_effectiveness", side_effect=lambda r, o: next(effectiveness)):
+            for _ in range(14):
+                abiss.learn_from_outcome(response, {})
+            self.assertAlmostEqual(abiss.config["threat_threshold"], 0.5 + 0.05 * 4)
+            abiss.learn_from_outcome(response, {})
+        
+        self.assertEqual(len(abiss.learning_history), 12)
+        np.testing.assert_allclose(
+            abiss._eff_buf.take(range(abiss._eff_head - 10, abiss._eff_head), mode="wrap"),
+            [entry["effectiveness"] for entry in list(abiss.learning_history)[-10:]]
+        )
+    
     def test_threat_intelligence_sharing(self):
         """Testa compartilhamento de inteligência de ameaças"""
         # Simular ameaça detectada
@@ -204,6 +279,26 @@ class TestABISSSystem(unittest.TestCase):
         self.assertIn("severity", shared_data)
         self.assertIn("anonymized", shared_data)
     
+    def test_threat_intelligence_sharing_reuses_session(self):
+        """Testa envio ao endpoint configurado pela mesma sessão HTTP"""
+        threat_info = {"threat_type": "ddos_attack", "indicators": ["syn_flood"], "severity": 0.9}
+        
+        with patch.object(self.abiss._http, "post") as mock_post:
+            self.abiss.share_threat_intelligence(threat_info)
+            mock_post.assert_not_called()
+            
+            self.abiss.threat_intel_endpoint = "http://localhost:9000/intel"
+            mock_post.return_value.status_code = 200
+            first = self.abiss.share_threat_intelligence(threat_info)
+            
+            mock_post.side_effect = abiss_system.requests.ConnectionError("offline")
+            second = self.abiss.share_threat_intelligence(threat_info)
+        
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertEqual(mock_post.call_args_list[0][1]["json"], first)
+        self.assertEqual(mock_post.call_args_list[0][1]["timeout"], abiss_system.THREAT_INTEL_TIMEOUT)
+        self.assertTrue(second["anonymized"])
+    
     def test_behavioral_baseline_establishment(self):
         """Testa estabelecimento de linha base comportamental"""
         # Simular dados históricos de comportamento
@@ -227,6 +322,17 @@ class TestABISSSystem(unittest.TestCase):
         self.assertIn("login_patterns", baseline)
         self.assertIn("data_access_patterns", baseline)
         self.assertIn("network_usage_patterns", baseline)
+        
+        # Estatísticas colunares equivalem às calculadas sobre os dicts
+        access_counts = [data["data_access_count"] for data in historical_data]
+        network_usages = [data["network_usage"] for data in historical_data]
+        self.assertAlmostEqual(baseline["data_access_patterns"]["avg_count"], np.mean(access_counts))
+        self.assertAlmostEqual(baseline["data_access_patterns"]["std_dev"], np.std(access_counts))
+        self.assertAlmostEqual(baseline["network_usage_patterns"]["std_dev"], np.std(network_usages))
+        login_minutes = [self.abiss._time_to_minutes(data["login_time"]) for data in historical_data]
+        self.assertEqual(baseline["login_patterns"]["avg_time"],
+                         self.abiss._minutes_to_time(np.mean(login_minutes)))
+        self.assertEqual(len(self.abiss._history_arr), len(historical_data))
     
     def test_anomaly_detection(self):
         """Testa detecção de anomalias"""
@@ -284,6 +390,19 @@ class TestABISSSystem(unittest.TestCase):
         self.assertIsInstance(optimized_responses, dict)
         self.assertIn("best_actions", optimized_responses)
         self.assertIn("parameter_optimizations", optimized_responses)
+        
+        # Médias agrupadas equivalem às calculadas por ação
+        for action in ("block_ip", "rate_limit"):
+            expected = np.mean([
+                self.abiss.evaluate_response_effectiveness(response, outcome)
+                for response, outcome in response_history if response.action == action
+            ])
+            self.assertAlmostEqual(optimized_responses["best_actions"][action], expected)
+        expected_duration = np.median([3600 + i * 100 for i in range(0, 50, 2)])
+        self.assertEqual(
+            optimized_responses["parameter_optimizations"]["block_ip"]["optimal_duration"],
+            expected_duration
+        )
     
     def test_gemma_model_integration(self):
         """Testa integração com modelo Gemma 3N"""
@@ -334,6 +453,55 @@ class TestABISSSystem(unittest.TestCase):
         self.abiss.stop_real_time_monitoring()
         self.assertFalse(self.abiss.is_monitoring)
     
+    def test_real_time_monitoring_collects_async_sources(self):
+        """Testa coleta das fontes assíncronas e parada imediata do monitoramento"""
+        collected = threading.Event()
+        
+        async def sensor():
+            return {"packet_count": 10}
+        
+        async def failing_sensor():
+            raise ConnectionError("sensor offline")
+        
+        self.abiss.register_data_source(sensor)
+        self.abiss.register_data_source(failing_sensor)
+        self.abiss.config["poll_interval"] = 60
+        
+        with patch.object(self.abiss, "process_real_time_data_batch",
+                          side_effect=lambda batch: collected.set()) as mock_process:
+            self.abiss.start_real_time_monitoring()
+            self.assertTrue(collected.wait(timeout=2.0))
+            
+            started = time.monotonic()
+            self.abiss.stop_real_time_monitoring()
+        
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertFalse(self.abiss.monitor_thread.is_alive())
+        mock_process.assert_called_once_with([{"packet_count": 10}])
+    
+    def test_process_real_time_data_batch(self):
+        """Testa lote de eventos: mesmos scores do caminho unitário e alertas só acima do threshold"""
+        self.abiss.config["threat_threshold"] = 0.5
+        events = [
+            {"multiple_failed_logins": 5, "rapid_connection_attempts": 40},
+            {"packet_count": 10},
+            {"note": "syn_flood via multiple_sources", "high_packet_rate": True},
+        ]
+        ai_results = [(0.2, "benign"), (0.1, "benign"), (0.3, "benign")]
+        
+        with patch.object(self.abiss, "_analyze_with_ai_batch", return_value=ai_results) as mock_ai:
+            detections = self.abiss.detect_threats_batch(events)
+            alerts = self.abiss.process_real_time_data_batch(events)
+        
+        mock_ai.assert_called_with(events)
+        for event, (ai_score, ai_type), detection in zip(events, ai_results, detections):
+            with patch.object(self.abiss, "_analyze_with_ai", return_value=(ai_score, ai_type)):
+                self.assertEqual(self.abiss.detect_threat(event), detection)
+        
+        self.assertEqual([len(event_alerts) for event_alerts in alerts],
+                         [int(score > 0.5) for score, _ in detections])
+        self.assertEqual(self.abiss.detect_threats_batch([]), [])
+    
     def test_threat_correlation(self):
         """Testa correlação de ameaças"""
         # Simular múltiplas ameaças relacionadas
@@ -367,6 +535,101 @@ class TestABISSSystem(unittest.TestCase):
         self.assertIn("threat_chain", correlation)
         self.assertIn("overall_severity", correlation)
     
+    def test_threat_correlation_cache(self):
+        """Testa reutilização do resultado para a mesma janela de ameaças"""
+        self.abiss._correlation_cache_size = 1
+        threats = [
+            {"source_ip": "10.0.0.1", "type": "port_scan", "timestamp": 1.0, "severity": 0.4},
+            {"source_ip": "10.0.0.1", "type": "brute_force", "timestamp": 2.0, "severity": 0.6},
+        ]
+        
+        with patch.object(self.abiss, "_correlate_threats_uncached",
+                          wraps=self.abiss._correlate_threats_uncached) as mock_correlate:
+            first = self.abiss.correlate_threats(threats)
+            first["campaigns"].clear()
+            second = self.abiss.correlate_threats([dict(t) for t in threats])
+            self.abiss.correlate_threats(threats[::-1])
+            self.abiss.correlate_threats(threats)
+        
+        # Resultado em cache não é afetado por mutações do chamador; a ordem faz parte da chave
+        self.assertEqual(mock_correlate.call_count, 3)
+        self.assertEqual(second["campaigns"][0]["threat_count"], 2)
+        self.assertEqual(len(self.abiss._correlation_cache), 1)
+        
+        # Chave é a serialização completa da janela, não um digest sujeito a colisão
+        key, = self.abiss._correlation_cache
+        self.assertEqual(key, abiss_system._correlation_key(threats))
+        self.assertIn("brute_force", key)
+    
+    def test_threat_correlation_cache_key_is_exact(self):
+        """Testa que inf, nan, None e inteiros grandes geram chaves distintas e não quebram o cache"""
+        def window(severity, timestamp=1.0):
+            return [
+                {"source_ip": "10.0.0.1", "type": "port_scan", "timestamp": timestamp, "severity": severity},
+                {"source_ip": "10.0.0.1", "type": "brute_force", "timestamp": 2.0, "severity": 0.5},
+            ]
+        
+        keys = {abiss_system._correlation_key(window(s)) for s in (float("inf"), float("-inf"), float("nan"), None)}
+        self.assertEqual(len(keys), 4)
+        
+        self.assertEqual(self.abiss.correlate_threats(window(float("inf")))["overall_severity"], float("inf"))
+        self.assertTrue(np.isnan(self.abiss.correlate_threats(window(None))["overall_severity"]))
+        
+        big = self.abiss.correlate_threats(window(0.7, timestamp=1 << 70))
+        self.assertEqual(big, self.abiss._correlate_threats_uncached(window(0.7, timestamp=1 << 70)))
+    
+    def test_threat_correlation_groups_by_source(self):
+        """Testa agregados por IP de origem na correlação vetorizada"""
+        threats = [
+            {"type": "port_scan", "source_ip": "10.0.0.9", "timestamp": 300.0, "severity": 0.4},
+            {"type": "phishing", "source_ip": "10.0.0.1", "timestamp": 100.0, "severity": 0.5},
+            {"type": "brute_force", "source_ip": "10.0.0.9", "timestamp": 50.0, "severity": 0.7},
+            {"type": "ddos_attack", "source_ip": "10.0.0.2", "timestamp": 10.0, "severity": 0.95},
+            {"type": "data_exfiltration", "source_ip": "10.0.0.9", "timestamp": 200.0, "severity": 0.6},
+            {"type": "malware_infection", "source_ip": "10.0.0.1", "timestamp": 160.0, "severity": 0.3},
+        ]
+        
+        correlation = self.abiss.correlate_threats(threats)
+        
+        self.assertTrue(correlation["campaign_detected"])
+        self.assertEqual(correlation["overall_severity"], 0.95)
+        self.assertEqual(correlation["campaigns"], [
+            {"source_ip": "10.0.0.9", "threat_count": 3, "time_span": 250.0,
+             "threat_types": ["port_scan", "brute_force", "data_exfiltration"], "max_severity": 0.7},
+            {"source_ip": "10.0.0.1", "threat_count": 2, "time_span": 60.0,
+             "threat_types": ["phishing", "malware_infection"], "max_severity": 0.5},
+        ])
+        self.assertEqual(correlation["threat_chain"], ["port_scan", "brute_force", "data_exfiltration"])
+    
+    def test_threat_batch_packs_source_ips(self):
+        """Testa chaves inteiras de IP: IPv4 empacotado, demais origens com IDs próprios"""
+        batch = abiss_system.ThreatBatch.from_threats([
+            {"source_ip": "192.168.1.100"},
+            {"source_ip": "2001:db8::1"},
+            {},
+            {"source_ip": "192.168.1.100"},
+            {"source_ip": "2001:db8::1"},
+        ])
+        
+        self.assertEqual(batch.ip_keys.dtype, np.uint64)
+        self.assertEqual(int(batch.ip_keys[0]), (192 << 24) | (168 << 16) | (1 << 8) | 100)
+        self.assertEqual(batch.ip_keys[0], batch.ip_keys[3])
+        self.assertEqual(batch.ip_keys[1], batch.ip_keys[4])
+        self.assertGreaterEqual(int(batch.ip_keys[1]), abiss_system.NON_IPV4_KEY_BASE)
+        self.assertEqual(len(set(batch.ip_keys.tolist())), 3)
+    
+    def test_threat_chain_memoized_by_type_set(self):
+        """Testa identificação de cadeias memoizada pelo conjunto de tipos"""
+        abiss_system._match_threat_chain.cache_clear()
+        threats = [{"type": t} for t in ("data_exfiltration", "ddos_attack", "data_exfiltration")]
+        
+        self.assertEqual(self.abiss._identify_threat_chain(threats), ["ddos_attack", "data_exfiltration"])
+        self.assertEqual(self.abiss._identify_threat_chain(threats[::-1]), ["ddos_attack", "data_exfiltration"])
+        self.assertEqual(abiss_system._match_threat_chain.cache_info().hits, 1)
+        
+        # Sem cadeia conhecida, retorna os tipos na ordem observada
+        self.assertEqual(self.abiss._identify_threat_chain([{"type": "phishing"}, {}]), ["phishing", "unknown"])
+    
     def test_adaptive_threshold_adjustment(self):
         """Testa ajuste adaptativo de thresholds"""
         # Simular mudança no ambiente
@@ -387,6 +650,292 @@ class TestABISSSystem(unittest.TestCase):
         self.assertGreaterEqual(new_threshold, 0.0)
         self.assertLessEqual(new_threshold, 1.0)
 
+    def test_threshold_adjustment_deltas(self):
+        """Testa deltas combinados da paisagem e dos falsos positivos, limitados a [0.5, 0.9]"""
+        cases = [
+            (0.7, {"threat_landscape": "high", "false_positive_rate": 0.2}, 0.65),
+            (0.7, {"threat_landscape": "low", "false_positive_rate": 0.01}, 0.75),
+            (0.7, {"threat_landscape": "medium", "false_positive_rate": 0.1}, 0.7),
+            (0.85, {"threat_landscape": "low", "false_positive_rate": 0.2}, 0.9),
+            (0.55, {"threat_landscape": "high", "false_positive_rate": 0.01}, 0.5),
+        ]
+        for initial, factors, expected in cases:
+            with self.subTest(factors=factors, initial=initial):
+                self.abiss.config["threat_threshold"] = initial
+                self.abiss.adjust_thresholds(factors)
+                self.assertAlmostEqual(self.abiss.config["threat_threshold"], expected)
+    
+    def test_ai_analysis_uses_generate_with_fixed_prompt(self):
+        """Testa inferência via model.generate com prompt de tamanho fixo"""
+        input_ids = MagicMock()
+        input_ids.shape = (1, abiss_system.PROMPT_MAX_TOKENS)
+        encoded = MagicMock()
+        encoded.to.return_value = {"input_ids": input_ids}
+        
+        self.abiss.tokenizer = MagicMock(return_value=encoded)
+        self.abiss.tokenizer.batch_decode.return_value = ["THREAT_SCORE: 0.9\nTHREAT_TYPE: ddos_attack"]
+        self.abiss.model = MagicMock()
+        
+        with patch.object(abiss_system, "torch", create=True):
+            score, threat_type = self.abiss._analyze_with_ai({"packet_count": 10})
+        
+        self.assertEqual((score, threat_type), (0.9, "ddos_attack"))
+        tokenizer_kwargs = self.abiss.tokenizer.call_args[1]
+        self.assertEqual(tokenizer_kwargs["padding"], "max_length")
+        self.assertEqual(tokenizer_kwargs["max_length"], abiss_system.PROMPT_MAX_TOKENS)
+        self.abiss.model.generate.assert_called_once()
+        self.assertEqual(self.abiss.model.generate.call_args[1]["max_new_tokens"],
+                         abiss_system.MAX_NEW_TOKENS)
+    
+    def test_time_to_minutes_cached(self):
+        """Testa conversão memoizada de horários, com padrão para valores inválidos"""
+        abiss_system._parse_minutes.cache_clear()
+        
+        self.assertEqual(self.abiss._time_to_minutes("13:45"), 825)
+        self.assertEqual(self.abiss._time_to_minutes("13:45"), 825)
+        self.assertEqual(abiss_system._parse_minutes.cache_info().hits, 1)
+        for invalid in ("invalido", None, ["09", "00"]):
+            self.assertEqual(self.abiss._time_to_minutes(invalid), abiss_system.DEFAULT_MINUTES)
+    
+    def test_parse_ai_response(self):
+        """Testa extração de score e tipo da resposta do modelo"""
+        parse = self.abiss._parse_ai_response
+        
+        self.assertEqual(parse("THREAT_TYPE: ddos_attack\nCONFIDENCE: 0.8\nTHREAT_SCORE: 0.75\n"),
+                         (0.75, "ddos_attack"))
+        self.assertEqual(parse("Análise concluída.\nTHREAT_SCORE:0.2"), (0.2, "unknown"))
+        self.assertEqual(parse("sem campos"), (0.0, "unknown"))
+        self.assertEqual(parse("THREAT_SCORE: alto"), (0.0, "parse_error"))
+        
+        # Tipos extraídos são internados (mesmo objeto para o mesmo texto)
+        first = parse("THREAT_TYPE: " + "lateral" + "_movement")[1]
+        second = parse("THREAT_TYPE: lateral_" + "movement")[1]
+        self.assertIs(first, second)
+    
+    def test_simulated_scores_from_buffer(self):
+        """Testa scores do modo simulação lidos do buffer e regenerados ao esgotar"""
+        first_buffer = self.abiss._rng_buf
+        scores = [self.abiss._analyze_with_ai({})[0] for _ in range(3)]
+        
+        self.assertEqual(scores, first_buffer[:3].tolist())
+        self.assertTrue(all(isinstance(score, float) for score in scores))
+        
+        self.abiss._rng_i = abiss_system.SIMULATION_BUFFER_SIZE
+        score = self.abiss._simulated_score()
+        self.assertIsNot(self.abiss._rng_buf, first_buffer)
+        self.assertEqual(score, self.abiss._rng_buf[0])
+    
+    def test_generate_reuses_prompt_prefix_cache(self):
+        """Testa que só a parte variável do prompt é tokenizada quando o prefixo está em cache"""
+        prefix_cache = MagicMock(spec=["key_cache", "value_cache"])
+        prefix_cache.key_cache, prefix_cache.value_cache = [MagicMock()], [MagicMock()]
+        prefix_kv = [(MagicMock(), MagicMock())]
+        self.abiss._prefix_cache = prefix_cache
+        self.abiss._prefix_kv = prefix_kv
+        self.abiss._prefix_ids = MagicMock(shape=(1, 40))
+        self.abiss.tokenizer = MagicMock()
+        self.abiss.tokenizer.batch_decode.return_value = ["a", "b"]
+        self.abiss.model = MagicMock()
+        prompts = [self.abiss._build_security_prompt({"packet_count": n}) for n in (10, 20)]
+        
+        with patch.object(abiss_system, "torch", create=True):
+            results = self.abiss._generate_batch(prompts)
+        
+        self.assertEqual(results, ["a", "b"])
+        tails, = self.abiss.tokenizer.call_args[0]
+        self.assertTrue(tails[0].startswith("- Pacotes: 10"))
+        tokenizer_kwargs = self.abiss.tokenizer.call_args[1]
+        self.assertEqual(tokenizer_kwargs["max_length"], abiss_system.PROMPT_MAX_TOKENS - 40)
+        self.assertFalse(tokenizer_kwargs["add_special_tokens"])
+        
+        # Lote completado até o tamanho fixo
+        self.assertEqual(len(tails), abiss_system.AI_BATCH_SIZE)
+        self.assertEqual(tails[2:], [tails[1]] * (abiss_system.AI_BATCH_SIZE - 2))
+        
+        # Mesmo cache de trabalho a cada lote, com o prefixo restaurado in-place
+        generate_kwargs = self.abiss.model.generate.call_args[1]
+        self.assertIs(generate_kwargs["past_key_values"], prefix_cache)
+        prefix_cache.key_cache[0].copy_.assert_called_once_with(prefix_kv[0][0])
+        prefix_cache.value_cache[0].copy_.assert_called_once_with(prefix_kv[0][1])
+        self.assertIsNone(generate_kwargs["cache_implementation"])
+    
+    def test_prompt_prefix_uses_static_cache(self):
+        """Testa que o prefixo é pré-calculado em um StaticCache do tamanho da geração"""
+        self.abiss.tokenizer = MagicMock()
+        self.abiss.model = MagicMock()
+        
+        with patch.object(abiss_system, "torch", create=True), \
+                patch.object(abiss_system, "StaticCache") as mock_static_cache:
+            self.abiss._cache_prompt_prefix()
+        
+        cache_kwargs = mock_static_cache.call_args[1]
+        self.assertEqual(cache_kwargs["max_batch_size"], abiss_system.AI_BATCH_SIZE)
+        self.assertEqual(cache_kwargs["max_cache_len"],
+                         abiss_system.PROMPT_MAX_TOKENS + abiss_system.MAX_NEW_TOKENS)
+        self.assertIs(self.abiss.model.call_args[1]["past_key_values"], mock_static_cache.return_value)
+        self.assertIs(self.abiss._prefix_cache, self.abiss.model.return_value.past_key_values)
+        self.assertIsNotNone(self.abiss._prefix_kv)
+        
+        # Sem StaticCache o caminho com prefixo fica desativado
+        with patch.object(abiss_system, "torch", create=True), \
+                patch.object(abiss_system, "StaticCache", None):
+            self.abiss._cache_prompt_prefix()
+        self.assertIsNone(self.abiss._prefix_cache)
+    
+    def test_model_warmup_runs_security_batch(self):
+        """Testa lote de aquecimento com o prompt de segurança, tolerando falhas"""
+        with patch.object(self.abiss, "_generate_batch", return_value=[""]) as mock_batch:
+            self.abiss._warmup_model()
+        prompts, = mock_batch.call_args[0]
+        self.assertEqual(len(prompts), 1)
+        self.assertTrue(prompts[0].startswith(abiss_system.SECURITY_PROMPT_PREFIX))
+        
+        with patch.object(self.abiss, "_generate_batch", side_effect=RuntimeError("compile")):
+            self.abiss._warmup_model()
+    
+    def test_ai_requests_are_micro_batched(self):
+        """Testa agregação de prompts pendentes em uma única chamada de geração"""
+        with patch.object(self.abiss, "_generate_batch",
+                          side_effect=lambda prompts: [p.upper() for p in prompts]) as mock_batch:
+            # Prompts já enfileirados entram no mesmo lote do próximo envio
+            futures = []
+            for prompt in ["a", "b", "c"]:
+                future = abiss_system.Future()
+                self.abiss._pending.put((prompt, future))
+                futures.append(future)
+            futures.append(self.abiss._submit("d"))
+            
+            results = [future.result(timeout=2.0) for future in futures]
+        
+        self.assertEqual(results, ["A", "B", "C", "D"])
+        mock_batch.assert_called_once_with(["a", "b", "c", "d"])
+        
+        # Inferência direta também passa pelo worker, nunca pela thread do chamador
+        self.abiss.model = MagicMock()
+        caller = threading.current_thread()
+        with patch.object(self.abiss, "_generate_batch",
+                          side_effect=lambda prompts: [threading.current_thread() is caller]) as mock_batch:
+            result = self.abiss.run_model_inference("texto")
+        self.assertIs(result["analysis"], False)
+        mock_batch.assert_called_once_with(["texto"])
+        
+        # Falhas de inferência chegam a todas as requisições do lote
+        with patch.object(self.abiss, "_generate_batch", side_effect=RuntimeError("oom")):
+            with self.assertRaises(RuntimeError):
+                self.abiss._submit("e").result(timeout=2.0)
+
+    
+    def test_fused_attention_fallback(self):
+        """Testa BetterTransformer apenas quando o modelo não usa atenção SDPA"""
+        model = MagicMock()
+        model.config._attn_implementation = "sdpa"
+        self.abiss.model = model
+        self.abiss._enable_fused_attention()
+        model.to_bettertransformer.assert_not_called()
+        
+        model.config._attn_implementation = "eager"
+        self.abiss._enable_fused_attention()
+        self.assertIs(self.abiss.model, model.to_bettertransformer.return_value)
+        
+        # Modelos não suportados mantêm a atenção original
+        unsupported = MagicMock()
+        unsupported.config._attn_implementation = "eager"
+        unsupported.to_bettertransformer.side_effect = ValueError("não suportado")
+        self.abiss.model = unsupported
+        self.abiss._enable_fused_attention()
+        self.assertIs(self.abiss.model, unsupported)
+    
+    def test_weight_quantization_modes(self):
+        """Testa seleção do modo de quantização dos pesos"""
+        with self.assertRaises(ValueError):
+            ABISSSystem({**self.config, "quantization": "fp8"})
+        
+        abiss = ABISSSystem({**self.config, "quantization": "int4"})
+        abiss.model = MagicMock()
+        with patch.object(abiss_system, "quantize_") as mock_quantize, \
+                patch.object(abiss_system, "int4_weight_only", create=True) as mock_int4:
+            abiss._quantize_model()
+        
+        mock_int4.assert_called_once_with(group_size=abiss_system.INT4_GROUP_SIZE)
+        mock_quantize.assert_called_once_with(abiss.model, mock_int4.return_value)
+        self.assertEqual(abiss.get_model_info()["quantization"], "int4")
+
+    
+    def test_ipex_optimization_on_cpu(self):
+        """Testa otimização IPEX apenas em CPU e sem quantização TorchAO"""
+        abiss = ABISSSystem({**self.config, "quantization": "none"})
+        model = MagicMock()
+        abiss.model = model
+        
+        with patch.object(abiss_system, "ipex") as mock_ipex, \
+                patch.object(abiss_system, "torch", create=True) as mock_torch:
+            mock_torch.cuda.is_available.return_value = False
+            abiss._optimize_for_cpu()
+            mock_ipex.optimize.assert_called_once_with(model.eval(), dtype=mock_torch.bfloat16)
+            self.assertIs(abiss.model, mock_ipex.optimize.return_value)
+            
+            # Pesos quantizados com TorchAO não passam pelo IPEX
+            abiss.quantization = "int8"
+            abiss._optimize_for_cpu()
+            mock_ipex.optimize.assert_called_once()
+
+    def test_pattern_scores_match_threat_pattern(self):
+        """Testa que o kernel SoA reproduz ThreatPattern.match para todos os padrões"""
+        abiss = ABISSSystem(self.config)
+        abiss.learn_threat_pattern({
+            "pattern_type": "exfiltration",
+            "indicators": ["large_upload", "dns_tunnel", "port_53"],
+            "severity": 0.9,
+            "frequency": 0.1
+        })
+        data = {"large_upload": True, "protocol": "dns_tunnel_v2", "port": 443}
+        
+        scores, severities, types = abiss._score_patterns(data)
+        
+        patterns = list(abiss.threat_patterns.values())
+        expected = [pattern.match(data) for pattern in patterns]
+        np.testing.assert_allclose(scores, expected)
+        self.assertEqual(types, [pattern.pattern_type for pattern in patterns])
+        self.assertAlmostEqual(max(scores), 2 / 3)
+
+
+    def test_best_pattern_match_kernel(self):
+        """Testa seleção do padrão de maior score ponderado acima do threshold"""
+        present = np.array([True, True, False, True])
+        offsets = np.array([0, 2, 4, 4, 6], dtype=np.int32)
+        indicator_ids = np.array([0, 1, 2, 3, 0, 3], dtype=np.int32)
+        severities = np.array([0.6, 0.9, 1.0, 0.7])
+        
+        score, idx = abiss_system._best_pattern_match(present, offsets, indicator_ids, severities, 0.5)
+        self.assertEqual((idx, score), (3, 0.7))
+        
+        # Exatamente no threshold não conta como correspondência
+        score, idx = abiss_system._best_pattern_match(present, offsets[:3], indicator_ids, severities, 0.5)
+        self.assertEqual((idx, score), (0, 0.6))
+        score, idx = abiss_system._best_pattern_match(present, offsets, indicator_ids, severities, 1.0)
+        self.assertEqual((idx, score), (-1, -1.0))
+    
+    def test_pattern_scores_with_hyperscan_scan(self):
+        """Testa presença de indicadores via varredura multi-padrão do Hyperscan"""
+        def fake_scan(data, match_event_handler):
+            for indicator, idx in abiss._pattern_index[0].items():
+                if indicator.encode() in data:
+                    match_event_handler(idx, 0, 0, 0, None)
+        
+        fake_hyperscan = MagicMock()
+        fake_hyperscan.Database.return_value.scan.side_effect = fake_scan
+        abiss = ABISSSystem(self.config)
+        data = {"multiple_failed_logins": 5, "note": "syn_flood from multiple_sources"}
+        
+        with patch.object(abiss_system, "hyperscan", fake_hyperscan):
+            scores, _, _ = abiss._score_patterns(data)
+        
+        compile_kwargs = fake_hyperscan.Database.return_value.compile.call_args[1]
+        self.assertEqual(compile_kwargs["ids"], list(abiss._pattern_index[0].values()))
+        fake_hyperscan.Database.return_value.scan.assert_called_once()
+        expected = [pattern.match(data) for pattern in abiss.threat_patterns.values()]
+        np.testing.assert_allclose(scores, expected)
+
 
 class TestThreatPattern(unittest.TestCase):
     """Testa a classe ThreatPattern"""
@@ -430,6 +979,20 @@ class TestThreatPattern(unittest.TestCase):
         self.assertIsInstance(match_score, float)
         self.assertGreaterEqual(match_score, 0.0)
         self.assertLessEqual(match_score, 1.0)
+    
+    def test_pattern_matching_substring_and_duplicates(self):
+        """Testa correspondência por chave/substring e indicadores repetidos"""
+        pattern = ThreatPattern(
+            pattern_type="ddos_attack",
+            indicators=["syn_flood", "multiple_sources", "syn_flood"],
+            severity=0.9,
+            frequency=0.1
+        )
+        network_data = {"syn_flood": True, "note": "traffic from multiple_sources"}
+        
+        self.assertEqual(pattern.match(network_data), 1.0)
+        self.assertEqual(pattern.match({"note": "syn_flood"}), 0.5)
+        self.assertEqual(pattern.match({"note": "other"}, values_text="multiple_sources"), 0.5)
 
 
 class TestAdaptiveResponse(unittest.TestCase):
@@ -0,0 +1,289 @@
+"""
+Test LLM Integration - TDD Implementation
+Testa o pipeline cognitivo de transferência de contexto LLM-SLM
+"""
+import unittest
+from unittest.mock import patch, MagicMock
+import json
+
+import numpy as np
+
+from atous_sec_network.ml import llm_integration
+from atous_sec_network.ml.llm_integration import (
+    CognitivePipeline, decode_payload, quantize_embeddings, dequantize_embeddings,
+    decode_embedding_correlation
+)
+
+
+class TestCognitivePipeline(unittest.TestCase):
+    """Testa o pipeline cognitivo em modo simulação"""
+
+    def setUp(self):
+        """Configuração inicial para cada teste"""
+        self.config = {
+            "slm_model": "distilbert-base-uncased",
+            "llm_endpoint": "http://localhost:8000/llm",
+            "hardware_class": "low"
+        }
+        # Evitar download de modelos durante os testes
+        with patch.object(CognitivePipeline, "_initialize_models"):
+            self.pipeline = CognitivePipeline(self.config)
+
+    def test_process_data_batch_preserves_order(self):
+        """Testa que o lote retorna um payload por texto, na ordem original"""
+        texts = ["texto bem mais longo que os outros", "curto", "médio tamanho"]
+
+        payloads = self.pipeline.process_data_batch(texts)
+
+        self.assertEqual(len(payloads), len(texts))
+        for text, payload in zip(texts, payloads):
+            data = json.loads(payload)
+            self.assertEqual(data["metadata"]["data_length"], len(text))
+            self.assertEqual(len(dequantize_embeddings(data)), 768)
+            self.assertGreaterEqual(data["confidence"], 0.0)
+            self.assertLessEqual(data["confidence"], 1.0)
+
+    def test_process_data_batch_unsorts_embeddings(self):
+        """Testa que os embeddings voltam à ordem original após a ordenação por tamanho"""
+        texts = ["ccc", "a", "bb"]
+        self.pipeline.slm = object()
+        self.pipeline.tokenizer = object()
+
+        def fake_embed(chunk):
+            return np.array([[float(len(text))] * 4 for text in chunk])
+
+        with patch.object(self.pipeline, "_embed_chunk", side_effect=fake_embed):
+            embeddings = self.pipeline._generate_embeddings_batch(texts)
+
+        np.testing.assert_array_equal(embeddings[:, 0], [3.0, 1.0, 2.0])
+
+    def test_onnx_is_opt_in(self):
+        """Testa que a exportação ONNX só é usada quando habilitada"""
+        with patch.object(llm_integration, "ort", MagicMock()):
+            self.assertFalse(self.pipeline._use_onnx())
+            self.pipeline.config["use_onnx"] = True
+            self.assertTrue(self.pipeline._use_onnx())
+
+    def test_onnx_cache_dir_is_private(self):
+        """Testa criação do cache ONNX com permissão 0700 e rejeição de diretório compartilhado"""
+        import os
+        import stat
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.pipeline.onnx_cache_dir = os.path.join(temp_dir, "onnx")
+            self.pipeline._ensure_private_cache_dir()
+            self.assertEqual(stat.S_IMODE(os.stat(self.pipeline.onnx_cache_dir).st_mode), 0o700)
+
+            os.chmod(self.pipeline.onnx_cache_dir, 0o777)
+            with self.assertRaises(PermissionError):
+                self.pipeline._ensure_private_cache_dir()
+
+            self.pipeline.onnx_cache_dir = os.path.join(temp_dir, "link")
+            os.symlink(temp_dir, self.pipeline.onnx_cache_dir)
+            with self.assertRaises(PermissionError):
+                self.pipeline._ensure_private_cache_dir()
+
+    def test_process_data_batch_fallback_matches_model_dim(self):
+        """Testa que sub-lotes com falha usam a dimensão do modelo no fallback"""
+        self.pipeline.slm = MagicMock()
+        self.pipeline.slm.config.hidden_size = 4
+        self.pipeline.tokenizer = object()
+
+        def fake_embed(chunk):
+            if chunk == ["bb"]:
+                raise RuntimeError("falha transitória")
+            return np.ones((len(chunk), 4), dtype=np.float32)
+
+        with patch.object(llm_integration, "EMBEDDING_BATCH_SIZE", 1), \
+                patch.object(self.pipeline, "_embed_chunk", side_effect=fake_embed):
+            embeddings = self.pipeline._generate_embeddings_batch(["a", "bb", "ccc"])
+
+        np.testing.assert_array_equal(embeddings[:, 0], [1.0, 0.0, 1.0])
+        self.assertEqual(embeddings.shape, (3, 4))
+
+    def test_process_data_batch_empty(self):
+        """Testa lote vazio"""
+        self.assertEqual(self.pipeline.process_data_batch([]), [])
+
+    def test_aggregate_contexts_moments(self):
+        """Testa média e variância agregadas dos embeddings"""
+        embeddings = np.random.rand(5, 16)
+        contexts = [{"embeddings": row.tolist(), "confidence": 0.5} for row in embeddings]
+
+        aggregated = self.pipeline.aggregate_contexts(contexts)
+
+        np.testing.assert_allclose(aggregated["avg_embedding"], embeddings.mean(axis=0), rtol=1e-4)
+        np.testing.assert_allclose(aggregated["embedding_variance"], embeddings.var(axis=0),
+                                   rtol=1e-3, atol=1e-6)
+        self.assertNotIn("embedding_correlation", aggregated)
+
+    def test_aggregate_contexts_correlation_flag(self):
+        """Testa correlação de embeddings habilitada via configuração"""
+        self.pipeline.config["compute_embedding_correlation"] = True
+        embeddings = np.random.rand(6, 8)
+        contexts = [{"embeddings": row.tolist()} for row in embeddings]
+
+        aggregated = self.pipeline.aggregate_contexts(contexts)
+
+        correlation = decode_embedding_correlation(aggregated)
+        self.assertEqual(correlation.shape, (8, 8))
+        np.testing.assert_allclose(correlation, np.corrcoef(embeddings.T), atol=2e-3)
+
+    def test_decode_json_payload(self):
+        """Testa decodificação do payload JSON padrão"""
+        payload = self.pipeline.process_data("dados de teste")
+
+        self.assertIsInstance(payload, str)
+        self.assertEqual(decode_payload(payload)["context_summary"], "dados de teste")
+
+    @unittest.skipIf(llm_integration.msgpack is None, "msgpack não disponível")
+    def test_msgpack_payload_roundtrip(self):
+        """Testa payload MessagePack comprimido com gzip"""
+        self.pipeline.wire_format = "msgpack"
+        self.pipeline.quantize_embeddings = False
+
+        payload = self.pipeline.process_data("dados de teste")
+
+        self.assertIsInstance(payload, bytes)
+        self.assertTrue(payload.startswith(llm_integration.GZIP_MAGIC))
+        decoded = decode_payload(payload)
+        self.assertEqual(decoded["context_summary"], "dados de teste")
+        self.assertEqual(len(decoded["embeddings"]), 768)
+
+        # Embeddings int8 seguem como bytes brutos no MessagePack
+        self.pipeline.quantize_embeddings = True
+        decoded = decode_payload(self.pipeline.process_data("dados de teste"))
+        self.assertIsInstance(decoded["emb_q"], bytes)
+        self.assertEqual(len(dequantize_embeddings(decoded)), 768)
+
+    def test_invalid_wire_format(self):
+        """Testa rejeição de formato de payload desconhecido"""
+        with patch.object(CognitivePipeline, "_initialize_models"):
+            with self.assertRaises(ValueError):
+                CognitivePipeline({**self.config, "wire_format": "xml"})
+
+    def test_embedding_quantization_roundtrip(self):
+        """Testa quantização int8 simétrica dos embeddings"""
+        embeddings = np.random.randn(768).astype(np.float32)
+
+        restored = dequantize_embeddings(quantize_embeddings(embeddings))
+
+        cosine = np.dot(embeddings, restored) / (np.linalg.norm(embeddings) * np.linalg.norm(restored))
+        self.assertGreater(cosine, 0.99)
+
+    def test_aggregate_contexts_quantized_payloads(self):
+        """Testa agregação de payloads com embeddings quantizados"""
+        payloads = [decode_payload(self.pipeline.process_data(f"texto {i}")) for i in range(3)]
+
+        aggregated = self.pipeline.aggregate_contexts(payloads)
+
+        self.assertEqual(aggregated["total_embeddings"], 3)
+        self.assertEqual(len(aggregated["avg_embedding"]), 768)
+
+    def test_process_data_cache_hit(self):
+        """Testa que textos repetidos não executam o SLM novamente"""
+        with patch.object(self.pipeline, "_generate_embeddings",
+                          return_value=np.random.rand(768)) as mock_embed:
+            first = decode_payload(self.pipeline.process_data("heartbeat ok"))
+            second = decode_payload(self.pipeline.process_data("heartbeat ok"))
+
+        mock_embed.assert_called_once()
+        self.assertEqual(first["emb_q"], second["emb_q"])
+        self.assertEqual(len(self.pipeline.context_cache), 1)
+
+    def test_process_data_does_not_cache_fallback(self):
+        """Testa que o embedding de fallback de uma falha do SLM não fica em cache"""
+        self.pipeline.slm = MagicMock()
+        with patch.object(self.pipeline, "_generate_embeddings",
+                          return_value=self.pipeline._sim_embedding) as mock_embed:
+            self.pipeline.process_data("texto")
+            self.pipeline.process_data("texto")
+
+        self.assertEqual(mock_embed.call_count, 2)
+        self.assertEqual(len(self.pipeline.context_cache), 0)
+
+    def test_process_data_cache_eviction(self):
+        """Testa remoção LRU ao atingir max_cache_size"""
+        self.pipeline.max_cache_size = 2
+
+        for text in ["a", "b", "a", "c"]:
+            self.pipeline.process_data(text)
+
+        self.assertEqual(len(self.pipeline.context_cache), 2)
+        with patch.object(self.pipeline, "_generate_embeddings",
+                          return_value=np.random.rand(768)) as mock_embed:
+            self.pipeline.process_data("a")
+            self.pipeline.process_data("b")
+        self.assertEqual(mock_embed.call_count, 1)
+
+    def test_build_prompt_omits_embeddings(self):
+        """Testa que o prompt não inclui vetores de embeddings"""
+        payloads = [decode_payload(self.pipeline.process_data(f"evento {i}")) for i in range(2)]
+        aggregated = self.pipeline.aggregate_contexts(payloads)
+
+        prompt = self.pipeline._build_prompt(aggregated)
+
+        self.assertIn("2 dispositivos", prompt)
+        self.assertIn("evento 1", prompt)
+        self.assertNotIn("emb_q", prompt)
+        self.assertNotIn("avg_embedding", prompt)
+
+    def test_get_llm_analysis_reuses_session(self):
+        """Testa que consultas ao LLM reutilizam a mesma sessão HTTP"""
+        response = MagicMock()
+        response.status_code = 200
+        response.content = json.dumps({"analysis": "ok", "confidence": 0.9}).encode()
+        response.json.return_value = {"analysis": "ok", "confidence": 0.9}
+
+        with patch.object(self.pipeline._http, "post", return_value=response) as mock_post:
+            first = self.pipeline.get_llm_analysis({"devices": [{"confidence": 0.5}]})
+            second = self.pipeline.get_llm_analysis({"devices": [{"confidence": 0.5}]})
+
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertEqual(first["analysis"], "ok")
+        self.assertEqual(second["confidence"], 0.9)
+
+    def test_process_data_tokenizes_once(self):
+        """Testa que embeddings e resumo compartilham a mesma tokenização"""
+        tokenizer = MagicMock()
+        tokenizer.return_value = {"input_ids": np.array([[101] + list(range(1000, 1150)) + [102]])}
+        tokenizer.get_special_tokens_mask.side_effect = (
+            lambda ids, already_has_special_tokens: [1] + [0] * (len(ids) - 2) + [1]
+        )
+        tokenizer.decode.return_value = "resumo"
+        self.pipeline.tokenizer = tokenizer
+
+        payload = decode_payload(self.pipeline.process_data("texto longo"))
+
+        tokenizer.assert_called_once()
+        tokenizer.tokenize.assert_not_called()
+        decoded_ids = tokenizer.decode.call_args[0][0]
+        self.assertEqual(decoded_ids[:50], list(range(1000, 1050)))
+        self.assertEqual(decoded_ids[-50:], list(range(1100, 1150)))
+        self.assertEqual(payload["context_summary"], "resumo")
+
+    def test_summary_tokenizes_full_text_when_truncated(self):
+        """Testa que o resumo de textos truncados usa o fim real do texto"""
+        tokenizer = MagicMock()
+        tokenizer.tokenize.return_value = [f"t{i}" for i in range(1000)]
+        tokenizer.convert_tokens_to_string.side_effect = " ".join
+        self.pipeline.tokenizer = tokenizer
+        encoding = {"input_ids": np.zeros((1, llm_integration.ENCODE_MAX_LENGTH), dtype=np.int64)}
+
+        summary = self.pipeline._summarize_context("texto longo", encoding)
+
+        tokenizer.decode.assert_not_called()
+        self.assertTrue(summary.endswith("t999"))
+
+    def test_simulation_embedding_is_shared(self):
+        """Testa que o modo simulação reutiliza o mesmo vetor sem alocar"""
+        first = self.pipeline._generate_embeddings("a")
+        second = self.pipeline._generate_embeddings("b")
+
+        self.assertIs(first, second)
+        self.assertFalse(first.flags.writeable)
+
+
+if __name__ == "__main__":
+    unittest.main()
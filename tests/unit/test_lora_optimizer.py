@@ -5,6 +5,7 @@ Testa o sistema de adaptação dinâmica de parâmetros LoRa
 import unittest
 from unittest.mock import Mock, patch, MagicMock
 import time
+import math
 from typing import Dict, List
 
 from atous_sec_network.network.lora_optimizer import LoraAdaptiveEngine
@@ -150,6 +151,48 @@ class TestLoraOptimizer(unittest.TestCase):
         self.assertIn("performance", summary)
         self.assertIn("region_limits", summary)
     
+    def test_performance_summary_running_averages(self):
+        """Testa médias acumuladas após a janela deslizante descartar valores antigos"""
+        engine = LoraAdaptiveEngine(self.base_config, history_size=3)
+        for rssi, snr in [(-120, -20), (-90, -5), (-100, -10), (-80, 0)]:
+            engine.log_metrics(rssi, snr, 0.0)
+        
+        metrics = engine.get_performance_summary()["metrics"]
+        
+        self.assertAlmostEqual(metrics["avg_rssi"], -90.0)
+        self.assertAlmostEqual(metrics["avg_snr"], -5.0)
+        self.assertAlmostEqual(metrics["std_rssi"], math.sqrt(200 / 3))
+    
+    def test_history_ring_buffer_order(self):
+        """Testa ordem cronológica do histórico após o ring buffer dar a volta"""
+        engine = LoraAdaptiveEngine(self.base_config, history_size=3)
+        for rssi in [-100, -101, -102, -103, -104]:
+            engine.log_metrics(rssi, -5, 0.0)
+        
+        history = engine.history_array()
+        
+        self.assertEqual(history.shape, (3, 4))
+        self.assertEqual(history[:, 0].tolist(), [-102, -103, -104])
+        self.assertEqual([m.rssi for m in engine.metrics_history], [-102, -103, -104])
+    
+    def test_log_metrics_batch_matches_sequential(self):
+        """Testa que o registro em lote equivale a chamadas individuais"""
+        sequential = LoraAdaptiveEngine(self.base_config, history_size=4)
+        batched = LoraAdaptiveEngine(self.base_config, history_size=4)
+        rssi = [-100, -95, -110, -90, -105, -98]
+        snr = [-5, -8, -12, 0, -3, -7]
+        lost = [0.1, 0.0, 0.3, 0.05, 0.2, 0.0]
+        
+        for values in zip(rssi, snr, lost):
+            sequential.log_metrics(*values)
+        batched.log_metrics_batch(rssi, snr, lost)
+        
+        self.assertAlmostEqual(batched.metrics["packet_loss"], sequential.metrics["packet_loss"])
+        self.assertEqual(batched.history_array()[:, :3].tolist(),
+                         sequential.history_array()[:, :3].tolist())
+        self.assertEqual(batched.get_performance_summary()["metrics"]["avg_rssi"],
+                         sequential.get_performance_summary()["metrics"]["avg_rssi"])
+    
     def test_optimization_mode_setting(self):
         """Testa configuração de modo de otimização"""
         self.engine.set_optimization_mode("energy")
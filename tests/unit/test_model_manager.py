@@ -2,6 +2,7 @@
 Test Model Manager - TDD Implementation
 Testa o sistema de atualização OTA de modelos federados
 """
+import io
 import unittest
 from unittest.mock import Mock, patch, MagicMock, mock_open
 import tempfile
@@ -26,7 +27,7 @@ class TestModelManager(unittest.TestCase):
             self.model_path
         )
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_update_available(self, mock_get):
         """Testa detecção de atualização disponível"""
         # Mock da resposta do servidor
@@ -47,7 +48,7 @@ class TestModelManager(unittest.TestCase):
         self.assertTrue(result)
         self.assertEqual(self.updater.current_version, 5)
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_no_update_needed(self, mock_get):
         """Testa quando não há atualização necessária"""
         # Mock da resposta do servidor
@@ -66,7 +67,7 @@ class TestModelManager(unittest.TestCase):
         self.assertFalse(result)
         self.assertEqual(self.updater.current_version, 4)
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_network_error_handling(self, mock_get):
         """Testa tratamento de erros de rede"""
         # Mock de erro de rede
@@ -78,12 +79,12 @@ class TestModelManager(unittest.TestCase):
         # Verificar que retorna False em caso de erro
         self.assertFalse(result)
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_download_model_diff(self, mock_get):
         """Testa download de diferenças do modelo"""
         # Mock da resposta
         mock_response = MagicMock()
-        mock_response.iter_content.return_value = [b"diff_data"]
+        mock_response.raw = io.BytesIO(b"diff_data")
         mock_get.return_value = mock_response
         
         # Executar download
@@ -93,51 +94,195 @@ class TestModelManager(unittest.TestCase):
         self.assertTrue(diff_path.endswith(".diff"))
         self.assertIn("4", diff_path)
         self.assertIn("5", diff_path)
-    
-    @patch('os.path.getsize')
-    @patch('builtins.open', new_callable=mock_open)
-    @patch('bsdiff4.patch')
+
+    @patch('requests.Session.get')
+    def test_download_checksum_mismatch(self, mock_get):
+        """Testa rejeição do download quando o checksum não confere"""
+        mock_response = MagicMock()
+        mock_response.headers = {"checksum": "0" * 64}
+        mock_response.raw = io.BytesIO(b"diff_data")
+        mock_get.return_value = mock_response
+
+        with self.assertRaises(ValueError):
+            self.updater._download_model_diff("http://aggregator", 5)
+
+        # Arquivo parcial deve ser removido
+        diff_path = os.path.join(tempfile.gettempdir(), "model_4_to_5.diff")
+        self.assertFalse(os.path.exists(diff_path))
+
+    @patch('requests.Session.get')
+    def test_download_preallocates_known_size(self, mock_get):
+        """Testa reserva de espaço quando Content-Length é conhecido"""
+        mock_response = MagicMock()
+        mock_response.headers = {"Content-Length": "9"}
+        mock_response.raw = io.BytesIO(b"diff_data")
+        mock_get.return_value = mock_response
+
+        with patch.object(self.updater, '_preallocate', return_value=True) as mock_alloc:
+            diff_path = self.updater._download_model_diff("http://aggregator", 5)
+
+        try:
+            self.assertEqual(mock_alloc.call_args.args[1], 9)
+            with open(diff_path, "rb") as f:
+                self.assertEqual(f.read(), b"diff_data")
+        finally:
+            os.remove(diff_path)
+
+    @patch('requests.Session.get')
+    def test_parallel_range_download(self, mock_get):
+        """Testa download em partes paralelas quando o servidor aceita Range"""
+        import hashlib
+        from atous_sec_network.core import model_manager
+
+        diff_data = os.urandom(10_000)
+
+        def fake_get(url, headers=None, **kwargs):
+            response = MagicMock()
+            if headers and "Range" in headers:
+                start, end = map(int, headers["Range"][len("bytes="):].split("-"))
+                response.status_code = 206
+                response.iter_content.return_value = [diff_data[start:end + 1]]
+            else:
+                response.headers = {
+                    "Accept-Ranges": "bytes",
+                    "Content-Length": str(len(diff_data)),
+                    "checksum": hashlib.sha256(diff_data).hexdigest()
+                }
+            return response
+
+        mock_get.side_effect = fake_get
+
+        with patch.object(model_manager, "PARALLEL_DOWNLOAD_MIN_SIZE", 1):
+            diff_path = self.updater._download_model_diff("http://aggregator", 5)
+
+        try:
+            # Requisição inicial + uma requisição por parte
+            self.assertEqual(mock_get.call_count, 1 + model_manager.PARALLEL_DOWNLOAD_PARTS)
+            with open(diff_path, "rb") as f:
+                self.assertEqual(f.read(), diff_data)
+        finally:
+            os.remove(diff_path)
+
+    def test_session_reuse_and_retries(self):
+        """Testa sessão HTTP persistente com política de retentativas"""
+        # Instâncias distintas compartilham o mesmo pool de conexões
+        other = FederatedModelUpdater("node456")
+        self.assertIs(other._session, self.updater._session)
+        
+        adapter = self.updater._session.get_adapter("https://aggregator")
+        self.assertEqual(adapter.max_retries.total, self.updater.max_retries)
+        self.assertIn(503, adapter.max_retries.status_forcelist)
+
+    @patch.object(FederatedModelUpdater, '_fsync_file')
+    @patch('os.replace')
+    @patch.object(FederatedModelUpdater, '_verify_model_integrity', return_value=True)
+    @patch('bsdiff4.file_patch')
     @patch('os.remove')
-    def test_apply_patch_success(self, mock_remove, mock_patch, mock_file, mock_size):
+    def test_apply_patch_success(self, mock_remove, mock_patch, mock_verify,
+                                 mock_replace, mock_fsync):
         """Testa aplicação bem-sucedida de patch"""
-        # Mock do tamanho do arquivo
-        mock_size.return_value = 1024
-        
-        # Mock dos dados
-        current_model = b"MODLcurrent_model_data"  # Add magic header
-        patched_model = b"MODLpatched_model_data"
-        
-        # Mock bsdiff4.patch to return valid data
-        mock_patch.return_value = patched_model
-        
-        # Configurar mocks
-        mock_file.return_value.__enter__.return_value.read.return_value = current_model
-        
         # Executar aplicação de patch
         self.updater._apply_patch("test.diff")
         
-        # Verificar que o arquivo foi escrito
-        mock_file.assert_called()
-        mock_patch.assert_called_once()
+        # Verificar que o patch foi aplicado em arquivo e trocado atomicamente
+        mock_patch.assert_called_once_with(
+            self.model_path, self.model_path + ".tmp", "test.diff"
+        )
+        mock_verify.assert_called_once_with(self.model_path + ".tmp")
+        mock_fsync.assert_called_once_with(self.model_path + ".tmp")
+        mock_replace.assert_called_once_with(self.model_path + ".tmp", self.model_path)
         mock_remove.assert_called_once_with("test.diff")
 
-    @patch('os.path.getsize')
-    @patch('builtins.open', new_callable=mock_open)
-    def test_apply_patch_failure_recovery(self, mock_file, mock_size):
+    @patch('os.replace')
+    @patch('bsdiff4.file_patch')
+    @patch.object(FederatedModelUpdater, '_verify_model_integrity', return_value=False)
+    def test_apply_patch_failure_recovery(self, mock_verify, mock_patch, mock_replace):
         """Testa recuperação em caso de falha na aplicação de patch"""
-        # Mock de falha (arquivo vazio após patch)
-        mock_size.return_value = 0
-        
-        # Mock dos dados
-        current_model = b"MODLcurrent_model_data"
-        diff_data = b"diff_data"
-        
-        # Configurar mocks
-        mock_file.return_value.__enter__.return_value.read.return_value = current_model
-        
-        # Executar aplicação de patch (deve falhar e restaurar backup)
+        # Executar aplicação de patch (modelo resultante inválido deve falhar)
         with self.assertRaises(ValueError):
             self.updater._apply_patch("test.diff")
+        
+        # Modelo atual nunca é substituído
+        mock_replace.assert_not_called()
+
+    @patch('requests.Session.get')
+    def test_zstd_dictionary_download(self, mock_get):
+        """Testa download de diff comprimido com zstd e dicionário"""
+        from atous_sec_network.core import model_manager
+
+        zstandard = model_manager.zstandard
+        if zstandard is None:
+            self.skipTest("zstandard não instalado")
+
+        diff_data = b"BSDIFF40" + bytes(2048) + b"MODL" * 256
+        samples = [b"BSDIFF40" + bytes(512) + b"MODL" * i for i in range(1, 200)]
+        zstd_dict = zstandard.train_dictionary(1024, samples)
+        compressed = zstandard.ZstdCompressor(level=19, dict_data=zstd_dict).compress(diff_data)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            dict_path = os.path.join(temp_dir, "model.dict")
+            with open(dict_path, "wb") as f:
+                f.write(zstd_dict.as_bytes())
+            self.updater.zstd_dict_path = dict_path
+
+            mock_response = MagicMock()
+            mock_response.headers = {"Content-Encoding": "zstd"}
+            mock_response.raw = io.BytesIO(compressed)
+            mock_get.return_value = mock_response
+
+            diff_path = self.updater._download_model_diff("http://aggregator", 5)
+            try:
+                with open(diff_path, "rb") as f:
+                    self.assertEqual(f.read(), diff_data)
+            finally:
+                os.remove(diff_path)
+
+        self.assertIn("zstd", mock_get.call_args.kwargs["headers"]["Accept-Encoding"])
+
+    @patch('bsdiff4.file_patch')
+    def test_hdiffpatch_backend(self, mock_bsdiff):
+        """Testa seleção do formato de patch informado pelo servidor"""
+        from atous_sec_network.core import model_manager
+
+        mock_hdiff = MagicMock()
+        with patch.object(model_manager, "hdiffpatch", mock_hdiff), \
+                patch('requests.Session.get') as mock_get:
+            mock_response = MagicMock()
+            mock_response.headers = {"X-Patch-Backend": "hdiffpatch"}
+            mock_response.raw = io.BytesIO(b"diff_data")
+            mock_get.return_value = mock_response
+
+            diff_path = self.updater._download_model_diff("http://aggregator", 5)
+            os.remove(diff_path)
+            self.assertEqual(self.updater.patch_backend, "hdiffpatch")
+
+            self.updater._patch_file("old.bin", "new.bin", "model.diff")
+
+        mock_hdiff.patch_file.assert_called_once_with("old.bin", "model.diff", "new.bin")
+        mock_bsdiff.assert_not_called()
+
+    def test_apply_patch_end_to_end(self):
+        """Testa aplicação real de patch bsdiff com troca atômica"""
+        import bsdiff4
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            model_path = os.path.join(temp_dir, "model.bin")
+            new_model_path = os.path.join(temp_dir, "model_new.bin")
+            diff_path = os.path.join(temp_dir, "model.diff")
+
+            with open(model_path, "wb") as f:
+                f.write(b"MODL" + b"a" * 1000)
+            with open(new_model_path, "wb") as f:
+                f.write(b"MODL" + b"a" * 500 + b"b" * 600)
+            bsdiff4.file_diff(model_path, new_model_path, diff_path)
+
+            updater = FederatedModelUpdater(self.node_id, 4, model_path, backup_dir=temp_dir)
+            updater._apply_patch(diff_path)
+
+            with open(model_path, "rb") as f_model, open(new_model_path, "rb") as f_new:
+                self.assertEqual(f_model.read(), f_new.read())
+            self.assertFalse(os.path.exists(model_path + ".tmp"))
+            self.assertFalse(os.path.exists(diff_path))
     
     def test_size_aware_download(self):
         """Testa verificação de tamanho para dispositivos com limitação"""
@@ -148,14 +293,27 @@ class TestModelManager(unittest.TestCase):
     
     def test_model_integrity_check(self):
         """Testa verificação de integridade do modelo"""
-        # Mock de dados de modelo com magic header
-        model_data = b"MODLmodel_data_here"
-        
-        # Testar verificação de integridade
-        is_valid = self.updater._verify_model_integrity(model_data)
-        self.assertTrue(is_valid)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            valid_path = os.path.join(temp_dir, "valid.bin")
+            invalid_path = os.path.join(temp_dir, "invalid.bin")
+            short_path = os.path.join(temp_dir, "short.bin")
+            
+            # Modelo com magic header, modelo sem header e modelo truncado
+            for path, data in ((valid_path, b"MODLmodel_data_here"),
+                               (invalid_path, b"XXXXmodel_data_here"),
+                               (short_path, b"MODL")):
+                with open(path, "wb") as f:
+                    f.write(data)
+            
+            # Testar verificação de integridade
+            self.assertTrue(self.updater._verify_model_integrity(valid_path))
+            self.assertFalse(self.updater._verify_model_integrity(invalid_path))
+            self.assertFalse(self.updater._verify_model_integrity(short_path))
+            self.assertFalse(self.updater._verify_model_integrity(
+                os.path.join(temp_dir, "missing.bin")
+            ))
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_incremental_update(self, mock_get):
         """Testa atualização incremental vs completa"""
         # Mock para atualização incremental
@@ -178,14 +336,14 @@ class TestModelManager(unittest.TestCase):
         self.assertTrue(self.updater._is_version_compatible(5, 4))
         self.assertFalse(self.updater._is_version_compatible(3, 4))
     
-    @patch('pathlib.Path.glob')
-    @patch('shutil.copy2')
-    def test_rollback_mechanism(self, mock_copy, mock_glob):
+    @patch.object(FederatedModelUpdater, '_fast_copy')
+    def test_rollback_mechanism(self, mock_copy):
         """Testa mecanismo de rollback"""
-        # Mock backup files
-        mock_backup = Mock()
-        mock_backup.stat.return_value.st_mtime = 1234567890
-        mock_glob.return_value = [mock_backup]
+        # Backups indexados da versão alvo
+        self.updater._backup_index = {
+            4: [(1234567800, "backups/model_v4_1234567800.bak"),
+                (1234567890, "backups/model_v4_1234567890.bak")]
+        }
         
         # Simular falha e rollback
         self.updater.current_version = 5
@@ -196,15 +354,173 @@ class TestModelManager(unittest.TestCase):
         # Verificar que voltou para versão anterior
         self.assertTrue(result)
         self.assertEqual(self.updater.current_version, 4)
-        mock_copy.assert_called_once()
-    
-    @patch('requests.get')
+        mock_copy.assert_called_once_with("backups/model_v4_1234567890.bak", self.model_path)
+
+    def test_backup_index(self):
+        """Testa índice de backups construído na inicialização e atualizado"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for name in ("model_v3_100.bak", "model_v3_200.bak", "model_v4_150.bak", "notes.txt"):
+                with open(os.path.join(temp_dir, name), "wb") as f:
+                    f.write(b"MODL0000")
+
+            model_path = os.path.join(temp_dir, "model.bin")
+            with open(model_path, "wb") as f:
+                f.write(b"MODL1111")
+
+            updater = FederatedModelUpdater(self.node_id, 5, model_path, backup_dir=temp_dir)
+            self.assertEqual(sorted(updater._backup_index), [3, 4])
+            self.assertEqual(
+                updater._backup_index[3][-1][1], os.path.join(temp_dir, "model_v3_200.bak")
+            )
+
+            backup_path = updater._create_backup()
+            self.assertEqual(updater._backup_index[5][-1][1], backup_path)
+
+            self.assertTrue(updater.rollback_to_version(3))
+            with open(model_path, "rb") as f:
+                self.assertEqual(f.read(), b"MODL0000")
+            self.assertFalse(updater.rollback_to_version(9))
+
+    def test_fast_copy(self):
+        """Testa cópia rápida de arquivos preservando o conteúdo"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            src = os.path.join(temp_dir, "model.bin")
+            dst = os.path.join(temp_dir, "model.bak")
+            with open(src, "wb") as f:
+                f.write(b"MODL" + os.urandom(4096))
+
+            self.updater._fast_copy(src, dst)
+
+            with open(src, "rb") as f_src, open(dst, "rb") as f_dst:
+                self.assertEqual(f_src.read(), f_dst.read())
+
+    def test_fast_copy_short_copy_falls_back(self):
+        """Testa que uma cópia curta do kernel recorre ao shutil.copy2"""
+        from atous_sec_network.core import model_manager
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            src = os.path.join(temp_dir, "model.bin")
+            dst = os.path.join(temp_dir, "model.bak")
+            with open(src, "wb") as f:
+                f.write(b"MODL" + os.urandom(4096))
+
+            with patch.object(model_manager, "fcntl", None), \
+                    patch.object(os, "copy_file_range", return_value=0, create=True):
+                self.updater._fast_copy(src, dst)
+
+            with open(src, "rb") as f_src, open(dst, "rb") as f_dst:
+                self.assertEqual(f_src.read(), f_dst.read())
+
+    def test_cleanup_old_backups(self):
+        """Testa remoção apenas de backups antigos"""
+        import time
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            updater = FederatedModelUpdater(self.node_id, backup_dir=temp_dir)
+            old_backup = os.path.join(temp_dir, "model_v1_1.bak")
+            new_backup = os.path.join(temp_dir, "model_v2_2.bak")
+            other_file = os.path.join(temp_dir, "notes.txt")
+            for path in (old_backup, new_backup, other_file):
+                with open(path, "wb") as f:
+                    f.write(b"MODL")
+
+            ten_days_ago = time.time() - 10 * 24 * 3600
+            os.utime(old_backup, (ten_days_ago, ten_days_ago))
+            os.utime(other_file, (ten_days_ago, ten_days_ago))
+
+            self.assertEqual(updater.cleanup_old_backups(max_age_days=7), 1)
+            self.assertFalse(os.path.exists(old_backup))
+            self.assertTrue(os.path.exists(new_backup))
+            self.assertTrue(os.path.exists(other_file))
+
+    def test_version_history_append_only(self):
+        """Testa persistência incremental do histórico de versões"""
+        from atous_sec_network.core import model_manager
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            updater = FederatedModelUpdater(self.node_id, backup_dir=temp_dir)
+            for version in range(1, 21):
+                updater.current_version = version
+                updater._save_version_history()
+
+            history_file = os.path.join(temp_dir, model_manager.HISTORY_FILENAME)
+            with open(history_file) as f:
+                lines = [json.loads(line) for line in f if line.strip()]
+
+            # Arquivo compactado periodicamente, nunca cresce sem limite
+            max_lines = updater.max_rollback_versions * model_manager.HISTORY_COMPACTION_FACTOR
+            self.assertLessEqual(len(lines), max_lines)
+            self.assertEqual(lines[-1]["version"], 20)
+
+            reloaded = FederatedModelUpdater(self.node_id, backup_dir=temp_dir)
+            self.assertEqual(
+                [entry["version"] for entry in reloaded.version_history],
+                [18, 19, 20]
+            )
+
+            # Sem orjson o histórico continua legível e gravável com json
+            with patch.object(model_manager, "orjson", None):
+                fallback = FederatedModelUpdater(self.node_id, 21, backup_dir=temp_dir)
+                fallback._save_version_history()
+            reloaded = FederatedModelUpdater(self.node_id, backup_dir=temp_dir)
+            self.assertEqual(reloaded.version_history[-1]["version"], 21)
+
+    def test_version_history_migrates_legacy_file(self):
+        """Testa migração do histórico legado (array JSON) para JSON Lines"""
+        from atous_sec_network.core import model_manager
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            legacy = [{"version": v, "timestamp": 0.0, "node_id": self.node_id} for v in (1, 2)]
+            with open(os.path.join(temp_dir, model_manager.LEGACY_HISTORY_FILENAME), "w") as f:
+                json.dump(legacy, f)
+
+            updater = FederatedModelUpdater(self.node_id, 3, backup_dir=temp_dir)
+            updater._save_version_history()
+
+            reloaded = FederatedModelUpdater(self.node_id, backup_dir=temp_dir)
+            self.assertEqual([entry["version"] for entry in reloaded.version_history], [1, 2, 3])
+
+    def test_version_history_tolerates_torn_line(self):
+        """Testa que uma linha cortada no fim do histórico não descarta as demais"""
+        from atous_sec_network.core import model_manager
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            history_file = os.path.join(temp_dir, model_manager.HISTORY_FILENAME)
+            with open(history_file, "w") as f:
+                f.write('{"version": 1}\n{"version": 2}\n{"vers')
+
+            updater = FederatedModelUpdater(self.node_id, 3, backup_dir=temp_dir)
+            self.assertEqual([entry["version"] for entry in updater.version_history], [1, 2])
+            updater._save_version_history()
+
+            reloaded = FederatedModelUpdater(self.node_id, backup_dir=temp_dir)
+            self.assertEqual([entry["version"] for entry in reloaded.version_history], [1, 2, 3])
+
+    def test_version_history_failed_migration_keeps_entries(self):
+        """Testa que falha ao gravar a migração mantém o histórico legado carregado"""
+        from atous_sec_network.core import model_manager
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with open(os.path.join(temp_dir, model_manager.LEGACY_HISTORY_FILENAME), "w") as f:
+                json.dump([{"version": 1}, {"version": 2}], f)
+
+            with patch.object(FederatedModelUpdater, "_compact_version_history",
+                              side_effect=PermissionError("somente leitura")):
+                updater = FederatedModelUpdater(self.node_id, 3, backup_dir=temp_dir)
+            self.assertEqual([entry["version"] for entry in updater.version_history], [1, 2])
+
+            # Migração repetida no próximo salvamento, sem perder as entradas legadas
+            updater._save_version_history()
+            reloaded = FederatedModelUpdater(self.node_id, backup_dir=temp_dir)
+            self.assertEqual([entry["version"] for entry in reloaded.version_history], [1, 2, 3])
+
+    @patch('requests.Session.get')
     def test_bandwidth_optimization(self, mock_get):
         """Testa otimização de banda para downloads"""
         # Mock de resposta com compressão
         mock_response = MagicMock()
         mock_response.headers = {"content-encoding": "gzip"}
-        mock_response.iter_content.return_value = [b"compressed_data"]
+        mock_response.raw = io.BytesIO(b"compressed_data")
         mock_get.return_value = mock_response
         
         # Executar download
@@ -246,11 +562,65 @@ class TestModelSecurity(unittest.TestCase):
             # Test validation
             is_valid = self.updater._validate_checksum(temp_path, expected_checksum)
             self.assertTrue(is_valid)
+
+            # Checksum BLAKE2b negociado com o servidor
+            blake_checksum = hashlib.blake2b(b"test_data").hexdigest()
+            self.assertTrue(
+                self.updater._validate_checksum(temp_path, blake_checksum, "blake2b")
+            )
+            self.assertFalse(
+                self.updater._validate_checksum(temp_path, expected_checksum, "md5")
+            )
         finally:
             # Clean up
             import os
             os.unlink(temp_path)
-    
+
+    def test_model_info_checksum(self):
+        """Testa checksum calculado em blocos em get_model_info"""
+        import hashlib
+        from atous_sec_network.core import model_manager
+
+        # Conteúdo maior que um bloco de hashing
+        model_data = b"MODL" + b"x" * (model_manager.HASH_CHUNK_SIZE + 123)
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(model_data)
+            temp_path = f.name
+
+        try:
+            self.updater.model_path = temp_path
+            self.updater.hash_algorithm = "blake2b"
+            info = self.updater.get_model_info()
+
+            self.assertEqual(info["size"], len(model_data))
+            self.assertEqual(info["checksum_algorithm"], "blake2b")
+            self.assertEqual(info["checksum"], hashlib.blake2b(model_data).hexdigest())
+
+            # Arquivo inalterado: checksum vem do cache, sem novo hash
+            with patch.object(self.updater, '_file_checksum') as mock_checksum:
+                self.assertEqual(self.updater.get_model_info()["checksum"], info["checksum"])
+                mock_checksum.assert_not_called()
+
+            # Páginas do modelo liberadas do page cache após a leitura
+            if hasattr(os, "posix_fadvise"):
+                self.updater._info_cache = None
+                with patch('os.posix_fadvise') as mock_fadvise:
+                    self.updater.get_model_info()
+                advices = [call.args[3] for call in mock_fadvise.call_args_list]
+                self.assertEqual(
+                    advices, [os.POSIX_FADV_SEQUENTIAL, os.POSIX_FADV_DONTNEED]
+                )
+
+            # Arquivo alterado: cache invalidado pelo stat
+            with open(temp_path, "ab") as f:
+                f.write(b"extra")
+            info = self.updater.get_model_info()
+            self.assertEqual(
+                info["checksum"], hashlib.blake2b(model_data + b"extra").hexdigest()
+            )
+        finally:
+            os.unlink(temp_path)
+
     def test_encryption_decryption(self):
         """Testa criptografia/descriptografia de modelos"""
         # Mock de dados criptografados
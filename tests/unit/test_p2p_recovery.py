@@ -6,9 +6,17 @@ import unittest
 from unittest.mock import Mock, patch, MagicMock
 import time
 import threading
+import socket
 from typing import Dict, List, Set
 
-from atous_sec_network.network.p2p_recovery import ChurnMitigation
+import numpy as np
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from atous_sec_network.network.p2p_recovery import (
+    ChurnMitigation, HealthTable, FailureTable, FailureHistory, HashRing, NodeRegistry,
+    RoutingTable, Shard
+)
 
 
 class TestP2PRecovery(unittest.TestCase):
@@ -17,7 +25,6 @@ class TestP2PRecovery(unittest.TestCase):
     def setUp(self):
         """Configuração inicial para cada teste"""
         self.nodes = ["node1", "node2", "node3", "node4", "node5"]
-<<<<<<< HEAD
         self.mitigator = ChurnMitigation(self.nodes, health_check_interval=1)  # Short interval for tests
         self.mitigator.set_recovery_timeout(1)  # Short timeout for tests
     
@@ -25,9 +32,6 @@ class TestP2PRecovery(unittest.TestCase):
         """Limpeza após cada teste"""
         if hasattr(self, 'mitigator'):
             self.mitigator.stop_health_monitor()
-=======
-        self.mitigator = ChurnMitigation(self.nodes)
->>>>>>> master
     
     def test_initial_node_list(self):
         """Testa inicialização da lista de nós"""
@@ -51,6 +55,96 @@ class TestP2PRecovery(unittest.TestCase):
         self.assertIn("node3", self.mitigator.failed_nodes)
         self.assertEqual(len(self.mitigator.failed_nodes), 1)
     
+    def test_tcp_probe_batch(self):
+        """Testa sondas TCP concorrentes para nós com endereço configurado"""
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("127.0.0.1", 0))
+        server.listen(8)
+        self.addCleanup(server.close)
+        
+        closed = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        closed.bind(("127.0.0.1", 0))
+        closed_port = closed.getsockname()[1]
+        closed.close()
+        
+        self.mitigator.set_node_address("node1", "127.0.0.1", server.getsockname()[1])
+        self.mitigator.set_node_address("node2", "127.0.0.1", closed_port)
+        self.mitigator._ping_node = lambda node: True
+        
+        results = self.mitigator._probe_nodes(["node1", "node2", "node3"])
+        
+        self.assertEqual(results, [True, False, True])
+    
+    def test_health_table_state(self):
+        """Testa estado de saúde em SoA após falha, recuperação e remoção"""
+        self.mitigator.handle_node_failure("node2")
+        self.assertEqual(self.mitigator.node_health["node2"].failure_count, 1)
+        self.assertFalse(self.mitigator.node_health["node2"].is_active)
+        
+        self.mitigator._restore_node("node2")
+        self.assertTrue(self.mitigator.node_health["node2"].is_active)
+        self.assertEqual(self.mitigator.node_health["node2"].failure_count, 0)
+        
+        self.mitigator.remove_node("node1")
+        health = self.mitigator.get_health_metrics()["node_health"]
+        self.assertNotIn("node1", health)
+        self.assertEqual(set(health), {"node2", "node3", "node4", "node5"})
+    
+    def test_health_table_growth(self):
+        """Testa crescimento da tabela de saúde além da capacidade inicial"""
+        table = HealthTable(capacity=2)
+        for i in range(5):
+            table.add(f"n{i}", float(i))
+        table.remove("n1")
+        
+        self.assertEqual(len(table), 4)
+        self.assertEqual(table.get("n4").last_seen, 4.0)
+        self.assertEqual(table.index["n4"], 1)
+    
+    def test_batch_response_time_simulation(self):
+        """Testa tempos de resposta simulados sorteados em lote pelo gerador da instância"""
+        mitigator = ChurnMitigation(["a", "b", "c"])
+        mitigator._rng = np.random.default_rng(42)
+        expected = np.random.default_rng(42).uniform(0.01, 0.1, 3).astype(np.float32)
+        
+        mitigator._update_nodes_health(["a", "b", "c"], 10.0)
+        
+        np.testing.assert_array_equal(
+            [mitigator.node_health[n].response_time for n in "abc"], expected
+        )
+    
+    def test_health_table_dict_cache(self):
+        """Testa memoização de to_dict até a próxima mutação"""
+        table = HealthTable()
+        table.add("n1", 1.0)
+        
+        first = table.to_dict()
+        self.assertIs(table.to_dict()["n1"], first["n1"])
+        
+        # Mutação do chamador não afeta chamadas seguintes
+        first.clear()
+        self.assertIn("n1", table.to_dict())
+        
+        table.mark_failed("n1")
+        second = table.to_dict()
+        self.assertIsNot(second, first)
+        self.assertEqual(second["n1"]["failure_count"], 1)
+        
+        table.mark_alive(table.indices(["n1"]), 2.0, np.array([0.05]))
+        self.assertEqual(table.to_dict()["n1"]["last_seen"], 2.0)
+    
+    def test_failure_table_sweep(self):
+        """Testa varredura vetorizada das falhas por idade"""
+        table = FailureTable(capacity=1)
+        for i in range(5):
+            table[f"n{i}"] = 100.0 + i
+        del table["n0"]
+        
+        self.assertEqual(len(table), 4)
+        self.assertEqual(sorted(table.older_than(110.0, 7.5)), ["n1", "n2"])
+        self.assertEqual(table["n4"], 104.0)
+        self.assertEqual(dict(table), {"n1": 101.0, "n2": 102.0, "n3": 103.0, "n4": 104.0})
+    
     def test_data_redistribution(self):
         """Testa redistribuição de dados após falha"""
         # Configurar shards de dados
@@ -74,7 +168,6 @@ class TestP2PRecovery(unittest.TestCase):
         for node in remaining_nodes:
             total_shards += len(self.mitigator.data_shards[node])
         
-<<<<<<< HEAD
         # Com erasure coding, os shards do nó falhado são redistribuídos para redundância
         # Total esperado: 8 shards originais + 2 shards redistribuídos = 10 shards
         self.assertEqual(total_shards, 10)
@@ -82,10 +175,6 @@ class TestP2PRecovery(unittest.TestCase):
         # Verificar que todos os nós restantes receberam pelo menos um shard adicional
         for node in remaining_nodes:
             self.assertGreaterEqual(len(self.mitigator.data_shards[node]), 2)
-=======
-        # Deve ter 8 shards (4 nós * 2 shards cada)
-        self.assertEqual(total_shards, 8)
->>>>>>> master
     
     def test_service_reassignment(self):
         """Testa reassignação de serviços após falha"""
@@ -107,6 +196,27 @@ class TestP2PRecovery(unittest.TestCase):
         self.assertEqual(self.mitigator.service_assignments["security_monitor"], "node2")
         self.assertEqual(self.mitigator.service_assignments["data_storage"], "node1")
     
+    def test_consistent_service_reassignment(self):
+        """Testa que a reassignação por hashing consistente é determinística e mínima"""
+        ring = HashRing(self.nodes)
+        services = [f"service{i}" for i in range(50)]
+        before = {service: ring.lookup(service) for service in services}
+        
+        ring.remove("node3")
+        after = {service: ring.lookup(service) for service in services}
+        
+        # Apenas serviços que estavam em node3 mudam de nó
+        for service in services:
+            if before[service] != "node3":
+                self.assertEqual(before[service], after[service])
+            else:
+                self.assertNotEqual(after[service], "node3")
+        
+        # Outra instância com os mesmos nós escolhe o mesmo destino
+        self.mitigator.service_assignments = {"aggregator": "node3"}
+        self.mitigator.handle_node_failure("node3")
+        self.assertEqual(self.mitigator.service_assignments["aggregator"], ring.lookup("aggregator"))
+    
     def test_erasure_coding_redundancy(self):
         """Testa redundância com erasure coding"""
         # Configurar dados com erasure coding
@@ -158,7 +268,6 @@ class TestP2PRecovery(unittest.TestCase):
     
     def test_recovery_mechanism(self):
         """Testa mecanismo de recuperação de nós"""
-<<<<<<< HEAD
         # Simular falha com timestamp antigo
         old_time = time.time() - 2  # 2 segundos atrás
         self.mitigator._handle_node_failure("node3", old_time)
@@ -170,19 +279,6 @@ class TestP2PRecovery(unittest.TestCase):
         # Forçar verificação de recuperação
         current_time = time.time()
         self.mitigator._check_node_recovery(current_time)
-=======
-        # Simular falha
-        self.mitigator.handle_node_failure("node3")
-        self.assertIn("node3", self.mitigator.failed_nodes)
-        
-        # Simular recuperação
-        self.mitigator._ping_node = lambda node: True  # Todos os nós respondem
-        
-        # Executar monitoramento
-        self.mitigator.start_health_monitor()
-        time.sleep(0.1)
-        self.mitigator.stop_health_monitor()
->>>>>>> master
         
         # Verificar que o nó foi restaurado
         self.assertIn("node3", self.mitigator.active_nodes)
@@ -217,14 +313,10 @@ class TestP2PRecovery(unittest.TestCase):
         # Simular partição de rede (alguns nós isolados)
         def mock_ping(node):
             # node1 e node2 podem se comunicar, node3, node4, node5 formam outra partição
-<<<<<<< HEAD
             # Mas para simular uma partição real, alguns nós não respondem
             if node in ["node3", "node4", "node5"]:
                 return False  # Nós na partição isolada não respondem
             return True  # Nós na partição principal respondem
-=======
-            return node in ["node1", "node2"] or node in ["node3", "node4", "node5"]
->>>>>>> master
         
         self.mitigator._ping_node = mock_ping
         
@@ -233,7 +325,6 @@ class TestP2PRecovery(unittest.TestCase):
         time.sleep(0.1)
         self.mitigator.stop_health_monitor()
         
-<<<<<<< HEAD
         # Verificar que os nós isolados foram detectados como falhados
         self.assertNotIn("node3", self.mitigator.active_nodes)
         self.assertNotIn("node4", self.mitigator.active_nodes)
@@ -242,11 +333,6 @@ class TestP2PRecovery(unittest.TestCase):
         # Verificar que os nós na partição principal ainda estão ativos
         self.assertIn("node1", self.mitigator.active_nodes)
         self.assertIn("node2", self.mitigator.active_nodes)
-=======
-        # Verificar que as partições foram detectadas
-        # (Implementação específica dependerá da estratégia de detecção)
-        self.assertTrue(len(self.mitigator.active_nodes) < 5)
->>>>>>> master
     
     def test_graceful_degradation(self):
         """Testa degradação graciosa do sistema"""
@@ -308,22 +394,142 @@ class TestP2PRecovery(unittest.TestCase):
         self.assertNotIn("old_node2", self.mitigator.failed_nodes)
         self.assertIn("recent_node", self.mitigator.failed_nodes)
 
+    
+    def test_redistribution_round_robin(self):
+        """Testa que a redistribuição distribui shards em round-robin"""
+        shards = [f"shard{i}" for i in range(10)]
+        self.mitigator.data_shards = {"node1": list(shards), "node2": ["own"]}
+        self.mitigator._deactivate("node1")
+        
+        self.mitigator._redistribute_data("node1", ("node2", "node3", "node4"))
+        
+        data = {node: [shard.data for shard in self.mitigator.data_shards[node]]
+                for node in ("node2", "node3", "node4")}
+        self.assertEqual(data["node2"], ["own"] + shards[0::3])
+        self.assertEqual(data["node3"], shards[1::3])
+        self.assertEqual(data["node4"], shards[2::3])
+        self.assertNotIn("node1", self.mitigator.data_shards)
+    
+    def test_active_snapshot_tracks_membership(self):
+        """Testa que o snapshot de nós ativos acompanha falhas e recuperações"""
+        self.mitigator.handle_node_failure("node2")
+        self.mitigator.add_node("node6")
+        self.mitigator._restore_node("node2")
+        self.mitigator.remove_node("node4")
+        
+        self.assertEqual(self.mitigator._active_snapshot,
+                         ("node1", "node3", "node5", "node6", "node2"))
+        self.assertEqual(set(self.mitigator._active_snapshot), self.mitigator.active_nodes)
+    
+    def test_restore_active_node_is_idempotent(self):
+        """Testa que restaurar um nó ainda ativo não o duplica no snapshot"""
+        self.mitigator.failed_nodes["node1"] = time.time()
+        self.mitigator._restore_node("node1")
+        
+        self.assertEqual(self.mitigator._active_snapshot.count("node1"), 1)
+        self.assertNotIn("node1", self.mitigator.failed_nodes)
+    
+    def test_failure_history_window(self):
+        """Testa janela recente e taxa de recuperação do histórico de falhas"""
+        registry = NodeRegistry()
+        history = FailureHistory(capacity=4, registry=registry)
+        for i, node in enumerate(["a", "b", "c", "a", "d", "b"]):
+            history.append(node, 100.0 + i)
+        
+        # Ring buffer mantém apenas as 4 últimas falhas, em ordem
+        self.assertEqual([f["node"] for f in history], ["c", "a", "d", "b"])
+        self.assertEqual({f["type"] for f in history}, {"connection_failure"})
+        
+        recent = history.recent(103.0)
+        self.assertEqual([registry.ids[i] for i in recent], ["a", "d", "b"])
+        for node in ["a", "b", "x"]:
+            registry.set_active(node, True)
+        self.assertEqual(history.recovered_count(recent), 2)
+        
+        # Timestamps fora de ordem continuam filtrados corretamente
+        history.append("c", 50.0)
+        self.assertEqual(sorted(registry.ids[i] for i in history.recent(103.0)), ["a", "b", "d"])
+    
+    def test_node_registry_ids(self):
+        """Testa IDs inteiros estáveis e crescimento da máscara de ativos"""
+        registry = NodeRegistry(["n0", "n1"], capacity=2)
+        for i in range(2, 10):
+            registry.set_active(f"n{i}", True)
+        
+        self.assertEqual(registry.intern("n1"), 1)
+        self.assertEqual(registry.intern("n9"), 9)
+        self.assertEqual(np.flatnonzero(registry.active).tolist(), list(range(2, 10)))
+    
+    def test_health_metrics_recovery_rate(self):
+        """Testa taxa de recuperação calculada a partir do histórico"""
+        self.mitigator.handle_node_failure("node1")
+        self.mitigator.handle_node_failure("node2")
+        self.mitigator._restore_node("node1")
+        
+        metrics = self.mitigator.get_health_metrics()
+        
+        self.assertAlmostEqual(metrics["recovery_rate"], 0.5)
+    
+    def test_cleanup_uses_monotonic_deadline(self):
+        """Testa que a limpeza periódica segue um prazo monotônico"""
+        self.mitigator.health_check_interval = 0
+        self.mitigator._probe_nodes = lambda nodes: [True] * len(nodes)
+        
+        # wait() retornando True encerra o loop após um ciclo
+        with patch.object(self.mitigator, "_cleanup_old_failures") as mock_cleanup, \
+                patch.object(self.mitigator._stop_event, "wait", return_value=True):
+            self.mitigator._next_cleanup = time.monotonic() + 3600
+            self.mitigator._run_monitor_cycles()
+            mock_cleanup.assert_not_called()
+            
+            self.mitigator._next_cleanup = time.monotonic() - 1
+            self.mitigator._run_monitor_cycles()
+            mock_cleanup.assert_called_once()
+        
+        self.assertGreater(self.mitigator._next_cleanup, time.monotonic())
+    
+    def test_concurrent_membership_changes(self):
+        """Testa consistência do estado sob falhas e recuperações concorrentes"""
+        def churn(node):
+            for _ in range(200):
+                self.mitigator.handle_node_failure(node)
+                self.mitigator._restore_node(node)
+                self.mitigator.get_health_metrics()
+        
+        threads = [threading.Thread(target=churn, args=(node,)) for node in self.nodes]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(self.mitigator.active_nodes, set(self.nodes))
+        self.assertEqual(sorted(self.mitigator._active_snapshot), self.nodes)
+        self.assertEqual(len(self.mitigator.failed_nodes), 0)
+    
+    def test_stop_interrupts_wait(self):
+        """Testa que parar o monitor não espera o intervalo de verificação"""
+        self.mitigator.health_check_interval = 300
+        self.mitigator.start_health_monitor()
+        time.sleep(0.1)
+        
+        start = time.monotonic()
+        self.mitigator.stop_health_monitor()
+        
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertFalse(self.mitigator._monitor_thread.is_alive())
+
 
 class TestP2PNetworkTopology(unittest.TestCase):
     """Testa topologia da rede P2P"""
     
     def setUp(self):
         self.nodes = ["node1", "node2", "node3", "node4", "node5", "node6"]
-<<<<<<< HEAD
         self.mitigator = ChurnMitigation(self.nodes, health_check_interval=1)  # Short interval for tests
     
     def tearDown(self):
         """Limpeza após cada teste"""
         if hasattr(self, 'mitigator'):
             self.mitigator.stop_health_monitor()
-=======
-        self.mitigator = ChurnMitigation(self.nodes)
->>>>>>> master
     
     def test_network_connectivity(self):
         """Testa conectividade da rede"""
@@ -362,6 +568,66 @@ class TestP2PNetworkTopology(unittest.TestCase):
         for routes in self.mitigator.routing_table.values():
             self.assertNotIn("node3", routes)
     
+    def test_routing_table_csr(self):
+        """Testa a tabela de roteamento CSR como mapeamento"""
+        table = RoutingTable(NodeRegistry())
+        table["a"] = ["b", "c"]
+        table["b"] = ["a", "c", "d"]
+        table["c"] = []
+        table["a"] = ["d"]
+        
+        self.assertEqual(dict(table), {"a": ["d"], "b": ["a", "c", "d"], "c": []})
+        
+        table.remove_node("c")
+        self.assertEqual(dict(table), {"a": ["d"], "b": ["a", "d"]})
+        self.assertEqual(table.indptr[-1], len(table.indices))
+        
+        del table["a"]
+        self.assertNotIn("a", table)
+        self.assertEqual(table["b"], ["a", "d"])
+        with self.assertRaises(KeyError):
+            table["x"]
+    
+    def test_route_lookup_cache(self):
+        """Testa consulta de próximo salto com cache LRU invalidado por mutações"""
+        self.mitigator.routing_table = {
+            "node1": ["node2", "node3"],
+            "node2": ["node1", "node4"],
+            "node3": ["node1", "node5"],
+            "node4": ["node2", "node6"],
+            "node5": ["node3", "node6"],
+            "node6": ["node4", "node5"]
+        }
+        
+        self.assertEqual(self.mitigator.lookup_route("node1", "node4"), "node2")
+        self.assertEqual(self.mitigator.lookup_route("node1", "node4"), "node2")
+        self.assertEqual(self.mitigator._route_cache.cache_info().hits, 1)
+        
+        # Falha de node2 muda a rota e invalida o cache
+        self.mitigator.handle_node_failure("node2")
+        self.assertEqual(self.mitigator.lookup_route("node1", "node4"), "node3")
+        self.assertEqual(self.mitigator.lookup_route("node1", "node1"), "node1")
+        self.assertIsNone(self.mitigator.lookup_route("node1", "unknown"))
+        
+        del self.mitigator.routing_table["node3"]
+        self.assertIsNone(self.mitigator.lookup_route("node1", "node4"))
+    
+    def test_route_lookup_waits_for_lock(self):
+        """Testa que a consulta de rota aguarda mutações em andamento sob o lock"""
+        self.mitigator.routing_table = {"node1": ["node2"], "node2": ["node1"]}
+        result = []
+        
+        with self.mitigator._lock:
+            lookup = threading.Thread(
+                target=lambda: result.append(self.mitigator.lookup_route("node1", "node2"))
+            )
+            lookup.start()
+            lookup.join(timeout=0.1)
+            self.assertTrue(lookup.is_alive())
+        
+        lookup.join(timeout=1)
+        self.assertEqual(result, ["node2"])
+    
     def test_network_diameter_calculation(self):
         """Testa cálculo do diâmetro da rede"""
         # Configurar rede em anel
@@ -386,16 +652,12 @@ class TestP2PSecurity(unittest.TestCase):
     
     def setUp(self):
         self.nodes = ["node1", "node2", "node3", "node4"]
-<<<<<<< HEAD
         self.mitigator = ChurnMitigation(self.nodes, health_check_interval=1)  # Short interval for tests
     
     def tearDown(self):
         """Limpeza após cada teste"""
         if hasattr(self, 'mitigator'):
             self.mitigator.stop_health_monitor()
-=======
-        self.mitigator = ChurnMitigation(self.nodes)
->>>>>>> master
     
     def test_byzantine_fault_detection(self):
         """Testa detecção de falhas bizantinas"""
@@ -421,6 +683,54 @@ class TestP2PSecurity(unittest.TestCase):
         # Verificar que node3 foi detectado como bizantino
         self.assertIn("node3", byzantine_nodes)
     
+    def test_byzantine_detection_uses_shard_flag(self):
+        """Testa detecção bizantina pela flag de corrupção do shard"""
+        self.mitigator.data_shards = {
+            "node1": [Shard(b"\x00\x01")],
+            "node2": [Shard(b"corrupted-looking payload", corrupted=False)],
+            "node4": [Shard(b"\x02", corrupted=True)]
+        }
+        
+        self.assertEqual(sorted(self.mitigator._detect_byzantine_failures()), ["node4"])
+    
+    def test_byzantine_detection_wraps_appended_shards(self):
+        """Testa shards brutos acrescentados diretamente à lista do nó"""
+        self.mitigator.data_shards = {"node1": [Shard(b"ok")]}
+        self.mitigator.data_shards["node1"].append("shardA1")
+        self.mitigator.data_shards["node2"].append("shardA2_corrupted")
+        
+        self.assertEqual(self.mitigator._detect_byzantine_failures(), ["node2"])
+        self.assertTrue(all(isinstance(shard, Shard) for shard in self.mitigator.data_shards["node1"]))
+    
+    def test_byzantine_detection_verifies_digest(self):
+        """Testa detecção bizantina por digest de shard que não confere"""
+        forged = Shard(b"payload adulterado", digest=Shard(b"payload original").digest)
+        self.mitigator.data_shards = {
+            "node1": [Shard(b"payload original")],
+            "node2": [forged]
+        }
+        
+        self.assertTrue(Shard(b"payload original").intact())
+        self.assertFalse(forged.intact())
+        self.assertEqual(self.mitigator._detect_byzantine_failures(), ["node2"])
+        
+        # Shard já verificado dispensa novo hash do conteúdo
+        with patch("atous_sec_network.network.p2p_recovery.shard_digest") as mock_digest:
+            self.assertFalse(self.mitigator._is_node_byzantine("node1"))
+        mock_digest.assert_not_called()
+    
+    def test_byzantine_detection_duplicated_forged_shards(self):
+        """Testa que shards forjados duplicados não se anulam após uma verificação"""
+        good = Shard(b"payload original", digest=Shard(b"payload original").digest)
+        forged = Shard(b"payload adulterado", digest=Shard(b"payload outro").digest)
+        self.mitigator.data_shards = {"node1": [good]}
+        self.assertFalse(self.mitigator._is_node_byzantine("node1"))
+        
+        self.mitigator.data_shards["node1"].extend([forged, forged])
+        
+        self.assertFalse(forged.intact())
+        self.assertTrue(self.mitigator._is_node_byzantine("node1"))
+    
     def test_consensus_mechanism(self):
         """Testa mecanismo de consenso para decisões críticas"""
         # Simular decisão que requer consenso
@@ -432,20 +742,70 @@ class TestP2PSecurity(unittest.TestCase):
         # Verificar que consenso foi alcançado
         self.assertTrue(consensus_reached)
     
+    def test_consensus_quorum_fraction(self):
+        """Testa quórum fracionário sobre nós ativos e falhados"""
+        decision_data = {"action": "reassign_services"}
+        total = len(self.nodes)
+        
+        # Falhar nós até ficar abaixo de 60% ativos
+        failed = 0
+        while (total - failed) * 10 >= 6 * total:
+            self.assertTrue(self.mitigator._reach_consensus(decision_data))
+            self.mitigator.handle_node_failure(self.nodes[failed])
+            failed += 1
+        
+        self.assertFalse(self.mitigator._reach_consensus(decision_data))
+        self.assertEqual(self.mitigator._nodes.active_count(), total - failed)
+        self.assertFalse(self.mitigator._reach_consensus(decision_data, quorum=total))
+    
     def test_encrypted_communication(self):
         """Testa comunicação criptografada entre nós"""
+        key = AESGCM.generate_key(bit_length=256)
+        sender = ChurnMitigation(self.nodes, node_id="node1")
+        receiver = ChurnMitigation(self.nodes, node_id="node2")
+        sender.set_node_key("node2", key)
+        receiver.set_node_key("node1", key)
+        
         # Simular mensagem criptografada
         message = "sensitive_data"
-        encrypted_message = self.mitigator._encrypt_message(message, "node2")
+        encrypted_message = sender._encrypt_message(message, "node2")
         
         # Verificar que a mensagem foi criptografada
         self.assertNotEqual(encrypted_message, message)
         
-        # Simular descriptografia
-        decrypted_message = self.mitigator._decrypt_message(encrypted_message, "node2")
+        # Descriptografia no par de destino
+        decrypted_message = receiver._decrypt_message(encrypted_message, "node1")
         
         # Verificar que a mensagem foi descriptografada corretamente
-        self.assertEqual(decrypted_message, message)
+        self.assertEqual(decrypted_message, message.encode())
+        
+        # A resposta no sentido inverso também é aceita
+        reply = receiver._encrypt_message(b"ack", "node1")
+        self.assertEqual(sender._decrypt_message(reply, "node2"), b"ack")
+    
+    def test_encrypted_communication_rejects_tampering(self):
+        """Testa que mensagens adulteradas ou de outro par são rejeitadas"""
+        key = AESGCM.generate_key(bit_length=256)
+        self.mitigator.set_node_key("node2", key)
+        self.mitigator.set_node_key("node3", key)
+        encrypted_message = self.mitigator._encrypt_message(b"sensitive_data", "node2")
+        tampered = encrypted_message[:-1] + bytes([encrypted_message[-1] ^ 1])
+        
+        with self.assertRaises(InvalidTag):
+            self.mitigator._decrypt_message(tampered, "node2")
+        with self.assertRaises(InvalidTag):
+            self.mitigator._decrypt_message(encrypted_message, "node3")
+        # Mensagem refletida de volta ao remetente não é aceita
+        with self.assertRaises(InvalidTag):
+            self.mitigator._decrypt_message(encrypted_message, "node2")
+    
+    def test_encrypted_communication_requires_key(self):
+        """Testa que pares sem chave configurada são rejeitados"""
+        with self.assertRaises(KeyError):
+            self.mitigator._encrypt_message(b"sensitive_data", "node4")
+        with self.assertRaises(KeyError):
+            self.mitigator._decrypt_message(b"\x00" * 32, "node4")
+        self.assertNotIn("node4", self.mitigator._node_keys)
 
 
 if __name__ == '__main__':